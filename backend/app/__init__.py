@@ -7,14 +7,41 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flasgger import Swagger
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import config
-from app.logger.logger_config import setup_logger
+from app.logger.logger_config import setup_logger, get_log_stats
+from app.common.password_hasher import PasswordHasher
+from app.common.count_cache import CountCache
+from app.common.cache import RecordCache
+from app.common.json_provider import FastJSONProvider
+from app.common.metrics import Metrics
+from app.common.replicas import ReplicaRouter, RoutingSession
+from app.common.rate_limiter import LoginRateLimiter
+from app.common.revocation import TokenBlocklist
+from app.common.courier_index import CourierIndex
+from app.common.location_pings import LocationPingBuffer
+from app.common.dispatcher import Dispatcher
+from app.common.routing import RoutingEngine
+from app.common.eta_matrix import EtaMatrix
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
+password_hasher = PasswordHasher()
+count_cache = CountCache()
+user_cache = RecordCache(config_prefix='USER_CACHE')
+token_versions = RecordCache(config_prefix='TOKEN_VERSION_CACHE')
+metrics = Metrics()
+replica_router = ReplicaRouter()
+login_rate_limiter = LoginRateLimiter()
+token_blocklist = TokenBlocklist()
+courier_index = CourierIndex()
+location_pings = LocationPingBuffer()
+dispatcher = Dispatcher()
+routing = RoutingEngine()
+eta_matrix = EtaMatrix()
 
 
 def create_app(config_name='development'):
@@ -28,14 +55,37 @@ def create_app(config_name='development'):
         Flask: Configured Flask application
     """
     app = Flask(__name__)
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
     
     # Load configuration
     app.config.from_object(config[config_name])
     
+    # Client addresses (login throttling, access logs) come from the proxies' X-Forwarded-* headers
+    trusted_proxies = app.config.get('TRUSTED_PROXIES', 0)
+    if trusted_proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies)
+    
+    # Connection pool instrumentation must be configured before engines exist
+    from app.database.pool import pool_monitor
+    pool_monitor.init_app(app)
+    replica_router.init_app(app)
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    password_hasher.init_app(app)
+    count_cache.init_app(app)
+    user_cache.init_app(app)
+    token_versions.init_app(app)
+    login_rate_limiter.init_app(app)
+    token_blocklist.init_app(app)
+    courier_index.init_app(app)
+    location_pings.init_app(app)
+    dispatcher.init_app(app)
+    routing.init_app(app)
+    eta_matrix.init_app(app, router=routing)
     CORS(app)
     
     # Swagger configuration with JWT support
@@ -87,14 +137,54 @@ def create_app(config_name='development'):
     
     # Setup logging
     setup_logger(app)
+    
+    # Revocations held in process memory only reach the worker that handled the logout
+    if app.config.get('TOKEN_BLOCKLIST_BACKEND') == 'memory' and not (app.debug or app.testing):
+        app.logger.warning(
+            'TOKEN_BLOCKLIST_BACKEND=memory: revoked tokens are only rejected by the process that '
+            'revoked them; set TOKEN_BLOCKLIST_BACKEND=redis when running several workers'
+        )
+    
+    # Request metrics and /metrics endpoint
+    metrics.init_app(app)
+    metrics.add_collector('password_hasher', password_hasher.get_stats)
+    metrics.add_collector('count_cache', count_cache.get_stats)
+    metrics.add_collector('user_cache', user_cache.get_stats)
+    metrics.add_collector('token_version_cache', token_versions.get_stats)
+    metrics.add_collector('log_queue', lambda: get_log_stats(app))
+    metrics.add_collector('db_pool', pool_monitor.get_stats)
+    metrics.add_collector('replicas', replica_router.get_stats)
+    metrics.add_collector('login_rate_limiter', login_rate_limiter.get_stats)
+    metrics.add_collector('token_blocklist', token_blocklist.get_stats)
+    metrics.add_collector('courier_index', courier_index.get_stats)
+    metrics.add_collector('location_pings', location_pings.get_stats)
+    metrics.add_collector('dispatch', dispatcher.get_stats)
+    metrics.add_collector('routing', routing.get_stats)
+    metrics.add_collector('eta_cache', eta_matrix.get_stats)
 
     # Import models to ensure they're registered with SQLAlchemy
     with app.app_context():
         from app.models.user_model import User
+        from app.models.location_ping_model import LocationPing
+        from app.models.shipment_model import Shipment
+        from app.models.address_model import Address
+        from app.models.order_model import Order
+        from app.models.courier_model import Courier
 
     # Register blueprints
     from app.routes.user_route import user_bp
+    from app.routes.courier_route import courier_bp
+    from app.routes.routing_route import routing_bp
     app.register_blueprint(user_bp, url_prefix='/api/v1/users')
+    app.register_blueprint(courier_bp, url_prefix='/api/v1/couriers')
+    app.register_blueprint(routing_bp, url_prefix='/api/v1/routing')
+
+    # CLI commands
+    from app.commands import users_cli, passwords_cli, pings_cli, eta_cli
+    app.cli.add_command(users_cli)
+    app.cli.add_command(passwords_cli)
+    app.cli.add_command(pings_cli)
+    app.cli.add_command(eta_cli)
 
     # Error handlers
     register_error_handlers(app)
@@ -117,6 +207,10 @@ def create_app(config_name='development'):
             'service': 'QuickDrop Backend'
         }), 200
     
+    # Open pooled connections before accepting traffic
+    with app.app_context():
+        pool_monitor.warm_up(app, db.engine)
+    
     return app
 
 
@@ -168,6 +262,15 @@ def register_error_handlers(app):
 def register_jwt_handlers(app):
     """Register JWT error handlers for better error messages"""
 
+    @jwt.user_identity_loader
+    def user_identity_lookup(identity):
+        # PyJWT 2.10+ rejects tokens whose subject is not a string
+        return str(identity)
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return token_blocklist.is_revoked(jwt_payload['jti'])
+
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
         return jsonify({
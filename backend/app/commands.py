@@ -0,0 +1,140 @@
+"""
+Flask CLI commands
+"""
+import sys
+import time
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app import password_hasher
+from app.common.importers import chunked, detect_format, read_records
+from app.common.password_hasher import calibrate, MIN_ROUNDS, MAX_ROUNDS
+from app.database.db import transaction
+from app.database.partitions import drop_partitions_before, ensure_daily_partitions, supports_partitions, today_utc
+from app.models.location_ping_model import LocationPing
+from app.services.eta_service import EtaService
+from app.services.user_service import UserService
+
+users_cli = AppGroup('users', help='Manage users.')
+passwords_cli = AppGroup('passwords', help='Password hashing settings.')
+pings_cli = AppGroup('pings', help='Courier location ping storage.')
+eta_cli = AppGroup('eta', help='Travel time cache.')
+
+
+@users_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl', 'json']),
+              help='Input format (default: from the file extension, jsonl for stdin).')
+@click.option('--chunk-size', type=int, help='Rows per transaction (default: BULK_IMPORT_CHUNK_SIZE).')
+@click.option('--workers', type=int, help='Password hashing processes (default: BULK_IMPORT_HASH_WORKERS).')
+def import_users(source, fmt, chunk_size, workers):
+    """
+    Import users from a CSV, JSON Lines or JSON file ('-' for stdin)
+
+    The file is streamed one chunk at a time, so its size is not limited by
+    memory. Failed rows are printed to stderr; the exit code is 1 if any row failed.
+    """
+    if chunk_size:
+        current_app.config['BULK_IMPORT_CHUNK_SIZE'] = chunk_size
+    if workers is not None:
+        password_hasher.bulk_workers = workers
+    fmt = fmt or detect_format(source.name)
+    chunk_size = current_app.config.get('BULK_IMPORT_CHUNK_SIZE', 500)
+
+    created = failed = 0
+    row = 1
+    try:
+        for chunk in chunked(read_records(source, fmt), chunk_size):
+            report, error = UserService.bulk_create_users(chunk, start_row=row)
+            if error:
+                raise click.ClickException(f"{error['message']}: {error.get('error', '')}")
+
+            for result in report['results']:
+                if result['status'] == 'failed':
+                    errors = '; '.join(f'{field}: {message}' for field, messages in result['errors'].items()
+                                       for message in messages)
+                    click.echo(f"row {result['row']} ({result.get('email')}): {errors}", err=True)
+            created += report['created']
+            failed += report['failed']
+            row += len(chunk)
+            click.echo(f'{row - 1} rows processed: {created} created, {failed} failed')
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    if failed:
+        sys.exit(1)
+
+
+@passwords_cli.command('calibrate')
+@click.option('--target-ms', type=float, default=250, show_default=True,
+              help='Acceptable time for one hash on this host.')
+@click.option('--samples', type=click.IntRange(1), default=3, show_default=True, help='Hashes timed per cost.')
+@click.option('--min-rounds', type=click.IntRange(MIN_ROUNDS, MAX_ROUNDS), default=10, show_default=True)
+@click.option('--max-rounds', type=click.IntRange(MIN_ROUNDS, MAX_ROUNDS), default=16, show_default=True)
+def calibrate_passwords(target_ms, samples, min_rounds, max_rounds):
+    """
+    Benchmark bcrypt on this host and recommend BCRYPT_ROUNDS
+
+    Run it on the production hardware, ideally while the host is under its
+    usual load. Each hash blocks a password worker for the time shown.
+    """
+    timings, recommended = calibrate(target_ms / 1000, samples, min_rounds, max_rounds)
+    current = current_app.config.get('BCRYPT_ROUNDS')
+
+    click.echo(f'{"rounds":>6}  {"ms/hash":>9}')
+    for rounds, seconds in timings.items():
+        marks = ' <- recommended' if rounds == recommended else ''
+        marks += ' (current)' if rounds == current else ''
+        click.echo(f'{rounds:>6}  {seconds * 1000:>9.1f}{marks}')
+
+    if timings[recommended] > target_ms / 1000:
+        click.echo(f'Even {recommended} rounds is slower than {target_ms:.0f}ms; consider faster hardware.', err=True)
+    click.echo(f'Recommended: BCRYPT_ROUNDS={recommended} (currently {current})')
+
+
+@pings_cli.command('partitions')
+@click.option('--days-ahead', type=click.IntRange(0), default=3, show_default=True,
+              help='Future days to create partitions for.')
+@click.option('--retention-days', type=click.IntRange(1),
+              help='Days of partitions to keep (default: LOCATION_PING_RETENTION_DAYS).')
+def manage_ping_partitions(days_ahead, retention_days):
+    """
+    Create upcoming day partitions of location_ping and drop expired ones
+
+    Run it daily (e.g. from cron). Writes create a missing partition on
+    demand too, but creating them ahead keeps DDL off the write path.
+    """
+    table = LocationPing.__table__
+    if not supports_partitions(table):
+        raise click.ClickException('location_ping is only partitioned on PostgreSQL')
+
+    retention_days = retention_days or current_app.config.get('LOCATION_PING_RETENTION_DAYS', 30)
+    today = today_utc()
+    with transaction():
+        created = ensure_daily_partitions(table, [today + timedelta(days=i) for i in range(days_ahead + 1)])
+        dropped = drop_partitions_before(table, today - timedelta(days=retention_days - 1))
+
+    click.echo(f'Partitions present: {", ".join(created)}')
+    click.echo(f'Dropped {len(dropped)} partition(s) older than {retention_days} days'
+               + (f': {", ".join(dropped)}' if dropped else ''))
+
+
+@eta_cli.command('warmup')
+@click.option('--orders', type=click.IntRange(1), help='Recent orders to read (default: ETA_CACHE_WARMUP_ORDERS).')
+@click.option('--days', type=click.IntRange(1), help='Look-back window in days (default: ETA_CACHE_WARMUP_DAYS).')
+@click.option('--pairs', type=click.IntRange(1), help='Cell pairs to compute (default: ETA_CACHE_WARMUP_PAIRS).')
+def warm_eta_cache(orders, days, pairs):
+    """
+    Fill the travel time cache with the cell pairs of recent orders
+
+    Only useful with ETA_CACHE_BACKEND=redis: a memory cache lives in the
+    serving processes, which warm themselves on their first request.
+    """
+    if current_app.config.get('ETA_CACHE_BACKEND', 'memory') != 'redis':
+        click.echo('Warning: the ETA cache is not shared; this warms only this command\'s process.', err=True)
+    started = time.monotonic()
+    computed = EtaService.warm_up(orders, days, pairs)
+    click.echo(f'Computed {computed} cell pairs in {time.monotonic() - started:.2f}s')
@@ -0,0 +1,251 @@
+"""
+Record cache
+Read-through caching of model rows with pluggable storage backends
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCacheBackend:
+    """
+    In-process cache bounded by entry count and TTL
+
+    Args:
+        max_entries (int): Entries kept before the least recently used is evicted
+        ttl (int): Seconds an entry stays valid
+    """
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """
+    Shared cache stored in Redis
+
+    Any client exposing get/setex/delete works, so tests can pass an in-memory
+    fake instead of a live server. Entries expire through Redis TTLs and size is
+    bounded by the server's maxmemory policy, so evictions are not counted here.
+
+    The cache is never the source of truth, so Redis being down must not fail
+    requests: errors are counted and logged (at most once per ERROR_LOG_INTERVAL
+    seconds), a failed get is a miss and a failed set or delete is skipped.
+    A skipped delete leaves the old entry until its TTL runs out.
+
+    Args:
+        client: Redis-compatible client
+        ttl (int): Seconds an entry stays valid
+        prefix (str): Namespace prepended to every key
+        errors (tuple): Exception types meaning the server is unavailable
+        logger: Logger for those errors (default: this module's)
+    """
+
+    ERROR_LOG_INTERVAL = 60
+
+    def __init__(self, client, ttl=300, prefix='quickdrop:', errors=(OSError,), logger=None):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.errors = errors
+        self.logger = logger or logging.getLogger(__name__)
+        self.evictions = 0
+        self.failures = 0
+        self._logged_at = None
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except self.errors as e:
+            self._failed('read', e)
+            return None
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key, value):
+        try:
+            self.client.setex(self.prefix + key, self.ttl, json.dumps(value, separators=(',', ':')))
+        except self.errors as e:
+            self._failed('write', e)
+
+    def delete_many(self, keys):
+        if keys:
+            try:
+                self.client.delete(*[self.prefix + key for key in keys])
+            except self.errors as e:
+                self._failed('evict', e)
+
+    def _failed(self, operation, error):
+        self.failures += 1
+        now = time.monotonic()
+        if self._logged_at is None or now - self._logged_at >= self.ERROR_LOG_INTERVAL:
+            self._logged_at = now
+            self.logger.error(
+                f'Redis cache {self.prefix} failed to {operation} ({self.failures} failures so far): {str(error)}'
+            )
+
+    def clear(self):
+        # Shared entries are left to expire rather than scanning the keyspace
+        pass
+
+
+class RecordCache:
+    """
+    Read-through cache for model rows
+
+    Values must be JSON-compatible (e.g. User.to_cache records) so the same
+    entries can live in process memory or in Redis. Writes evict entries through
+    BaseModel.save/update/delete rather than updating them in place.
+
+    Config (for the default 'USER_CACHE' prefix):
+        USER_CACHE_BACKEND: 'memory', 'redis' or 'none'
+        USER_CACHE_TTL: Seconds an entry stays valid
+        USER_CACHE_MAX_ENTRIES: Size bound of the memory backend
+        USER_CACHE_REDIS_URL: Redis URL for the redis backend
+
+    Args:
+        app: Flask application instance
+        config_prefix (str): Prefix of the config keys above
+    """
+
+    BACKENDS = ('memory', 'redis', 'none')
+
+    def __init__(self, app=None, config_prefix='USER_CACHE'):
+        self.config_prefix = config_prefix
+        self.backend = None
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, backend=None):
+        """
+        Configure the cache from the application config
+
+        Args:
+            app: Flask application instance
+            backend: Backend instance overriding the configured one (e.g. a fake in tests)
+        """
+        if backend is None:
+            backend = self._backend_from_config(app.config, app.logger)
+        self.backend = backend
+        with self._lock:
+            self._stats = {'hits': 0, 'misses': 0}
+        app.extensions[self.config_prefix.lower()] = self
+
+    def get(self, key):
+        """
+        Get a cached record
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            dict: Cached record or None on a miss
+        """
+        if self.backend is None:
+            return None
+        value = self.backend.get(key)
+        with self._lock:
+            self._stats['hits' if value is not None else 'misses'] += 1
+        return value
+
+    def set(self, key, value):
+        """
+        Store a record
+
+        Args:
+            key (str): Cache key
+            value (dict): JSON-compatible record
+        """
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    def delete_many(self, keys):
+        """
+        Evict records
+
+        Args:
+            keys (list): Cache keys to evict
+        """
+        if self.backend is not None and keys:
+            self.backend.delete_many(keys)
+
+    def clear(self):
+        """Evict every record held by this process"""
+        if self.backend is not None:
+            self.backend.clear()
+
+    def get_stats(self):
+        """
+        Get cache metrics
+
+        Returns:
+            dict: Hit, miss and eviction counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['evictions'] = getattr(self.backend, 'evictions', 0)
+        stats['backend_failures'] = getattr(self.backend, 'failures', 0)
+        stats['backend'] = type(self.backend).__name__ if self.backend is not None else None
+        return stats
+
+    def _backend_from_config(self, config, logger=None):
+        prefix = self.config_prefix
+        name = config.get(f'{prefix}_BACKEND', 'memory')
+        ttl = config.get(f'{prefix}_TTL', 300)
+
+        if name not in self.BACKENDS:
+            raise ValueError(f"Invalid {prefix}_BACKEND '{name}'. Must be one of: {', '.join(self.BACKENDS)}")
+        if name == 'none':
+            return None
+        if name == 'redis':
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError(f'{prefix}_BACKEND=redis requires the redis package') from e
+            client = redis.Redis.from_url(config[f'{prefix}_REDIS_URL'])
+            return RedisCacheBackend(client, ttl=ttl, prefix=f'quickdrop:{prefix.lower()}:',
+                                     errors=(redis.RedisError, OSError), logger=logger)
+        return LRUCacheBackend(max_entries=config.get(f'{prefix}_MAX_ENTRIES', 10000), ttl=ttl)
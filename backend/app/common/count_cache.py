@@ -0,0 +1,135 @@
+"""
+Count cache for paginated listings
+Serves listing totals from a TTL cache or the query planner instead of COUNT(*)
+"""
+import threading
+import time
+
+
+class CountCache:
+    """
+    Cached and estimated row counts for paginated queries
+
+    Counts are grouped by namespace (usually a table name) and keyed by the
+    filters that produced them, so a write can drop every cached count of the
+    table at once with invalidate(namespace). Invalidation is per process; the
+    TTL bounds how stale a count can get when another process writes.
+
+    Modes:
+        exact: COUNT(*) cached for COUNT_CACHE_TTL seconds
+        estimate: the planner's row estimate (PostgreSQL), exact elsewhere
+        auto: the estimate when it exceeds COUNT_ESTIMATE_THRESHOLD, exact otherwise
+
+    Config:
+        COUNT_CACHE_MODE: One of the modes above
+        COUNT_CACHE_TTL: Seconds a count stays cached (0 disables caching)
+        COUNT_ESTIMATE_THRESHOLD: Row estimate above which auto mode stops counting
+    """
+
+    MODES = ('exact', 'estimate', 'auto')
+
+    def __init__(self, app=None):
+        self.mode = 'exact'
+        self.ttl = 0
+        self.threshold = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'estimates': 0, 'invalidations': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the cache from the application config
+
+        Args:
+            app: Flask application instance
+        """
+        mode = app.config.get('COUNT_CACHE_MODE', 'exact')
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid COUNT_CACHE_MODE '{mode}'. Must be one of: {', '.join(self.MODES)}")
+        self.mode = mode
+        self.ttl = app.config.get('COUNT_CACHE_TTL', 30)
+        self.threshold = app.config.get('COUNT_ESTIMATE_THRESHOLD', 100000)
+        self.clear()
+        app.extensions['count_cache'] = self
+
+    def count(self, query, namespace, key=None):
+        """
+        Get the number of rows a query returns
+
+        Args:
+            query: SQLAlchemy query object
+            namespace (str): Group used for invalidation, e.g. 'users'
+            key: Hashable description of the query filters
+
+        Returns:
+            tuple: (total, is_exact)
+        """
+        cache_key = (namespace, key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[2] > now:
+                self._stats['hits'] += 1
+                return entry[0], entry[1]
+            self._stats['misses'] += 1
+
+        query = query.order_by(None)
+        total, is_exact = None, True
+        if self.mode != 'exact':
+            estimate = self._planner_estimate(query)
+            if estimate is not None and (self.mode == 'estimate' or estimate > self.threshold):
+                total, is_exact = estimate, False
+        if total is None:
+            total = query.count()
+
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[cache_key] = (total, is_exact, now + self.ttl)
+        return total, is_exact
+
+    def invalidate(self, namespace):
+        """
+        Drop every cached count in a namespace
+
+        Args:
+            namespace (str): Namespace passed to count()
+        """
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[cache_key]
+            self._stats['invalidations'] += 1
+
+    def clear(self):
+        """Drop every cached count"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """
+        Get cache metrics
+
+        Returns:
+            dict: Hit, miss, estimate and invalidation counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        stats['mode'] = self.mode
+        return stats
+
+    def _planner_estimate(self, query):
+        """Ask PostgreSQL's planner how many rows the query returns"""
+        connection = query.session.connection()
+        if connection.dialect.name != 'postgresql':
+            return None
+
+        compiled = query.statement.compile(dialect=connection.dialect)
+        plan = connection.exec_driver_sql(
+            f'EXPLAIN (FORMAT JSON) {compiled}',
+            compiled.params
+        ).scalar()
+        with self._lock:
+            self._stats['estimates'] += 1
+        return int(plan[0]['Plan']['Plan Rows'])
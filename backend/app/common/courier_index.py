@@ -0,0 +1,271 @@
+"""
+Courier location index
+In-memory geohash grid of live courier positions for nearby-courier queries
+"""
+import heapq
+import math
+import threading
+import time
+
+from app.common.geo import (
+    KM_PER_DEGREE_LAT, cell_bits, cell_of, cell_size, encode, haversine_km, haversine_to_km, km_to_haversine, ring
+)
+
+
+class CourierIndex:
+    """
+    Live courier positions bucketed by geohash cell
+
+    Each courier sits in the geohash cell of its last reported position.
+    A nearest-couriers query scans square rings of cells outward from the
+    query's cell, ranking candidates by exact haversine distance, and stops
+    once no unscanned cell can hold anything closer than the k-th courier
+    found. With cells sized near typical courier spacing, a query touches a
+    handful of cells instead of every courier. Positions are stored in
+    radians with their latitude cosine, and candidates are ranked by the
+    haversine term, so each candidate costs two sines and no square root.
+
+    Positions older than max_age seconds are ignored by queries and purged
+    at most once per purge_interval.
+
+    Config:
+        COURIER_INDEX_PRECISION: Geohash length of the cells (6 is about 1.2 x 0.6 km)
+        COURIER_INDEX_MAX_AGE: Seconds a position stays live without an update
+    """
+
+    def __init__(self, app=None, precision=6, max_age=120, purge_interval=60):
+        self.precision = precision
+        self.max_age = max_age
+        self.purge_interval = purge_interval
+        self._positions = {}
+        self._cells = {}
+        self._purged_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {'updates': 0, 'queries': 0, 'cells_scanned': 0, 'candidates': 0, 'expired': 0}
+        self._configure_grid()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the index from the application config
+
+        Args:
+            app: Flask application instance
+        """
+        self.precision = app.config.get('COURIER_INDEX_PRECISION', 6)
+        self.max_age = app.config.get('COURIER_INDEX_MAX_AGE', 120)
+        self._configure_grid()
+        self.clear()
+        app.extensions['courier_index'] = self
+
+    def update(self, courier_id, lat, lon, timestamp=None):
+        """
+        Record a courier's position
+
+        Args:
+            courier_id (int): Courier ID
+            lat (float): Latitude in degrees
+            lon (float): Longitude in degrees
+            timestamp (float): When the position was observed (Unix time, default now)
+
+        Returns:
+            bool: False if the position is older than the one already indexed
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        cell = self._cell_key(*cell_of(lat, lon, self.precision))
+        with self._lock:
+            previous = self._positions.get(courier_id)
+            if previous is not None:
+                if previous[2] > timestamp:
+                    return False
+                if previous[3] != cell:
+                    self._discard(courier_id, previous[3])
+            if previous is None or previous[3] != cell:
+                self._cells.setdefault(cell, set()).add(courier_id)
+            phi = math.radians(lat)
+            self._positions[courier_id] = (lat, lon, timestamp, cell, phi, math.radians(lon), math.cos(phi))
+            self._stats['updates'] += 1
+            self._maybe_purge()
+        return True
+
+    def remove(self, courier_id):
+        """
+        Drop a courier from the index (e.g. when going off shift)
+
+        Args:
+            courier_id (int): Courier ID
+        """
+        with self._lock:
+            previous = self._positions.pop(courier_id, None)
+            if previous is not None:
+                self._discard(courier_id, previous[3])
+
+    def position(self, courier_id):
+        """
+        Get a courier's last indexed position
+
+        Args:
+            courier_id (int): Courier ID
+
+        Returns:
+            tuple: (lat, lon, timestamp), or None if unknown or expired
+        """
+        entry = self._positions.get(courier_id)
+        if entry is None or entry[2] < time.time() - self.max_age:
+            return None
+        return entry[:3]
+
+    def nearest(self, lat, lon, k=10, radius_km=None):
+        """
+        Find the live couriers closest to a point
+
+        Args:
+            lat (float): Latitude in degrees
+            lon (float): Longitude in degrees
+            k (int): Maximum number of couriers to return
+            radius_km (float): Ignore couriers farther than this
+
+        Returns:
+            list: (courier_id, distance_km) tuples, closest first
+        """
+        if k <= 0:
+            return []
+        row, column = cell_of(lat, lon, self.precision)
+        cutoff = time.time() - self.max_age
+        phi, lam = math.radians(lat), math.radians(lon)
+        cos_phi = math.cos(phi)
+        sin = math.sin
+        limit = km_to_haversine(radius_km) if radius_km is not None else None
+        # Max-heap of the k best so far, as (-haversine term, courier_id)
+        best = []
+        scanned = set()
+        candidates = 0
+
+        with self._lock:
+            occupied = len(self._cells)
+            positions = self._positions
+            for radius in range(self._rows):
+                if 8 * radius > occupied - len(scanned):
+                    # Sparse index: the next ring has more cells than remain
+                    # occupied, so visiting the occupied cells directly is cheaper
+                    cells = [(key, members) for key, members in self._cells.items() if key not in scanned]
+                else:
+                    cells = []
+                    for r, c in ring(row, column, radius, self.precision):
+                        key = self._cell_key(r, c)
+                        members = self._cells.get(key)
+                        # Wide rings at coarse precision wrap onto cells already scanned
+                        if members and key not in scanned:
+                            cells.append((key, members))
+
+                for key, members in cells:
+                    scanned.add(key)
+                    for courier_id in members:
+                        _, _, timestamp, _, courier_phi, courier_lam, courier_cos = positions[courier_id]
+                        if timestamp < cutoff:
+                            continue
+                        candidates += 1
+                        h = sin((courier_phi - phi) / 2) ** 2 + cos_phi * courier_cos * sin((courier_lam - lam) / 2) ** 2
+                        if limit is not None and h > limit:
+                            continue
+                        if len(best) < k:
+                            heapq.heappush(best, (-h, courier_id))
+                        elif h < -best[0][0]:
+                            heapq.heapreplace(best, (-h, courier_id))
+
+                if len(scanned) == occupied:
+                    break
+                # Anything in an unscanned cell is at least this far away
+                bound = km_to_haversine(self._ring_clearance(row, radius))
+                if len(best) == k and -best[0][0] <= bound:
+                    break
+                if limit is not None and bound >= limit:
+                    break
+
+        with self._lock:
+            self._stats['queries'] += 1
+            self._stats['cells_scanned'] += len(scanned)
+            self._stats['candidates'] += candidates
+        return [(courier_id, haversine_to_km(-negative)) for negative, courier_id in sorted(best, reverse=True)]
+
+    def clear(self):
+        """Remove every position"""
+        with self._lock:
+            self._positions.clear()
+            self._cells.clear()
+            self._stats = {key: 0 for key in self._stats}
+
+    def get_stats(self):
+        """
+        Get index metrics
+
+        Returns:
+            dict: Courier and cell counts plus query counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['couriers'] = len(self._positions)
+            stats['cells'] = len(self._cells)
+        stats['precision'] = self.precision
+        return stats
+
+    def geohash(self, courier_id, precision=None):
+        """
+        Geohash of a courier's last indexed position
+
+        Args:
+            courier_id (int): Courier ID
+            precision (int): Geohash length (default: the index precision)
+
+        Returns:
+            str: Geohash, or None if the courier is unknown or expired
+        """
+        position = self.position(courier_id)
+        if position is None:
+            return None
+        return encode(position[0], position[1], precision or self.precision)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _configure_grid(self):
+        lat_bits, lon_bits = cell_bits(self.precision)
+        self._rows, self._columns = 1 << lat_bits, 1 << lon_bits
+        self._lat_degrees, self._lon_degrees = cell_size(self.precision)
+
+    def _cell_key(self, row, column):
+        return row * self._columns + column
+
+    def _ring_clearance(self, row, radius):
+        """Lower bound on the distance to any cell outside the scanned rings"""
+        if radius == 0:
+            return 0.0
+        lat_km = radius * self._lat_degrees * KM_PER_DEGREE_LAT
+        # Meridians converge, so the narrowest scanned latitude bounds the
+        # east-west clearance
+        edge_lat = max(
+            abs(-90.0 + (row - radius) * self._lat_degrees),
+            abs(-90.0 + (row + radius + 1) * self._lat_degrees)
+        )
+        if edge_lat >= 90.0:
+            return 0.0
+        lon_km = haversine_km(edge_lat, 0.0, edge_lat, min(radius * self._lon_degrees, 180.0))
+        return min(lat_km, lon_km)
+
+    def _discard(self, courier_id, cell):
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(courier_id)
+            if not members:
+                del self._cells[cell]
+
+    def _maybe_purge(self):
+        if time.monotonic() - self._purged_at < self.purge_interval:
+            return
+        cutoff = time.time() - self.max_age
+        expired = [courier_id for courier_id, entry in self._positions.items() if entry[2] < cutoff]
+        for courier_id in expired:
+            self._discard(courier_id, self._positions.pop(courier_id)[3])
+        self._stats['expired'] += len(expired)
+        self._purged_at = time.monotonic()
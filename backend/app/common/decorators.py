@@ -1,10 +1,16 @@
 """
 Custom decorators for authentication, authorization, and other cross-cutting concerns
 """
+import logging
+import random
+import time
+from datetime import datetime
 from functools import wraps
-from flask import request, current_app
+from flask import g, request, current_app
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
-from app.common.utils import error_response
+from app.common.utils import error_response, get_json_body
+from app.services.token_service import TokenService
+from app.services.user_service import UserService
 
 
 def jwt_required_custom(f):
@@ -43,6 +49,12 @@ def role_required(required_roles):
                 claims = get_jwt()
                 user_role = claims.get('role', 'user')
                 
+                # A snapshot from before the user's last update may carry an old role
+                snapshot = claims.get('usr')
+                if snapshot and TokenService.is_stale(get_jwt_identity(), snapshot.get('tv', 0)):
+                    user = UserService.get_user_by_id(get_jwt_identity())
+                    user_role = user.role if user else None
+                
                 if isinstance(required_roles, str):
                     roles = [required_roles]
                 else:
@@ -54,6 +66,8 @@ def role_required(required_roles):
                         403
                     )
                 
+                # The checked role, for handlers that narrow access further
+                g.user_role = user_role
                 return f(*args, **kwargs)
             except Exception as e:
                 current_app.logger.error(f'Role verification failed: {str(e)}')
@@ -66,22 +80,56 @@ def log_request(f):
     """
     Decorator to log incoming requests
     
+    Writes one access-log record per request with method, path, status and
+    duration. A fraction ACCESS_LOG_SAMPLE_RATE of requests is logged, plus
+    every 5xx; nothing is formatted when the request is not logged. Only body
+    fields listed in ACCESS_LOG_BODY_FIELDS are included, taken from the body
+    already parsed for the request, minus any fields its schema marks
+    sensitive.
+    
     Returns:
         function: Decorated function
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_app.logger.info(f'Request: {request.method} {request.path}')
-        current_app.logger.info(f'Request args: {request.args}')
-        if request.is_json:
-            # Don't log sensitive data like passwords
-            data = request.get_json().copy()
-            if 'password' in data:
-                data['password'] = '***'
-            current_app.logger.info(f'Request body: {data}')
-        
+        started = time.perf_counter()
         response = f(*args, **kwargs)
-        current_app.logger.info(f'Response status: {response[1] if isinstance(response, tuple) else 200}')
+        
+        logger = current_app.extensions.get('access_logger', current_app.logger)
+        if not logger.isEnabledFor(logging.INFO):
+            return response
+        
+        status = response[1] if isinstance(response, tuple) else 200
+        sample_rate = current_app.config.get('ACCESS_LOG_SAMPLE_RATE', 1.0)
+        if status < 500 and random.random() >= sample_rate:
+            return response
+        
+        duration_ms = (time.perf_counter() - started) * 1000
+        body = None
+        body_fields = current_app.config.get('ACCESS_LOG_BODY_FIELDS')
+        if body_fields:
+            # Reuse the body parsed for the controller; never log sensitive fields
+            schema = g.get('request_schema')
+            data = g.request_payload if schema is not None else get_json_body()
+            if isinstance(data, dict):
+                sensitive = schema.sensitive if schema is not None else ()
+                body = {field: data[field] for field in body_fields if field in data and field not in sensitive}
+        
+        if current_app.config.get('ACCESS_LOG_FORMAT') == 'json':
+            logger.info(current_app.json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': status,
+                'duration_ms': round(duration_ms, 2),
+                'args': request.args.to_dict(),
+                'body': body,
+                'timestamp': datetime.utcnow()
+            }))
+        else:
+            logger.info(
+                '%s %s %s %.1fms args=%s body=%s',
+                request.method, request.path, status, duration_ms, request.args.to_dict(), body
+            )
         return response
     return decorated_function
 
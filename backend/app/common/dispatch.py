@@ -0,0 +1,215 @@
+"""
+Dispatch matching
+Assigns waiting shipments to free couriers by minimum total pickup distance
+"""
+import math
+
+from app.common.geo import EARTH_RADIUS_KM
+
+INFINITY = float('inf')
+
+
+def pickup_edges(jobs, couriers, max_km=None, per_job=None):
+    """
+    Candidate couriers of each job by brute force
+
+    Distances are computed row by row against courier coordinates converted
+    to radians once, so each pair costs two sines and a square root. The
+    live dispatcher gets its candidates from the courier index instead; this
+    is for the simulator and small batches.
+
+    Args:
+        jobs (list): (job_id, lat, lon) tuples
+        couriers (list): (courier_id, lat, lon) tuples
+        max_km (float): Leave out couriers farther than this
+        per_job (int): Keep only this many closest couriers per job
+
+    Returns:
+        dict: job_id -> list of (courier_id, km), closest first, in job order
+    """
+    ids = [courier_id for courier_id, _, _ in couriers]
+    phis = [math.radians(lat) for _, lat, _ in couriers]
+    lams = [math.radians(lon) for _, _, lon in couriers]
+    cosines = [math.cos(phi) for phi in phis]
+    sin, asin, sqrt = math.sin, math.asin, math.sqrt
+    diameter = 2 * EARTH_RADIUS_KM
+
+    edges = {}
+    for job_id, lat, lon in jobs:
+        phi, lam = math.radians(lat), math.radians(lon)
+        cos_phi = math.cos(phi)
+        row = [
+            (courier_id, diameter * asin(min(sqrt(
+                sin((courier_phi - phi) / 2) ** 2 + cos_phi * courier_cos * sin((courier_lam - lam) / 2) ** 2
+            ), 1.0)))
+            for courier_id, courier_phi, courier_lam, courier_cos in zip(ids, phis, lams, cosines)
+        ]
+        if max_km is not None:
+            row = [edge for edge in row if edge[1] <= max_km]
+        row.sort(key=lambda edge: edge[1])
+        edges[job_id] = row[:per_job] if per_job is not None else row
+    return edges
+
+
+def solve_assignment(cost):
+    """
+    Minimum-cost assignment of every row to a distinct column (Hungarian method)
+
+    Shortest augmenting path formulation with row and column potentials,
+    O(rows² x columns). Infinite costs mark forbidden pairs; the caller
+    must leave every row at least one finite column or the result is
+    meaningless for that row.
+
+    Args:
+        cost (list): Cost matrix as a list of rows, with rows <= columns
+
+    Returns:
+        list: Column assigned to each row
+    """
+    rows = len(cost)
+    if not rows:
+        return []
+    columns = len(cost[0])
+    # 1-based arrays; column 0 is the virtual start of each augmenting path
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (columns + 1)
+    owner = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+
+    for i in range(1, rows + 1):
+        owner[0] = i
+        j0 = 0
+        slack = [INFINITY] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = cost[i0 - 1]
+            u_i0 = u[i0]
+            delta = INFINITY
+            j1 = 0
+            for j in range(1, columns + 1):
+                if used[j]:
+                    continue
+                reduced = row[j - 1] - u_i0 - v[j]
+                if reduced < slack[j]:
+                    slack[j] = reduced
+                    way[j] = j0
+                if slack[j] < delta:
+                    delta = slack[j]
+                    j1 = j
+            if delta == INFINITY:
+                raise ValueError(f'Row {i - 1} has no finite column left')
+            for j in range(columns + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    slack[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    assignment = [0] * rows
+    for j in range(1, columns + 1):
+        if owner[j]:
+            assignment[owner[j] - 1] = j - 1
+    return assignment
+
+
+def match_optimal(edges):
+    """
+    Assign jobs to couriers minimizing total pickup distance
+
+    The candidate graph is split into connected components, which are
+    solved independently: in a city-wide batch most components are a
+    handful of jobs around one neighborhood, so the cubic solver only ever
+    sees small matrices. Within a component, pairs that are not candidates
+    cost more than any set of real pairs together, so the solver first
+    assigns as many jobs as possible and only then minimizes distance.
+
+    Args:
+        edges (dict): job_id -> list of (courier_id, km) candidates
+
+    Returns:
+        list: (job_id, courier_id, km) assignments, in job order
+    """
+    assignments = {}
+    for jobs, couriers in _components(edges):
+        transpose = len(jobs) > len(couriers)
+        column_index = {courier_id: j for j, courier_id in enumerate(couriers)}
+        forbidden = (max(km for job_id in jobs for _, km in edges[job_id]) + 1) * (len(jobs) + 1)
+        cost = []
+        for job_id in jobs:
+            row = [forbidden] * len(couriers)
+            for courier_id, km in edges[job_id]:
+                row[column_index[courier_id]] = km
+            cost.append(row)
+
+        if transpose:
+            columns = solve_assignment([list(column) for column in zip(*cost)])
+            pairs = [(columns[j], j) for j in range(len(couriers))]
+        else:
+            pairs = list(enumerate(solve_assignment(cost)))
+        for i, j in pairs:
+            if cost[i][j] < forbidden:
+                assignments[jobs[i]] = (jobs[i], couriers[j], cost[i][j])
+    return [assignments[job_id] for job_id in edges if job_id in assignments]
+
+
+def match_greedy(edges):
+    """
+    First-come baseline: each job in turn takes its closest free courier
+
+    Args:
+        edges (dict): job_id -> list of (courier_id, km) candidates, in arrival order
+
+    Returns:
+        list: (job_id, courier_id, km) assignments, in job order
+    """
+    taken = set()
+    assignments = []
+    for job_id, candidates in edges.items():
+        for courier_id, km in sorted(candidates, key=lambda edge: edge[1]):
+            if courier_id not in taken:
+                taken.add(courier_id)
+                assignments.append((job_id, courier_id, km))
+                break
+    return assignments
+
+
+def _components(edges):
+    """Connected components of the job-courier candidate graph as (jobs, couriers) lists"""
+    parent = {}
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for job_id, candidates in edges.items():
+        if not candidates:
+            continue
+        job = ('job', job_id)
+        parent.setdefault(job, job)
+        for courier_id, _ in candidates:
+            courier = ('courier', courier_id)
+            parent.setdefault(courier, courier)
+            root_job, root_courier = find(job), find(courier)
+            if root_job != root_courier:
+                parent[root_courier] = root_job
+
+    groups = {}
+    for node in parent:
+        kind, key = node
+        jobs, couriers = groups.setdefault(find(node), ([], []))
+        (jobs if kind == 'job' else couriers).append(key)
+    return list(groups.values())
@@ -0,0 +1,136 @@
+"""
+Dispatcher
+Runs dispatch windows from a background thread of each serving process
+"""
+import os
+import threading
+import time
+
+
+class Dispatcher:
+    """
+    Periodic dispatch windows
+
+    Shipments are not matched as they arrive: every DISPATCH_INTERVAL
+    seconds the waiting ones are matched together, which lets the solver
+    trade a few seconds of waiting for shorter pickups across the batch.
+    The thread starts with the first request a process serves, so CLI
+    commands and forked workers never inherit a running dispatcher. The
+    courier index is per process, so each process matches against the
+    couriers it has seen. Windows of one process run one at a time; across
+    processes, run_window writes under a PostgreSQL advisory lock and only
+    assigns shipments still unassigned to couriers still free, so two
+    processes never assign the same shipment or the same courier twice.
+
+    Config:
+        DISPATCH_INTERVAL: Seconds between windows (0 disables the thread)
+    """
+
+    def __init__(self, app=None):
+        self.interval = 5.0
+        self.runner = None
+        self._app = None
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        self._stop = threading.Event()
+        self._stats = {
+            'windows': 0, 'errors': 0, 'shipments': 0, 'assigned': 0, 'pickup_km': 0.0,
+            'matching_ms_total': 0.0, 'matching_ms_max': 0.0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, runner=None):
+        """
+        Configure the dispatcher from the application config
+
+        Args:
+            app: Flask application instance
+            runner (callable): Runs one window and returns (report, error);
+                runs inside an app context. Defaults to DispatchService.run_window.
+        """
+        self.stop()
+        self.interval = app.config.get('DISPATCH_INTERVAL', 5.0)
+        self.runner = runner
+        self._app = app
+        with self._lock:
+            self._stats = {key: 0 for key in self._stats}
+        app.before_request(self._ensure_thread)
+        app.extensions['dispatcher'] = self
+
+    def run_once(self):
+        """
+        Run one dispatch window now
+
+        Returns:
+            tuple: (report, error) from the runner
+        """
+        with self._run_lock:
+            with self._app.app_context():
+                report, error = self._get_runner()()
+        with self._lock:
+            if error:
+                self._stats['errors'] += 1
+            else:
+                self._stats['windows'] += 1
+                self._stats['shipments'] += report['shipments']
+                self._stats['assigned'] += report['assigned']
+                self._stats['pickup_km'] += report['pickup_km']
+                self._stats['matching_ms_total'] += report['matching_ms']
+                self._stats['matching_ms_max'] = max(self._stats['matching_ms_max'], report['matching_ms'])
+        return report, error
+
+    def stop(self):
+        """Stop the background thread"""
+        thread = self._thread
+        if thread is not None and self._thread_pid == os.getpid():
+            self._stop.set()
+            thread.join(timeout=max(self.interval, 1) * 2)
+        self._thread = None
+
+    def get_stats(self):
+        """
+        Get dispatch metrics
+
+        Returns:
+            dict: Window, shipment and assignment counters with average
+                pickup distance and matching time
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_pickup_km'] = stats['pickup_km'] / (stats['assigned'] or 1)
+        stats['avg_matching_ms'] = stats['matching_ms_total'] / (stats['windows'] or 1)
+        stats['interval'] = self.interval
+        return stats
+
+    def _get_runner(self):
+        if self.runner is None:
+            from app.services.dispatch_service import DispatchService
+            self.runner = DispatchService.run_window
+        return self.runner
+
+    def _ensure_thread(self):
+        if self.interval <= 0:
+            return
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='dispatcher', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        stop = self._stop
+        while not stop.wait(self.interval):
+            started = time.monotonic()
+            try:
+                self.run_once()
+            except Exception as e:
+                with self._lock:
+                    self._stats['errors'] += 1
+                self._app.logger.error(f'Dispatch window failed after {time.monotonic() - started:.1f}s: {str(e)}')
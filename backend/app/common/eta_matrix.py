@@ -0,0 +1,325 @@
+"""
+ETA matrix
+Travel times between geohash cells, cached per time-of-day bucket in front of the routing engine
+"""
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from app.common.cache import RecordCache
+from app.common.geo import decode, encode, haversine_km
+
+# Cell pair whose center does not snap to the road graph
+UNSNAPPED = object()
+
+
+class EtaMatrix:
+    """
+    Cell-to-cell travel time cache
+
+    Dispatch and pricing ask for travel times between the same
+    neighborhoods over and over. Points are reduced to their geohash cell
+    and departures to a time-of-day bucket, and the travel time between
+    cell centers is computed once per (origin cell, destination cell,
+    bucket) and kept in a RecordCache: an LRU bounded by
+    ETA_CACHE_MAX_ENTRIES in memory, or shared through Redis. Misses that
+    share a destination are computed together with one many-to-one routing
+    search. Unreachable pairs are cached too, but a cell center that does
+    not snap to the road graph says nothing about the points in the cell:
+    those pairs are routed from the actual points and not cached. Trips
+    within one cell are estimated from the straight-line distance and never
+    cached.
+
+    Keys start with the version of the road graph the times were computed
+    on, so a new graph never serves the old one's times, or 'line' for
+    straight-line estimates when routing is not configured. While the graph
+    is still loading, times are straight-line estimates and are not cached.
+
+    Entries are keyed by bucket so time-dependent speeds can be plugged into
+    the router without mixing rush hour with night traffic.
+
+    The cache can be warmed from recent orders once per process, on the
+    first request it serves (see EtaService.warm_up).
+
+    Config:
+        ETA_CACHE_BACKEND: 'memory', 'redis' or 'none' (see RecordCache)
+        ETA_CACHE_TTL: Seconds an entry stays valid
+        ETA_CACHE_MAX_ENTRIES: Cell pairs kept by the memory backend
+        ETA_CACHE_PRECISION: Geohash length of the cells (6 is about 1.2 x 0.6 km)
+        ETA_CACHE_BUCKET_MINUTES: Width of the time-of-day buckets
+        ETA_CACHE_TIMEZONE: Time zone the buckets follow
+        ETA_CACHE_WARMUP_ORDERS: Recent orders read when warming up (0 disables warm-up)
+    """
+
+    def __init__(self, app=None):
+        self.cache = RecordCache(config_prefix='ETA_CACHE')
+        self.router = None
+        self.warmer = None
+        self.precision = 6
+        self.bucket_minutes = 60
+        self.timezone = timezone.utc
+        self.warmup_orders = 0
+        self._app = None
+        self._warmed_pid = None
+        self._lock = threading.Lock()
+        self._stats = {'lookups': 0, 'computed': 0, 'unreachable': 0, 'unsnapped': 0, 'same_cell': 0,
+                       'uncached': 0, 'warmed': 0, 'compute_time_total': 0.0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, router=None, backend=None, warmer=None):
+        """
+        Configure the matrix from the application config
+
+        Args:
+            app: Flask application instance
+            router: Routing engine answering travel_times(to_lat, to_lon, origins),
+                snap(lat, lon), graph_version() and get_graph(); without a
+                configured one, times are straight-line estimates
+            backend: Cache backend overriding the configured one (e.g. a fake in tests)
+            warmer (callable): Warms the cache; runs once per process in an app
+                context. Defaults to EtaService.warm_up.
+        """
+        self.cache.init_app(app, backend)
+        self.router = router
+        self.warmer = warmer
+        self.precision = app.config.get('ETA_CACHE_PRECISION', 6)
+        self.bucket_minutes = app.config.get('ETA_CACHE_BUCKET_MINUTES', 60)
+        self.timezone = ZoneInfo(app.config.get('ETA_CACHE_TIMEZONE', 'UTC'))
+        self.warmup_orders = app.config.get('ETA_CACHE_WARMUP_ORDERS', 0)
+        self._app = app
+        self._warmed_pid = None
+        with self._lock:
+            self._stats = {key: 0 for key in self._stats}
+        app.before_request(self._ensure_warm)
+        app.extensions['eta_matrix'] = self
+
+    def bucket(self, departure=None):
+        """
+        Time-of-day bucket of a departure
+
+        Args:
+            departure (float): Unix timestamp (default now)
+
+        Returns:
+            int: Bucket index, 0 at local midnight
+        """
+        local = datetime.fromtimestamp(time.time() if departure is None else departure, self.timezone)
+        return (local.hour * 60 + local.minute) // self.bucket_minutes
+
+    def eta(self, from_lat, from_lon, to_lat, to_lon, departure=None):
+        """
+        Travel time between two points
+
+        Args:
+            from_lat (float): Origin latitude
+            from_lon (float): Origin longitude
+            to_lat (float): Destination latitude
+            to_lon (float): Destination longitude
+            departure (float): Unix timestamp of the departure (default now)
+
+        Returns:
+            float: Seconds, or None if unreachable
+        """
+        return self.travel_times(to_lat, to_lon, [(0, from_lat, from_lon)], departure).get(0)
+
+    def travel_times(self, to_lat, to_lon, origins, departure=None):
+        """
+        Travel times from many points to one (e.g. candidate couriers to a pickup)
+
+        Args:
+            to_lat (float): Destination latitude
+            to_lon (float): Destination longitude
+            origins (list): (key, lat, lon) tuples
+            departure (float): Unix timestamp of the departure (default now)
+
+        Returns:
+            dict: key -> seconds for the origins that can reach the destination
+        """
+        row = self.matrix([(lat, lon) for _, lat, lon in origins], [(to_lat, to_lon)], departure)
+        return {key: times[0] for (key, _, _), times in zip(origins, row) if times[0] is not None}
+
+    def matrix(self, origins, destinations, departure=None):
+        """
+        Travel times between every origin and every destination
+
+        Args:
+            origins (list): (lat, lon) tuples
+            destinations (list): (lat, lon) tuples
+            departure (float): Unix timestamp of the departure (default now)
+
+        Returns:
+            list: One row per origin of seconds per destination (None if unreachable)
+        """
+        bucket = self.bucket(departure)
+        origin_cells = [encode(lat, lon, self.precision) for lat, lon in origins]
+        destination_cells = [encode(lat, lon, self.precision) for lat, lon in destinations]
+        times, _ = self._cell_times(
+            {(o, d) for o in set(origin_cells) for d in set(destination_cells) if o != d}, bucket
+        )
+
+        rows = []
+        same_cell = 0
+        unsnapped = {}
+        for i, ((from_lat, from_lon), o) in enumerate(zip(origins, origin_cells)):
+            row = []
+            for j, ((to_lat, to_lon), d) in enumerate(zip(destinations, destination_cells)):
+                if o == d:
+                    same_cell += 1
+                    row.append(self._straight_line_seconds(from_lat, from_lon, to_lat, to_lon))
+                elif times[o, d] is UNSNAPPED:
+                    unsnapped.setdefault(j, []).append(((i, j), from_lat, from_lon))
+                    row.append(None)
+                else:
+                    row.append(times[o, d])
+            rows.append(row)
+
+        # Pairs whose cell centers miss the road graph are routed from the points themselves
+        for j, points in unsnapped.items():
+            for (i, _), seconds in self.router.travel_times(*destinations[j], points).items():
+                rows[i][j] = seconds
+        with self._lock:
+            self._stats['lookups'] += len(origins) * len(destinations)
+            self._stats['same_cell'] += same_cell
+            self._stats['unsnapped'] += sum(len(points) for points in unsnapped.values())
+        return rows
+
+    def warm_up(self, trips, max_pairs=2000):
+        """
+        Precompute the most frequent cell pairs of past trips
+
+        Waits for the road graph first, since times computed while it loads
+        are not cached.
+
+        Args:
+            trips (iterable): (from_lat, from_lon, to_lat, to_lon, departure) tuples;
+                departure is a Unix timestamp
+            max_pairs (int): Most frequent (origin cell, destination cell, bucket) keys to compute
+
+        Returns:
+            int: Cell pairs computed (pairs already cached are not counted)
+        """
+        if self.router is not None and self.router.is_configured():
+            self.router.get_graph()
+        frequency = Counter()
+        for from_lat, from_lon, to_lat, to_lon, departure in trips:
+            o, d = encode(from_lat, from_lon, self.precision), encode(to_lat, to_lon, self.precision)
+            if o != d:
+                frequency[o, d, self.bucket(departure)] += 1
+
+        by_bucket = {}
+        for (o, d, bucket), _ in frequency.most_common(max_pairs):
+            by_bucket.setdefault(bucket, set()).add((o, d))
+        computed = 0
+        for bucket, pairs in by_bucket.items():
+            computed += self._cell_times(pairs, bucket, warming=True)[1]
+        with self._lock:
+            self._stats['warmed'] += computed
+        return computed
+
+    def get_stats(self):
+        """
+        Get cache metrics
+
+        Returns:
+            dict: Cache hit, miss and eviction counters with the hit rate, and
+                routing computations behind the misses
+        """
+        stats = self.cache.get_stats()
+        with self._lock:
+            stats.update(self._stats)
+        looked_up = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / looked_up if looked_up else 0.0
+        stats['avg_compute_ms'] = stats['compute_time_total'] * 1000 / (stats['computed'] or 1)
+        stats['entries'] = len(self.cache.backend) if hasattr(self.cache.backend, '__len__') else None
+        return stats
+
+    def _cell_times(self, pairs, bucket, warming=False):
+        """
+        Seconds per (origin cell, destination cell) and the number computed, from the cache or per destination
+
+        Pairs whose cell centers do not snap to the road graph map to UNSNAPPED.
+        """
+        # Warm-up probes the backend directly so it does not count towards the hit rate
+        backend = self.cache.backend
+        if not warming:
+            get = self.cache.get
+        elif backend is not None:
+            get = backend.get
+        else:
+            def get(key):
+                return None
+        version = self._version()
+        times = {}
+        missing = {}
+        for o, d in pairs:
+            cached = get(f'{version}:{o}:{d}:{bucket}') if version is not None else None
+            if cached is not None:
+                times[o, d] = cached['seconds']
+            else:
+                missing.setdefault(d, []).append(o)
+
+        computed_count = 0
+        for d, cells in missing.items():
+            computed_count += len(cells)
+            started = time.perf_counter()
+            to_lat, to_lon = decode(d)[:2]
+            origins = [(o, *decode(o)[:2]) for o in cells]
+            routed = version not in (None, 'line')
+            if routed:
+                computed = self.router.travel_times(to_lat, to_lon, origins)
+            else:
+                computed = {key: self._straight_line_seconds(lat, lon, to_lat, to_lon) for key, lat, lon in origins}
+            destination_snaps = not routed or self.router.snap(to_lat, to_lon) is not None
+            unreachable = 0
+            for o, lat, lon in origins:
+                seconds = computed.get(o)
+                if seconds is None and not (destination_snaps and self.router.snap(lat, lon) is not None):
+                    times[o, d] = UNSNAPPED
+                    continue
+                times[o, d] = seconds
+                unreachable += seconds is None
+                if version is not None:
+                    self.cache.set(f'{version}:{o}:{d}:{bucket}', {'seconds': seconds})
+            with self._lock:
+                self._stats['computed'] += len(cells)
+                self._stats['compute_time_total'] += time.perf_counter() - started
+                self._stats['unreachable'] += unreachable
+                if version is None:
+                    self._stats['uncached'] += len(cells)
+        return times, computed_count
+
+    def _version(self):
+        """Cache namespace of times computed now: the graph version, 'line', or None while the graph loads"""
+        router = self.router
+        if router is None or not router.is_configured():
+            return 'line'
+        return router.graph_version()
+
+    def _straight_line_seconds(self, from_lat, from_lon, to_lat, to_lon):
+        speed_kmh = getattr(self.router, 'default_speed_kmh', 30)
+        return haversine_km(from_lat, from_lon, to_lat, to_lon) / speed_kmh * 3600
+
+    def _ensure_warm(self):
+        if self.warmup_orders <= 0 or self._warmed_pid == os.getpid():
+            return
+        with self._lock:
+            if self._warmed_pid == os.getpid():
+                return
+            self._warmed_pid = os.getpid()
+        threading.Thread(target=self._warm, name='eta-warmup', daemon=True).start()
+
+    def _warm(self):
+        started = time.monotonic()
+        try:
+            with self._app.app_context():
+                if self.warmer is None:
+                    from app.services.eta_service import EtaService
+                    self.warmer = EtaService.warm_up
+                computed = self.warmer()
+            self._app.logger.info(f'ETA cache warmed with {computed} cell pairs in {time.monotonic() - started:.1f}s')
+        except Exception as e:
+            self._app.logger.error(f'ETA cache warm-up failed: {str(e)}')
@@ -0,0 +1,251 @@
+"""
+Geospatial helpers
+Geohash encoding, cell arithmetic and great-circle distances
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+BASE32_INDEX = {char: index for index, char in enumerate(BASE32)}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two points
+
+    Args:
+        lat1 (float): Latitude of the first point in degrees
+        lon1 (float): Longitude of the first point in degrees
+        lat2 (float): Latitude of the second point in degrees
+        lon2 (float): Longitude of the second point in degrees
+
+    Returns:
+        float: Distance in kilometres
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(math.sqrt(a), 1.0))
+
+
+def haversine_to_km(h):
+    """
+    Convert the haversine term sin²(Δφ/2) + cos φ1 cos φ2 sin²(Δλ/2) to a distance
+
+    The term grows with distance, so callers ranking many points can compare
+    terms and convert only the winners.
+
+    Args:
+        h (float): Haversine term
+
+    Returns:
+        float: Distance in kilometres
+    """
+    return 2 * EARTH_RADIUS_KM * math.asin(min(math.sqrt(h), 1.0))
+
+
+def km_to_haversine(km):
+    """
+    Inverse of haversine_to_km
+
+    Args:
+        km (float): Distance in kilometres
+
+    Returns:
+        float: Haversine term
+    """
+    return math.sin(min(km / (2 * EARTH_RADIUS_KM), math.pi / 2)) ** 2
+
+
+def cell_bits(precision):
+    """
+    Number of latitude and longitude bits in a geohash of a given length
+
+    Args:
+        precision (int): Geohash length in characters
+
+    Returns:
+        tuple: (lat_bits, lon_bits)
+    """
+    bits = precision * 5
+    return bits // 2, bits - bits // 2
+
+
+def cell_size(precision):
+    """
+    Size of a geohash cell in degrees
+
+    Args:
+        precision (int): Geohash length in characters
+
+    Returns:
+        tuple: (lat_degrees, lon_degrees)
+    """
+    lat_bits, lon_bits = cell_bits(precision)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def cell_of(lat, lon, precision):
+    """
+    Grid coordinates of the geohash cell containing a point
+
+    Geohash cells form a regular grid; working with (row, column) integers
+    lets callers step to neighboring cells without string manipulation.
+
+    Args:
+        lat (float): Latitude in degrees
+        lon (float): Longitude in degrees
+        precision (int): Geohash length in characters
+
+    Returns:
+        tuple: (row, column) of the cell
+    """
+    lat_bits, lon_bits = cell_bits(precision)
+    rows, columns = 1 << lat_bits, 1 << lon_bits
+    row = min(int((lat + 90.0) / 180.0 * rows), rows - 1)
+    column = min(int((lon + 180.0) / 360.0 * columns), columns - 1)
+    return row, column
+
+
+def cell_hash(row, column, precision):
+    """
+    Geohash of a grid cell
+
+    Args:
+        row (int): Cell row (latitude index)
+        column (int): Cell column (longitude index)
+        precision (int): Geohash length in characters
+
+    Returns:
+        str: Geohash
+    """
+    lat_bits, lon_bits = cell_bits(precision)
+    # Interleave bits starting with longitude, most significant first
+    value = 0
+    for i in range(lon_bits + lat_bits):
+        if i % 2 == 0:
+            bit = (column >> (lon_bits - 1 - i // 2)) & 1
+        else:
+            bit = (row >> (lat_bits - 1 - i // 2)) & 1
+        value = (value << 1) | bit
+    chars = []
+    for _ in range(precision):
+        chars.append(BASE32[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def encode(lat, lon, precision=9):
+    """
+    Geohash of a point
+
+    Args:
+        lat (float): Latitude in degrees
+        lon (float): Longitude in degrees
+        precision (int): Geohash length in characters
+
+    Returns:
+        str: Geohash
+    """
+    return cell_hash(*cell_of(lat, lon, precision), precision)
+
+
+def decode_cell(geohash):
+    """
+    Grid coordinates of a geohash
+
+    Args:
+        geohash (str): Geohash
+
+    Returns:
+        tuple: (row, column, precision)
+
+    Raises:
+        ValueError: If the geohash has characters outside its alphabet
+    """
+    precision = len(geohash)
+    lat_bits, lon_bits = cell_bits(precision)
+    value = 0
+    for char in geohash.lower():
+        if char not in BASE32_INDEX:
+            raise ValueError(f"Invalid geohash character '{char}'")
+        value = (value << 5) | BASE32_INDEX[char]
+    row = column = 0
+    for i in range(lon_bits + lat_bits):
+        bit = (value >> (lon_bits + lat_bits - 1 - i)) & 1
+        if i % 2 == 0:
+            column = (column << 1) | bit
+        else:
+            row = (row << 1) | bit
+    return row, column, precision
+
+
+def decode(geohash):
+    """
+    Center point of a geohash cell
+
+    Args:
+        geohash (str): Geohash
+
+    Returns:
+        tuple: (lat, lon, lat_error, lon_error); the errors are half the cell size
+    """
+    row, column, precision = decode_cell(geohash)
+    lat_size, lon_size = cell_size(precision)
+    return (
+        -90.0 + (row + 0.5) * lat_size,
+        -180.0 + (column + 0.5) * lon_size,
+        lat_size / 2,
+        lon_size / 2
+    )
+
+
+def neighbors(geohash):
+    """
+    The eight geohashes surrounding a cell
+
+    Longitude wraps around the antimeridian; cells past a pole are omitted.
+
+    Args:
+        geohash (str): Geohash
+
+    Returns:
+        list: Neighboring geohashes
+    """
+    row, column, precision = decode_cell(geohash)
+    return [cell_hash(r, c, precision) for r, c in ring(row, column, 1, precision)]
+
+
+def ring(row, column, radius, precision):
+    """
+    Grid cells exactly radius steps away from a cell (a square ring)
+
+    Args:
+        row (int): Center cell row
+        column (int): Center cell column
+        radius (int): Ring radius in cells; 0 yields the center cell
+        precision (int): Geohash length in characters
+
+    Yields:
+        tuple: (row, column) of each cell on the ring
+    """
+    lat_bits, lon_bits = cell_bits(precision)
+    rows, columns = 1 << lat_bits, 1 << lon_bits
+    if radius == 0:
+        yield row, column
+        return
+    seen = set()
+    for d_row in range(-radius, radius + 1):
+        r = row + d_row
+        if r < 0 or r >= rows:
+            continue
+        step = 1 if abs(d_row) == radius else 2 * radius
+        for d_column in range(-radius, radius + 1, step):
+            cell = (r, (column + d_column) % columns)
+            # Narrow grids near the antimeridian can wrap onto the same cell
+            if cell not in seen:
+                seen.add(cell)
+                yield cell
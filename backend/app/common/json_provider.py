@@ -0,0 +1,86 @@
+"""
+JSON provider for Flask responses
+Uses orjson when it is installed and the standard library otherwise
+"""
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(obj):
+    """Serialize dates as ISO 8601 and defer everything else to Flask"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider with an orjson fast path
+
+    Datetimes are written as ISO 8601 strings by both code paths, so models can
+    hand datetime objects straight to the response instead of pre-formatting
+    them. orjson writes naive datetimes the same way datetime.isoformat() does.
+    Calls with keyword arguments orjson does not understand use the standard
+    library.
+    """
+
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        """
+        Serialize data as JSON to a string
+
+        Args:
+            obj: The data to serialize
+            **kwargs: Passed to json.dumps on the standard library path
+
+        Returns:
+            str: JSON document
+        """
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """
+        Deserialize data from a JSON string or bytes
+
+        Args:
+            s (str | bytes): JSON document
+            **kwargs: Passed to json.loads on the standard library path
+
+        Returns:
+            The deserialized data
+        """
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """
+        Serialize the given arguments as a JSON response
+
+        Returns:
+            Response: Flask response with the JSON body
+        """
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = self._orjson_dumps(obj, indent=indent) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def _orjson_dumps(self, obj, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
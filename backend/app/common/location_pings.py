@@ -0,0 +1,272 @@
+"""
+Location ping buffer
+Coalesces courier pings in memory and writes them in batches from a background thread
+"""
+import atexit
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+
+
+class PingBufferFull(Exception):
+    """Raised when the ping buffer is full and the batch should be retried later"""
+
+
+class LocationPingBuffer:
+    """
+    Bounded in-memory buffer between the ping endpoint and the ping table
+
+    Requests only append to a list; a background thread swaps the list out
+    every flush_interval seconds and hands it to the writer as one batch,
+    so a request never waits on the database. Per courier, a ping repeating
+    the latest kept timestamp is dropped and pings closer than min_interval
+    seconds to it are coalesced away; older repeats are left to the ping
+    table's primary key.
+
+    Memory is bounded by max_pending: a batch that does not fit raises
+    PingBufferFull, which the endpoint turns into a 503 with Retry-After.
+    A failed write puts its rows back in the buffer while there is room.
+    After flush_retries failed flushes in a row, the next batch is written
+    in halves, so rows that cannot be stored (a bad value, a failing
+    partition) are isolated, logged and dropped instead of blocking the
+    buffer. Lost connections are never blamed on rows: those batches are
+    kept until the database is back.
+
+    Config:
+        LOCATION_PING_FLUSH_INTERVAL: Seconds between background flushes (0 disables the thread)
+        LOCATION_PING_MAX_PENDING: Pings held in memory before new batches are refused
+        LOCATION_PING_MIN_INTERVAL: Seconds between stored pings of one courier
+        LOCATION_PING_FLUSH_RETRIES: Failed flushes in a row before failing rows are isolated and dropped
+    """
+
+    def __init__(self, app=None):
+        self.flush_interval = 1.0
+        self.max_pending = 100000
+        self.min_interval = 0
+        self.flush_retries = 3
+        self.writer = None
+        self._app = None
+        self._pending = []
+        self._last_kept = {}
+        self._failed_flushes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        self._stop = threading.Event()
+        self._atexit_registered = False
+        self._stats = {
+            'received': 0, 'accepted': 0, 'duplicates': 0, 'coalesced': 0, 'rejected_full': 0,
+            'flushes': 0, 'flushed': 0, 'flush_errors': 0, 'dropped': 0, 'failed_rows': 0, 'flush_time_total': 0.0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, writer=None):
+        """
+        Configure the buffer from the application config
+
+        Args:
+            app: Flask application instance
+            writer (callable): Stores a list of (courier_id, recorded_at, lat, lon)
+                tuples; runs inside an app context. Defaults to CourierService.store_pings.
+        """
+        self.stop()
+        self.flush_interval = app.config.get('LOCATION_PING_FLUSH_INTERVAL', 1.0)
+        self.max_pending = app.config.get('LOCATION_PING_MAX_PENDING', 100000)
+        self.min_interval = app.config.get('LOCATION_PING_MIN_INTERVAL', 0)
+        self.flush_retries = app.config.get('LOCATION_PING_FLUSH_RETRIES', 3)
+        self.writer = writer
+        self._app = app
+        self._failed_flushes = 0
+        with self._lock:
+            self._pending = []
+            self._last_kept = {}
+            self._stats = {key: 0 for key in self._stats}
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+        app.extensions['location_pings'] = self
+
+    def submit(self, pings):
+        """
+        Queue pings for storage
+
+        Args:
+            pings (list): (courier_id, recorded_at, lat, lon) tuples; recorded_at
+                is a Unix timestamp
+
+        Returns:
+            dict: Counts of accepted, duplicate and coalesced pings
+
+        Raises:
+            PingBufferFull: If the batch does not fit in the buffer
+        """
+        counts = {'accepted': 0, 'duplicates': 0, 'coalesced': 0}
+        min_interval = self.min_interval
+        with self._lock:
+            self._stats['received'] += len(pings)
+            if len(self._pending) + len(pings) > self.max_pending:
+                self._stats['rejected_full'] += len(pings)
+                raise PingBufferFull('Location ping buffer is full')
+
+            last_kept = self._last_kept
+            pending = self._pending
+            # Sorting per courier and time makes coalescing independent of arrival order
+            for ping in sorted(pings, key=lambda ping: (ping[0], ping[1])):
+                courier_id, recorded_at = ping[0], ping[1]
+                last = last_kept.get(courier_id)
+                if last is not None:
+                    if recorded_at == last:
+                        counts['duplicates'] += 1
+                        continue
+                    if abs(recorded_at - last) < min_interval:
+                        counts['coalesced'] += 1
+                        continue
+                if last is None or recorded_at > last:
+                    last_kept[courier_id] = recorded_at
+                pending.append(ping)
+                counts['accepted'] += 1
+
+            for key, value in counts.items():
+                self._stats[key] += value
+
+        self._ensure_flusher()
+        return counts
+
+    def flush(self):
+        """
+        Write everything buffered so far
+
+        Returns:
+            int: Number of pings written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            started = time.monotonic()
+            written, failed, retry = self._write(batch, isolate=self._failed_flushes >= self.flush_retries)
+
+            with self._lock:
+                if retry:
+                    # Keep what fits for the next flush; the rest is lost
+                    room = max(self.max_pending - len(self._pending), 0)
+                    self._pending[:0] = retry[:room]
+                    self._stats['flush_errors'] += 1
+                    self._stats['dropped'] += len(retry) - min(room, len(retry))
+                    self._failed_flushes += 1
+                else:
+                    self._failed_flushes = 0
+                self._stats['failed_rows'] += len(failed)
+                if written:
+                    self._stats['flushes'] += 1
+                    self._stats['flushed'] += written
+                    self._stats['flush_time_total'] += time.monotonic() - started
+                    self._prune_last_kept()
+            return written
+
+    def pending(self):
+        """
+        Number of pings waiting to be written
+
+        Returns:
+            int: Buffered ping count
+        """
+        return len(self._pending)
+
+    def stop(self):
+        """Stop the background flusher and write what is left"""
+        thread = self._thread
+        if thread is not None and self._thread_pid == os.getpid():
+            self._stop.set()
+            thread.join(timeout=max(self.flush_interval, 1) * 5)
+        self._thread = None
+        if self._app is not None and self._pending:
+            self.flush()
+
+    def get_stats(self):
+        """
+        Get ingestion metrics
+
+        Returns:
+            dict: Ping counters, buffer depth and average flush time in seconds
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+        stats['max_pending'] = self.max_pending
+        stats['avg_flush_time'] = stats['flush_time_total'] / (stats['flushes'] or 1)
+        return stats
+
+    def _write(self, batch, isolate):
+        """
+        Hand a batch to the writer, splitting it to isolate failing rows when asked
+
+        Returns:
+            tuple: (rows written, rows dropped as unwritable, rows to retry later)
+        """
+        try:
+            with self._app.app_context():
+                self._get_writer()(batch)
+            return len(batch), [], []
+        except Exception as e:
+            if not isolate or _is_connection_error(e):
+                self._app.logger.error(f'Error writing {len(batch)} location pings: {str(e)}')
+                return 0, [], batch
+            if len(batch) == 1:
+                self._app.logger.error(f'Dropping location ping {batch[0]} that cannot be written: {str(e)}')
+                return 0, batch, []
+
+        middle = len(batch) // 2
+        written, failed, retry = self._write(batch[:middle], isolate)
+        if retry:
+            return written, failed, retry + batch[middle:]
+        more_written, more_failed, retry = self._write(batch[middle:], isolate)
+        return written + more_written, failed + more_failed, retry
+
+    def _get_writer(self):
+        if self.writer is None:
+            from app.services.courier_service import CourierService
+            self.writer = CourierService.store_pings
+        return self.writer
+
+    def _ensure_flusher(self):
+        if self.flush_interval <= 0:
+            return
+        # A forked worker inherits the thread object but not the thread
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='location-ping-flusher', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        stop = self._stop
+        while not stop.wait(self.flush_interval):
+            self.flush()
+
+    def _prune_last_kept(self):
+        # Forget couriers that have been quiet for a while so the map stays bounded
+        if len(self._last_kept) <= self.max_pending:
+            return
+        horizon = time.time() - max(self.min_interval, 3600)
+        self._last_kept = {
+            courier_id: recorded_at for courier_id, recorded_at in self._last_kept.items()
+            if recorded_at >= horizon
+        }
+
+
+def _is_connection_error(error):
+    """Whether a write failed because the database could not be reached, not because of its rows"""
+    return isinstance(error, exc.DBAPIError) and (
+        error.connection_invalidated or isinstance(error, exc.OperationalError)
+    )
@@ -0,0 +1,228 @@
+"""
+Request metrics
+Per-endpoint latency histograms, per-request phase timings and a Prometheus endpoint
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds in seconds for the request latency histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in a block to the current request's phase timings
+
+    Does nothing outside a request, so it is safe in code shared with scripts.
+
+    Args:
+        phase (str): Phase name, e.g. 'bcrypt' or 'serialize'
+    """
+    if not has_request_context():
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add_timing(phase, time.perf_counter() - started)
+
+
+def _add_timing(phase, seconds):
+    timings = g.setdefault('metrics_timings', {})
+    timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_query_started')
+    if started and has_request_context():
+        _add_timing('db', time.perf_counter() - started.pop())
+        g.metrics_db_queries = g.get('metrics_db_queries', 0) + 1
+
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute; drop their start time
+    connection = exception_context.connection
+    started = connection.info.get('metrics_query_started') if connection is not None else None
+    if started:
+        started.pop()
+
+
+class Metrics:
+    """
+    Request instrumentation exported in Prometheus text format
+
+    Records, per endpoint: a latency histogram, the number of database queries
+    and the time spent in each phase (db, bcrypt, serialize, ...). Each response
+    also carries a Server-Timing header with the request's own phases.
+
+    Gauges registered with add_collector (cache, hasher and log queue stats)
+    are appended to the /metrics output.
+
+    Config:
+        METRICS_ENABLED: Record metrics and expose /metrics
+        METRICS_SERVER_TIMING: Add Server-Timing headers to responses
+    """
+
+    _engine_events_registered = False
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._collectors = {}
+        self.reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Register request hooks and the /metrics endpoint
+
+        Args:
+            app: Flask application instance
+        """
+        app.extensions['metrics'] = self
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+
+        self._register_engine_events()
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view, methods=['GET'])
+
+    def add_collector(self, name, collector):
+        """
+        Export a stats dict as gauges
+
+        Args:
+            name (str): Metric name prefix, e.g. 'password_hasher'
+            collector (callable): Returns a dict of numeric stats
+        """
+        self._collectors[name] = collector
+
+    def reset(self):
+        """Drop all recorded request metrics"""
+        with self._lock:
+            self._latency = {}
+            self._db_queries = {}
+            self._phase_seconds = {}
+
+    def render(self):
+        """
+        Render all metrics in Prometheus text exposition format
+
+        Returns:
+            str: Metrics document
+        """
+        with self._lock:
+            latency = {key: (list(buckets), total, count) for key, (buckets, total, count) in self._latency.items()}
+            db_queries = dict(self._db_queries)
+            phase_seconds = dict(self._phase_seconds)
+
+        lines = [
+            '# HELP quickdrop_request_duration_seconds Request latency by endpoint',
+            '# TYPE quickdrop_request_duration_seconds histogram'
+        ]
+        for (endpoint, method), (buckets, total, count) in sorted(latency.items()):
+            labels = f'endpoint="{endpoint}",method="{method}"'
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket_count
+                lines.append(f'quickdrop_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'quickdrop_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'quickdrop_request_duration_seconds_sum{{{labels}}} {total}')
+            lines.append(f'quickdrop_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines.append('# HELP quickdrop_db_queries_total Database queries by endpoint')
+        lines.append('# TYPE quickdrop_db_queries_total counter')
+        for endpoint, count in sorted(db_queries.items()):
+            lines.append(f'quickdrop_db_queries_total{{endpoint="{endpoint}"}} {count}')
+
+        lines.append('# HELP quickdrop_phase_seconds_total Time spent per request phase by endpoint')
+        lines.append('# TYPE quickdrop_phase_seconds_total counter')
+        for (endpoint, phase), seconds in sorted(phase_seconds.items()):
+            lines.append(f'quickdrop_phase_seconds_total{{endpoint="{endpoint}",phase="{phase}"}} {seconds}')
+
+        for name, collector in sorted(self._collectors.items()):
+            for key, value in sorted(collector().items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = f'quickdrop_{name}_{key}'
+                lines.append(f'# TYPE {metric} gauge')
+                lines.append(f'{metric} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+
+        duration = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        timings = g.get('metrics_timings', {})
+        queries = g.get('metrics_db_queries', 0)
+        self._record(endpoint, request.method, duration, queries, timings)
+
+        if request.endpoint != 'metrics' and current_app.config.get('METRICS_SERVER_TIMING', True):
+            response.headers['Server-Timing'] = self._server_timing(duration, queries, timings)
+        return response
+
+    def _record(self, endpoint, method, duration, queries, timings):
+        with self._lock:
+            buckets, total, count = self._latency.get((endpoint, method)) or ([0] * len(LATENCY_BUCKETS), 0.0, 0)
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    buckets[index] += 1
+                    break
+            self._latency[(endpoint, method)] = (buckets, total + duration, count + 1)
+            self._db_queries[endpoint] = self._db_queries.get(endpoint, 0) + queries
+            for phase, seconds in timings.items():
+                key = (endpoint, phase)
+                self._phase_seconds[key] = self._phase_seconds.get(key, 0.0) + seconds
+
+    @staticmethod
+    def _server_timing(duration, queries, timings):
+        entries = []
+        for phase, seconds in timings.items():
+            entry = f'{phase};dur={seconds * 1000:.2f}'
+            if phase == 'db':
+                entry += f';desc="{queries} queries"'
+            entries.append(entry)
+        entries.append(f'total;dur={duration * 1000:.2f}')
+        return ', '.join(entries)
+
+    def _metrics_view(self):
+        """
+        Prometheus metrics
+        ---
+        tags:
+          - Health
+        responses:
+          200:
+            description: Metrics in Prometheus text format
+        """
+        return current_app.response_class(self.render(), mimetype='text/plain; version=0.0.4')
+
+    @classmethod
+    def _register_engine_events(cls):
+        # Listen on the Engine class so every engine, including ones created later, is covered
+        if cls._engine_events_registered:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        cls._engine_events_registered = True
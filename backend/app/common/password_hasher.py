@@ -0,0 +1,386 @@
+"""
+Password hashing executor
+Runs bcrypt hashing and verification on a bounded worker pool
+"""
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full and the request should be retried later"""
+
+
+# bcrypt's default cost and the range it accepts
+DEFAULT_ROUNDS = 12
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+
+def _hash_in_worker(password_bytes, rounds=DEFAULT_ROUNDS):
+    """Hash a password inside a worker and report when the work started and ended"""
+    started = time.monotonic()
+    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds))
+    return hashed, started, time.monotonic()
+
+
+def _check_in_worker(password_bytes, password_hash_bytes):
+    """Verify a password inside a worker and report when the work started and ended"""
+    started = time.monotonic()
+    matches = bcrypt.checkpw(password_bytes, password_hash_bytes)
+    return matches, started, time.monotonic()
+
+
+def get_rounds(password_hash):
+    """
+    Read the cost factor from a bcrypt hash ($2b$<rounds>$...)
+
+    Args:
+        password_hash (str): bcrypt hash
+
+    Returns:
+        int: Cost factor, or None if the hash is not in bcrypt format
+    """
+    parts = password_hash.split('$') if password_hash else []
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate(target_seconds, samples=3, min_rounds=10, max_rounds=16):
+    """
+    Time bcrypt on this host and pick the highest cost within a latency budget
+
+    Each extra round doubles the work, so timing stops at the first cost
+    that is already over twice the target.
+
+    Args:
+        target_seconds (float): Acceptable time for one hash
+        samples (int): Hashes timed per cost; the median is used
+        min_rounds (int): Lowest cost to try
+        max_rounds (int): Highest cost to try
+
+    Returns:
+        tuple: (timings, recommended) where timings maps cost to median
+            seconds and recommended is a cost, or min_rounds if even that
+            is over the target
+    """
+    password = b'calibration-password'
+    timings = {}
+    recommended = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        durations = []
+        for _ in range(samples):
+            _, started, finished = _hash_in_worker(password, rounds)
+            durations.append(finished - started)
+        timings[rounds] = sorted(durations)[len(durations) // 2]
+        if timings[rounds] <= target_seconds:
+            recommended = rounds
+        if timings[rounds] > target_seconds * 2:
+            break
+    return timings, recommended
+
+
+class PasswordHasher:
+    """
+    Bounded executor for bcrypt work
+
+    bcrypt is deliberately slow, so running it on the request thread lets a burst
+    of logins starve cheap endpoints. The hasher hands the work to a process pool
+    and caps the number of jobs in flight; once the cap is reached new jobs are
+    rejected with PasswordHasherBusy instead of queueing without limit. A pool
+    left broken by a dead worker (OOM kill, crash) is replaced and the job
+    retried once.
+
+    Config:
+        BCRYPT_ROUNDS: bcrypt cost factor for new hashes
+        PASSWORD_HASH_WORKERS: Number of worker processes (0 hashes inline)
+        PASSWORD_HASH_QUEUE_DEPTH: Jobs allowed to wait for a free worker
+        PASSWORD_HASH_TIMEOUT: Seconds to wait for a job before giving up
+        BULK_IMPORT_HASH_WORKERS: Worker processes of the separate bulk import pool
+    """
+
+    def __init__(self, app=None):
+        self.rounds = DEFAULT_ROUNDS
+        self.workers = 0
+        self.queue_depth = 0
+        self.timeout = None
+        self.bulk_workers = 0
+        self._executor = None
+        self._bulk_executor = None
+        self._bulk_import = threading.Lock()
+        self._slots = None
+        self._dummy_hash = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+        atexit.register(self.shutdown, wait=False)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configure the hasher from the application config
+
+        Args:
+            app: Flask application instance
+        """
+        self.shutdown()
+        self.rounds = app.config.get('BCRYPT_ROUNDS', DEFAULT_ROUNDS)
+        if not MIN_ROUNDS <= self.rounds <= MAX_ROUNDS:
+            raise ValueError(f'BCRYPT_ROUNDS must be between {MIN_ROUNDS} and {MAX_ROUNDS}')
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        self.queue_depth = app.config.get('PASSWORD_HASH_QUEUE_DEPTH', 16)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 5.0)
+        self.bulk_workers = app.config.get('BULK_IMPORT_HASH_WORKERS', 1)
+        self._slots = threading.BoundedSemaphore(max(self.workers, 1) + self.queue_depth)
+        self._dummy_hash = None
+        self._reset_stats()
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        """
+        Hash a password with bcrypt
+
+        Args:
+            password (str): Plain text password
+
+        Returns:
+            str: bcrypt hash
+
+        Raises:
+            PasswordHasherBusy: If the hashing queue is full
+        """
+        hashed = self._run(_hash_in_worker, password.encode('utf-8'), self.rounds)
+        return hashed.decode('utf-8')
+
+    def verify(self, password, password_hash):
+        """
+        Verify a password against a bcrypt hash
+
+        Args:
+            password (str): Plain text password
+            password_hash (str): Stored bcrypt hash
+
+        Returns:
+            bool: True if password matches, False otherwise
+
+        Raises:
+            PasswordHasherBusy: If the hashing queue is full
+        """
+        return self._run(_check_in_worker, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def verify_dummy(self, password):
+        """
+        Do the work of verify() for a login whose email matches no user
+
+        Answering unknown emails without hashing would let response times
+        reveal which emails are registered.
+
+        Args:
+            password (str): Plain text password from the request
+
+        Returns:
+            bool: Always False
+
+        Raises:
+            PasswordHasherBusy: If the hashing queue is full
+        """
+        dummy_hash = self._dummy_hash
+        if dummy_hash is None:
+            dummy_hash = self._dummy_hash = bcrypt.hashpw(b'not-a-password', bcrypt.gensalt(self.rounds)).decode('utf-8')
+        self.verify(password, dummy_hash)
+        return False
+
+    def needs_rehash(self, password_hash):
+        """
+        Check whether a stored hash was made with a different cost than BCRYPT_ROUNDS
+
+        Args:
+            password_hash (str): Stored bcrypt hash
+
+        Returns:
+            bool: True if the password should be hashed again
+        """
+        return get_rounds(password_hash) != self.rounds
+
+    @contextmanager
+    def bulk_import(self):
+        """
+        Reserve the bulk hashing pool for one import
+
+        Imports take turns rather than sharing the pool, so their bcrypt
+        work stays within BULK_IMPORT_HASH_WORKERS processes; a second
+        import is turned away instead of waiting for the first.
+
+        Raises:
+            PasswordHasherBusy: If another import of this process is running
+        """
+        if not self._bulk_import.acquire(blocking=False):
+            self._record('bulk_rejected')
+            raise PasswordHasherBusy('Another bulk import is running')
+        try:
+            yield
+        finally:
+            self._bulk_import.release()
+
+    def hash_many(self, passwords):
+        """
+        Hash a batch of passwords in parallel for bulk imports
+
+        The batch runs on a long-lived pool of BULK_IMPORT_HASH_WORKERS
+        processes, separate from the login pool, so an import neither trips
+        the queue limit nor makes logins wait behind it. Keep it to a small
+        share of the cores so logins still get CPU; run imports inside
+        bulk_import().
+
+        Args:
+            passwords (list): Plain text passwords
+
+        Returns:
+            list: bcrypt hashes in input order
+        """
+        encoded = [password.encode('utf-8') for password in passwords]
+        workers = min(self.bulk_workers, len(encoded))
+
+        started = time.monotonic()
+        if workers <= 1:
+            results = [_hash_in_worker(password, self.rounds) for password in encoded]
+        else:
+            chunksize = max(len(encoded) // (workers * 4), 1)
+            rounds = [self.rounds] * len(encoded)
+            results = list(self._get_bulk_executor().map(_hash_in_worker, encoded, rounds, chunksize=chunksize))
+
+        with self._stats_lock:
+            self._stats['bulk_hashed'] += len(results)
+            self._stats['bulk_hash_time_total'] += time.monotonic() - started
+        return [hashed.decode('utf-8') for hashed, _, _ in results]
+
+    def get_stats(self):
+        """
+        Get hashing metrics
+
+        Returns:
+            dict: Job counters and queue wait vs. hash time in seconds
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        completed = stats['completed'] or 1
+        stats['avg_queue_wait'] = stats['queue_wait_total'] / completed
+        stats['avg_hash_time'] = stats['hash_time_total'] / completed
+        stats['rounds'] = self.rounds
+        stats['workers'] = self.workers
+        stats['queue_depth'] = self.queue_depth
+        stats['bulk_workers'] = self.bulk_workers
+        return stats
+
+    def shutdown(self, wait=True):
+        """Stop the worker pools if they were started"""
+        with self._lock:
+            executors = (self._executor, self._bulk_executor)
+            self._executor = self._bulk_executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=wait)
+
+    def _run(self, func, *args, retry=True):
+        slots = self._slots
+        if slots is None:
+            # Not bound to an app yet: behave like plain bcrypt
+            result, _, _ = func(*args)
+            return result
+
+        if not slots.acquire(blocking=False):
+            self._record('rejected')
+            raise PasswordHasherBusy('Password hashing queue is full')
+
+        submitted = time.monotonic()
+        if self.workers <= 0:
+            try:
+                result, started, finished = func(*args)
+            finally:
+                slots.release()
+            self._record_timing(submitted, started, finished)
+            return result
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            slots.release()
+            return self._retry_on_new_executor(executor, func, args, retry)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+
+        try:
+            result, started, finished = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._record('timed_out')
+            raise PasswordHasherBusy('Password hashing timed out')
+        except BrokenProcessPool:
+            return self._retry_on_new_executor(executor, func, args, retry)
+        self._record_timing(submitted, started, finished)
+        return result
+
+    def _retry_on_new_executor(self, broken, func, args, retry):
+        """Replace a pool whose worker died, then run the job once more"""
+        with self._lock:
+            replaced = self._executor is broken
+            if replaced:
+                self._executor = None
+        if replaced:
+            broken.shutdown(wait=False)
+            self._record('pool_restarts')
+        if not retry:
+            raise BrokenProcessPool('Password hashing pool failed twice')
+        return self._run(func, *args, retry=False)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _get_bulk_executor(self):
+        with self._lock:
+            if self._bulk_executor is None:
+                self._bulk_executor = ProcessPoolExecutor(max_workers=self.bulk_workers)
+            return self._bulk_executor
+
+    def _reset_stats(self):
+        with self._stats_lock:
+            self._stats = {
+                'completed': 0,
+                'rejected': 0,
+                'timed_out': 0,
+                'pool_restarts': 0,
+                'queue_wait_total': 0.0,
+                'queue_wait_max': 0.0,
+                'hash_time_total': 0.0,
+                'hash_time_max': 0.0,
+                'bulk_hashed': 0,
+                'bulk_rejected': 0,
+                'bulk_hash_time_total': 0.0,
+            }
+
+    def _record(self, counter):
+        with self._stats_lock:
+            self._stats[counter] += 1
+
+    def _record_timing(self, submitted, started, finished):
+        queue_wait = max(started - submitted, 0.0)
+        hash_time = finished - started
+        with self._stats_lock:
+            self._stats['completed'] += 1
+            self._stats['queue_wait_total'] += queue_wait
+            self._stats['queue_wait_max'] = max(self._stats['queue_wait_max'], queue_wait)
+            self._stats['hash_time_total'] += hash_time
+            self._stats['hash_time_max'] = max(self._stats['hash_time_max'], hash_time)
+
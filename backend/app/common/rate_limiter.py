@@ -0,0 +1,242 @@
+"""
+Rate limiting
+Sliding-window counters for throttling login attempts, in memory or in Redis
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+def _sliding_count(now, window, index, current, previous):
+    """Estimate hits in the last window from the current and previous fixed windows"""
+    if index != int(now // window):
+        # The stored windows are stale: current became previous, or both expired
+        previous = current if index == int(now // window) - 1 else 0
+        current = 0
+    elapsed = (now % window) / window
+    return previous * (1 - elapsed) + current
+
+
+class MemoryRateLimitStore:
+    """
+    Per-process sliding-window counters bounded by key count
+
+    Each key keeps the counts of the current and previous fixed windows; the
+    previous count is weighted by how much of it still overlaps the sliding
+    window. That approximates a sliding log in constant memory per key.
+
+    Args:
+        max_entries (int): Keys kept before the least recently used is dropped
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, window, amount=1):
+        now = time.time()
+        index = int(now // window)
+        with self._lock:
+            stored_index, current, previous = self._windows.get(key, (index, 0, 0))
+            if stored_index != index:
+                previous = current if stored_index == index - 1 else 0
+                current = 0
+            current += amount
+            self._windows[key] = (index, current, previous)
+            self._windows.move_to_end(key)
+            while len(self._windows) > self.max_entries:
+                self._windows.popitem(last=False)
+        return _sliding_count(now, window, index, current, previous)
+
+    def peek(self, key, window):
+        now = time.time()
+        with self._lock:
+            entry = self._windows.get(key)
+        if entry is None:
+            return 0
+        return _sliding_count(now, window, *entry)
+
+    def reset(self, key, window):
+        with self._lock:
+            self._windows.pop(key, None)
+
+
+class RedisRateLimitStore:
+    """
+    Sliding-window counters shared by all processes through Redis
+
+    Any client exposing incr/expire/get/delete works, so tests can pass an
+    in-memory fake. Fixed-window counters expire after two windows.
+
+    Args:
+        client: Redis-compatible client
+        prefix (str): Namespace prepended to every key
+    """
+
+    def __init__(self, client, prefix='quickdrop:rate:'):
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key, window, amount=1):
+        now = time.time()
+        index = int(now // window)
+        current_key = f'{self.prefix}{key}:{index}'
+        current = self.client.incr(current_key, amount)
+        if current == amount:
+            self.client.expire(current_key, window * 2)
+        previous = int(self.client.get(f'{self.prefix}{key}:{index - 1}') or 0)
+        return _sliding_count(now, window, index, current, previous)
+
+    def peek(self, key, window):
+        now = time.time()
+        index = int(now // window)
+        current = int(self.client.get(f'{self.prefix}{key}:{index}') or 0)
+        previous = int(self.client.get(f'{self.prefix}{key}:{index - 1}') or 0)
+        return _sliding_count(now, window, index, current, previous)
+
+    def reset(self, key, window):
+        index = int(time.time() // window)
+        self.client.delete(f'{self.prefix}{key}:{index}', f'{self.prefix}{key}:{index - 1}')
+
+
+class LoginRateLimiter:
+    """
+    Throttles login attempts before any password hashing is done
+
+    Two sliding windows are checked per attempt:
+        - every attempt from a client IP, which bounds the bcrypt work one
+          client can cause
+        - failed attempts against an email from that IP, which stops
+          password guessing without letting other clients lock the
+          account's owner out by failing on purpose
+
+    A rejected attempt costs one counter update and no database or bcrypt
+    work. A successful login clears the failures of that IP and email.
+    Behind a reverse proxy, set TRUSTED_PROXIES so the client IP is not
+    the proxy's.
+
+    Config:
+        LOGIN_RATE_LIMIT_ENABLED: Turn throttling on or off
+        LOGIN_RATE_LIMIT_WINDOW: Sliding window length in seconds
+        LOGIN_RATE_LIMIT_PER_IP: Attempts allowed per client IP per window
+        LOGIN_RATE_LIMIT_PER_EMAIL: Failed attempts allowed per email from one IP per window
+        LOGIN_RATE_LIMIT_BACKEND: 'memory' (per process) or 'redis' (shared)
+        LOGIN_RATE_LIMIT_MAX_ENTRIES: Keys kept by the memory backend
+        LOGIN_RATE_LIMIT_REDIS_URL: Redis URL for the redis backend
+    """
+
+    BACKENDS = ('memory', 'redis')
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.window = 300
+        self.per_ip = 20
+        self.per_email = 5
+        self.store = None
+        self._lock = threading.Lock()
+        self._stats = {'allowed': 0, 'rejected_ip': 0, 'rejected_ip_email': 0, 'failures': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, store=None):
+        """
+        Configure the limiter from the application config
+
+        Args:
+            app: Flask application instance
+            store: Counter store overriding the configured one (e.g. a fake in tests)
+        """
+        config = app.config
+        self.enabled = config.get('LOGIN_RATE_LIMIT_ENABLED', True)
+        self.window = config.get('LOGIN_RATE_LIMIT_WINDOW', 300)
+        self.per_ip = config.get('LOGIN_RATE_LIMIT_PER_IP', 20)
+        self.per_email = config.get('LOGIN_RATE_LIMIT_PER_EMAIL', 5)
+        self.store = store if store is not None else self._store_from_config(config)
+        with self._lock:
+            self._stats = {key: 0 for key in self._stats}
+        app.extensions['login_rate_limiter'] = self
+
+    def check(self, ip, email):
+        """
+        Count a login attempt and decide whether it may proceed
+
+        Args:
+            ip (str): Client address
+            email (str): Email the client is logging in as
+
+        Returns:
+            int: Seconds to wait before retrying, or None if the attempt is allowed
+        """
+        if not self.enabled or self.store is None:
+            return None
+
+        if self.store.peek(self._failure_key(ip, email), self.window) >= self.per_email:
+            self._count('rejected_ip_email')
+            return self._retry_after()
+        if self.store.hit(f'ip:{ip}', self.window) > self.per_ip:
+            self._count('rejected_ip')
+            return self._retry_after()
+
+        self._count('allowed')
+        return None
+
+    def record_failure(self, ip, email):
+        """
+        Count a failed login against an email from a client IP
+
+        Args:
+            ip (str): Client address
+            email (str): Email that failed to authenticate
+        """
+        if not self.enabled or self.store is None:
+            return
+        self.store.hit(self._failure_key(ip, email), self.window)
+        self._count('failures')
+
+    def reset(self, ip, email):
+        """
+        Clear the failures of an email from a client IP after a successful login
+
+        Args:
+            ip (str): Client address
+            email (str): Email that authenticated
+        """
+        if not self.enabled or self.store is None:
+            return
+        self.store.reset(self._failure_key(ip, email), self.window)
+
+    def get_stats(self):
+        """
+        Get throttling metrics
+
+        Returns:
+            dict: Allowed, rejected and failed attempt counters
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _retry_after(self):
+        return max(math.ceil(self.window - time.time() % self.window), 1)
+
+    @staticmethod
+    def _failure_key(ip, email):
+        return f'failures:{ip}:{email.strip().lower()}'
+
+    def _count(self, counter):
+        with self._lock:
+            self._stats[counter] += 1
+
+    def _store_from_config(self, config):
+        name = config.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+        if name not in self.BACKENDS:
+            raise ValueError(f"Invalid LOGIN_RATE_LIMIT_BACKEND '{name}'. Must be one of: {', '.join(self.BACKENDS)}")
+        if name == 'redis':
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError('LOGIN_RATE_LIMIT_BACKEND=redis requires the redis package') from e
+            client = redis.Redis.from_url(config['LOGIN_RATE_LIMIT_REDIS_URL'])
+            return RedisRateLimitStore(client, prefix='quickdrop:login_rate_limit:')
+        return MemoryRateLimitStore(max_entries=config.get('LOGIN_RATE_LIMIT_MAX_ENTRIES', 100000))
@@ -0,0 +1,240 @@
+"""
+Read replica routing
+Sends read-only queries to replica engines with health checks and read-your-writes pinning
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc, text
+from sqlalchemy.sql import Select
+
+from app.common.cache import RecordCache
+
+logger = logging.getLogger(__name__)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends SELECTs to the replica chosen by ReplicaRouter.reading()
+
+    Flushes, writes and explicit binds always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica_engine')
+        if (
+            replica is not None
+            and bind is None
+            and not self._flushing
+            and (clause is None or isinstance(clause, Select))
+        ):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Routes read-only service calls to replica databases
+
+    Replicas are registered as Flask-SQLAlchemy binds named replica_0,
+    replica_1, ... and picked round-robin. A replica that fails a query or a
+    periodic SELECT 1 is skipped for REPLICA_RETRY_AFTER seconds; with no
+    healthy replica, reads stay on the primary. The SELECT 1 checks run in a
+    background thread per process, so requests never wait on them. After a
+    write, reads keyed on the written user, or made by the user who wrote,
+    stay on the primary for REPLICA_READ_YOUR_WRITES_SECONDS so replication
+    lag is not visible to them. Recent writes are kept in a RecordCache: the
+    memory backend only pins reads served by the worker that wrote, so
+    deployments with several workers should use the redis backend.
+
+    init_app must run before db.init_app so the replica binds exist when the
+    engines are created.
+
+    Config:
+        SQLALCHEMY_REPLICA_URIS: Replica database URIs
+        REPLICA_READ_YOUR_WRITES_SECONDS: Primary pinning window after a write
+        REPLICA_HEALTH_CHECK_INTERVAL: Seconds between SELECT 1 checks per replica
+        REPLICA_RETRY_AFTER: Seconds a failed replica is skipped
+        REPLICA_RECENT_WRITES_BACKEND: 'memory' or 'redis' (see RecordCache)
+        REPLICA_RECENT_WRITES_REDIS_URL: Redis URL for the redis backend
+    """
+
+    def __init__(self, app=None):
+        self.bind_keys = []
+        self.health_check_interval = 10
+        self.retry_after = 30
+        self._recent_writes = RecordCache(config_prefix='REPLICA_RECENT_WRITES')
+        self._state = {}
+        self._next = 0
+        # Health checks belong to one app and one process; init_app or a fork starts new ones
+        self._generation = 0
+        self._checker = None
+        self._lock = threading.Lock()
+        self._stats = {'replica_reads': 0, 'fallback_reads': 0, 'pinned_reads': 0, 'replica_failures': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, recent_writes_backend=None):
+        """
+        Register replica binds from the application config
+
+        Args:
+            app: Flask application instance
+            recent_writes_backend: Cache backend overriding the configured one (e.g. a fake in tests)
+        """
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        self.bind_keys = []
+        for index, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or []):
+            key = f'replica_{index}'
+            binds[key] = uri
+            self.bind_keys.append(key)
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+        self.health_check_interval = app.config.get('REPLICA_HEALTH_CHECK_INTERVAL', 10)
+        self.retry_after = app.config.get('REPLICA_RETRY_AFTER', 30)
+        self._recent_writes.init_app(app, backend=recent_writes_backend)
+        with self._lock:
+            self._state = {key: {'down_until': 0.0, 'listening': False} for key in self.bind_keys}
+            self._generation += 1
+            self._checker = None
+        app.extensions['replica_router'] = self
+
+    @contextmanager
+    def reading(self, *sticky_keys):
+        """
+        Route queries inside the block to a replica when it is safe to
+
+        Args:
+            *sticky_keys (str): Keys of the records being read, e.g. 'user:7';
+                a recent write to any of them keeps the block on the primary
+        """
+        engine = self._pick_engine(sticky_keys)
+        if engine is None:
+            yield
+            return
+
+        session = current_app.extensions['sqlalchemy'].session()
+        previous = session.info.get('replica_engine')
+        session.info['replica_engine'] = engine
+        try:
+            yield
+        finally:
+            session.info['replica_engine'] = previous
+
+    def record_write(self, *sticky_keys):
+        """
+        Pin reads of the written records, and of the current user, to the primary
+
+        Args:
+            *sticky_keys (str): Keys of the written records
+        """
+        if not self.bind_keys:
+            return
+        for key in self._with_requester(sticky_keys):
+            self._recent_writes.set(key, True)
+
+    def get_stats(self):
+        """
+        Get routing metrics
+
+        Returns:
+            dict: Read counters and number of healthy replicas
+        """
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self._stats)
+            stats['replicas'] = len(self.bind_keys)
+            stats['healthy_replicas'] = sum(1 for state in self._state.values() if state['down_until'] <= now)
+        return stats
+
+    def _pick_engine(self, sticky_keys):
+        if not self.bind_keys:
+            return None
+
+        if any(self._recent_writes.get(key) for key in self._with_requester(sticky_keys)):
+            self._count('pinned_reads')
+            return None
+
+        engines = current_app.extensions['sqlalchemy'].engines
+        self._start_health_checks(engines)
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.bind_keys)
+        for offset in range(len(self.bind_keys)):
+            key = self.bind_keys[(start + offset) % len(self.bind_keys)]
+            if self._state[key]['down_until'] <= time.monotonic():
+                self._count('replica_reads')
+                return engines[key]
+
+        self._count('fallback_reads')
+        return None
+
+    def _start_health_checks(self, engines):
+        checker = (self._generation, os.getpid())
+        if self._checker == checker:
+            return
+        with self._lock:
+            if self._checker == checker:
+                return
+            self._checker = checker
+            for key, state in self._state.items():
+                if not state['listening']:
+                    event.listen(engines[key], 'handle_error', lambda context, key=key: self._on_error(key, context))
+                    state['listening'] = True
+        thread = threading.Thread(
+            target=self._check_health,
+            args=(checker, {key: engines[key] for key in self.bind_keys}),
+            name='replica-health-check',
+            daemon=True
+        )
+        thread.start()
+
+    def _check_health(self, checker, engines):
+        while self._checker == checker:
+            for key, engine in engines.items():
+                # A replica marked down is checked again once its retry window is over
+                state = self._state.get(key)
+                if state is None or state['down_until'] > time.monotonic():
+                    continue
+                try:
+                    with engine.connect() as connection:
+                        connection.execute(text('SELECT 1'))
+                except Exception as e:
+                    self._mark_down(key, e)
+            time.sleep(self.health_check_interval)
+
+    def _on_error(self, key, context):
+        # Only connection-level failures say anything about the replica's health
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError):
+            self._mark_down(key, context.original_exception)
+
+    def _mark_down(self, key, error):
+        now = time.monotonic()
+        with self._lock:
+            # A failed health check also reaches _on_error; count it once
+            if self._state[key]['down_until'] > now:
+                return
+            self._state[key]['down_until'] = now + self.retry_after
+            self._stats['replica_failures'] += 1
+        logger.warning(f'Read replica {key} marked down for {self.retry_after}s: {str(error)}')
+
+    def _with_requester(self, keys):
+        keys = list(keys)
+        if has_request_context():
+            try:
+                identity = get_jwt_identity()
+            except RuntimeError:
+                identity = None
+            if identity is not None:
+                keys.append(f'user:{identity}')
+        return keys
+
+    def _count(self, counter):
+        with self._lock:
+            self._stats[counter] += 1
@@ -0,0 +1,222 @@
+"""
+Token revocation
+Blocklist of revoked JWT IDs with a bloom filter in front of TTL'd entries
+"""
+import hashlib
+import math
+import threading
+import time
+
+
+class BloomFilter:
+    """
+    Fixed-size bloom filter over strings
+
+    Answers "definitely not added" or "maybe added"; the false positive rate
+    stays near error_rate while at most capacity items are added.
+
+    Args:
+        capacity (int): Expected number of items
+        error_rate (float): Target false positive rate
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+
+class MemoryBlocklistBackend:
+    """
+    Per-process blocklist: a bloom filter in front of a dict of expiry times
+
+    Most checks are for tokens that were never revoked and stop at the bloom
+    filter. Entries are kept until their token would have expired anyway;
+    expired entries are purged, and the filter rebuilt, at most once per
+    purge_interval.
+
+    Args:
+        capacity (int): Expected number of live revoked tokens
+        error_rate (float): Bloom filter false positive rate
+        purge_interval (int): Seconds between purges of expired entries
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001, purge_interval=60):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.purge_interval = purge_interval
+        self.bloom_rejections = 0
+        self._entries = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._purged_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._entries[jti] = expires_at
+            self._bloom.add(jti)
+            self._maybe_purge()
+
+    def contains(self, jti):
+        if jti not in self._bloom:
+            self.bloom_rejections += 1
+            return False
+        expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _maybe_purge(self):
+        if time.monotonic() - self._purged_at < self.purge_interval:
+            return
+        now = time.time()
+        self._entries = {jti: expires_at for jti, expires_at in self._entries.items() if expires_at > now}
+        # Bloom filters cannot forget; rebuild from the live entries, growing if needed
+        bloom = BloomFilter(max(self.capacity, len(self._entries) * 2), self.error_rate)
+        for jti in self._entries:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._purged_at = time.monotonic()
+
+
+class RedisBlocklistBackend:
+    """
+    Blocklist shared by all processes through Redis
+
+    Entries expire through Redis TTLs. No local bloom filter is kept because it
+    would miss revocations made by other processes; each check is one EXISTS.
+
+    Args:
+        client: Redis-compatible client exposing setex/exists
+        prefix (str): Namespace prepended to every key
+    """
+
+    def __init__(self, client, prefix='quickdrop:revoked:'):
+        self.client = client
+        self.prefix = prefix
+        self.bloom_rejections = 0
+
+    def add(self, jti, expires_at):
+        ttl = math.ceil(expires_at - time.time())
+        if ttl > 0:
+            self.client.setex(self.prefix + jti, ttl, 1)
+
+    def contains(self, jti):
+        return bool(self.client.exists(self.prefix + jti))
+
+
+class TokenBlocklist:
+    """
+    Revoked JWT store consulted on every authenticated request
+
+    Tokens are identified by their jti claim and kept only until they expire,
+    so the store stays proportional to the tokens revoked within one refresh
+    token lifetime.
+
+    Config:
+        TOKEN_BLOCKLIST_BACKEND: 'memory' (per process, for a single worker) or
+            'redis' (shared, needed as soon as there are several workers)
+        TOKEN_BLOCKLIST_CAPACITY: Expected live revoked tokens (memory backend)
+        TOKEN_BLOCKLIST_ERROR_RATE: Bloom filter false positive rate (memory backend)
+        TOKEN_BLOCKLIST_REDIS_URL: Redis URL for the redis backend
+    """
+
+    BACKENDS = ('memory', 'redis')
+
+    def __init__(self, app=None):
+        self.backend = None
+        self._lock = threading.Lock()
+        self._stats = {'checks': 0, 'revoked_hits': 0, 'revocations': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, backend=None):
+        """
+        Configure the blocklist from the application config
+
+        Args:
+            app: Flask application instance
+            backend: Backend instance overriding the configured one (e.g. a fake in tests)
+        """
+        self.backend = backend if backend is not None else self._backend_from_config(app.config)
+        with self._lock:
+            self._stats = {key: 0 for key in self._stats}
+        app.extensions['token_blocklist'] = self
+
+    def revoke(self, jti, expires_at):
+        """
+        Revoke a token until it expires
+
+        Args:
+            jti (str): Token ID
+            expires_at (int): Token expiry as a Unix timestamp (the exp claim)
+        """
+        self.backend.add(jti, expires_at)
+        self._count('revocations')
+
+    def is_revoked(self, jti):
+        """
+        Check whether a token was revoked
+
+        Args:
+            jti (str): Token ID
+
+        Returns:
+            bool: True if the token must be rejected
+        """
+        revoked = self.backend.contains(jti)
+        with self._lock:
+            self._stats['checks'] += 1
+            if revoked:
+                self._stats['revoked_hits'] += 1
+        return revoked
+
+    def get_stats(self):
+        """
+        Get blocklist metrics
+
+        Returns:
+            dict: Check, hit and revocation counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['bloom_rejections'] = self.backend.bloom_rejections
+        if isinstance(self.backend, MemoryBlocklistBackend):
+            stats['entries'] = len(self.backend)
+        return stats
+
+    def _count(self, counter):
+        with self._lock:
+            self._stats[counter] += 1
+
+    @classmethod
+    def _backend_from_config(cls, config):
+        name = config.get('TOKEN_BLOCKLIST_BACKEND', 'memory')
+        if name not in cls.BACKENDS:
+            raise ValueError(f"Invalid TOKEN_BLOCKLIST_BACKEND '{name}'. Must be one of: {', '.join(cls.BACKENDS)}")
+        if name == 'redis':
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError('TOKEN_BLOCKLIST_BACKEND=redis requires the redis package') from e
+            return RedisBlocklistBackend(redis.Redis.from_url(config['TOKEN_BLOCKLIST_REDIS_URL']))
+        return MemoryBlocklistBackend(
+            capacity=config.get('TOKEN_BLOCKLIST_CAPACITY', 100000),
+            error_rate=config.get('TOKEN_BLOCKLIST_ERROR_RATE', 0.001)
+        )
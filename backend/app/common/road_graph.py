@@ -0,0 +1,454 @@
+"""
+Road graph
+Compact directed road network with Dijkstra, A* and landmark (ALT) searches
+"""
+import csv
+import hashlib
+import heapq
+import math
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from app.common.geo import EARTH_RADIUS_KM, haversine_km
+
+INFINITY = float('inf')
+
+# Bumped whenever the cache layout changes
+CACHE_VERSION = 2
+
+# Cache file layout: header, then each array's length, then the arrays' raw little-endian items
+CACHE_MAGIC = b'QDROADS\x00'
+CACHE_HEADER = struct.Struct('<8sIqqdd')  # magic, version, CSV size, CSV mtime, default speed, max speed
+CACHE_ARRAYS = (
+    ('node_ids', 'q'), ('latitudes', 'd'), ('longitudes', 'd'), ('offsets', 'q'), ('targets', 'q'),
+    ('seconds', 'd'), ('meters', 'd'), ('reverse_offsets', 'q'), ('reverse_targets', 'q'), ('reverse_seconds', 'd')
+)
+CACHE_LENGTHS = struct.Struct(f'<{len(CACHE_ARRAYS)}q')
+
+# Landmarks consulted per query; the ones giving the best bound at the source
+ACTIVE_LANDMARKS = 4
+
+Route = namedtuple('Route', ['seconds', 'meters', 'nodes', 'settled'])
+
+
+class RoadGraph:
+    """
+    Directed road graph in compressed sparse row (CSR) form
+
+    Nodes are renumbered 0..n-1. The outgoing edges of node u are the slice
+    offsets[u]:offsets[u + 1] of the targets, seconds and meters arrays, so
+    the whole graph is a handful of flat typed arrays: no per-edge Python
+    objects, quick to scan and cheap to cache on disk. A reverse copy is
+    kept for searches towards a node (e.g. every courier to one pickup).
+
+    Edge costs are travel times in seconds. A* uses the straight-line
+    distance at the fastest speed in the graph as its lower bound; after
+    precompute_landmarks, ALT adds the triangle inequality bounds of a few
+    landmark nodes, which is much tighter on real roads.
+
+    Args:
+        node_ids (list): External node IDs (e.g. OSM IDs), by node index
+        latitudes (list): Node latitudes in degrees
+        longitudes (list): Node longitudes in degrees
+        sources (list): Edge source node indexes
+        targets (list): Edge target node indexes
+        seconds (list): Edge travel times in seconds
+        meters (list): Edge lengths in meters
+    """
+
+    def __init__(self, node_ids, latitudes, longitudes, sources, targets, seconds, meters):
+        self.node_ids = array('q', node_ids)
+        self.latitudes = array('d', latitudes)
+        self.longitudes = array('d', longitudes)
+        self.index_of = {node_id: i for i, node_id in enumerate(self.node_ids)}
+
+        count = len(self.node_ids)
+        self._phi = array('d', (math.radians(lat) for lat in self.latitudes))
+        self._lam = array('d', (math.radians(lon) for lon in self.longitudes))
+        self._cos = array('d', (math.cos(phi) for phi in self._phi))
+
+        self.offsets, self.targets, self.seconds, self.meters = _to_csr(count, sources, targets, seconds, meters)
+        self.reverse_offsets, self.reverse_targets, self.reverse_seconds, _ = _to_csr(
+            count, targets, sources, seconds, meters
+        )
+
+        # Fastest speed in km/s, for an admissible straight-line bound
+        self.max_speed = max(
+            (length / 1000 / time for length, time in zip(meters, seconds) if time > 0),
+            default=1.0
+        )
+        self.landmarks = []
+        self._from_landmark = []
+        self._to_landmark = []
+
+    @classmethod
+    def from_edge_list(cls, path, default_speed_kmh=30):
+        """
+        Read an OSM-derived edge list
+
+        The CSV needs the columns source, target, source_lat, source_lon,
+        target_lat and target_lon. Optional columns: length_m (default: the
+        straight-line distance), speed_kmh (default: default_speed_kmh) and
+        oneway (1 keeps only source -> target; default 0, both ways).
+
+        Args:
+            path (str): CSV file
+            default_speed_kmh (float): Speed of edges without speed_kmh
+
+        Returns:
+            RoadGraph: The graph
+        """
+        index_of = {}
+        node_ids, latitudes, longitudes = [], [], []
+        sources, targets, seconds, meters = [], [], [], []
+
+        def node(node_id, lat, lon):
+            i = index_of.get(node_id)
+            if i is None:
+                i = index_of[node_id] = len(node_ids)
+                node_ids.append(node_id)
+                latitudes.append(lat)
+                longitudes.append(lon)
+            return i
+
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                source_lat, source_lon = float(row['source_lat']), float(row['source_lon'])
+                target_lat, target_lon = float(row['target_lat']), float(row['target_lon'])
+                u = node(int(row['source']), source_lat, source_lon)
+                v = node(int(row['target']), target_lat, target_lon)
+                length = float(row.get('length_m') or 0) or haversine_km(
+                    source_lat, source_lon, target_lat, target_lon
+                ) * 1000
+                speed = float(row.get('speed_kmh') or 0) or default_speed_kmh
+                time = length / 1000 / speed * 3600
+                pairs = [(u, v)] if row.get('oneway') in ('1', 'true', 'yes') else [(u, v), (v, u)]
+                for a, b in pairs:
+                    sources.append(a)
+                    targets.append(b)
+                    seconds.append(time)
+                    meters.append(length)
+
+        return cls(node_ids, latitudes, longitudes, sources, targets, seconds, meters)
+
+    @classmethod
+    def load(cls, path, default_speed_kmh=30, cache=True):
+        """
+        Load an edge list, through a binary cache next to it
+
+        Parsing a city-sized CSV takes seconds; the cache (path + '.csr')
+        holds the CSR arrays as raw typed arrays behind a fixed header, and
+        is rebuilt whenever the CSV or the default speed changes. Reading it
+        only ever yields numbers: a damaged or foreign file is ignored.
+
+        Args:
+            path (str): CSV file
+            default_speed_kmh (float): Speed of edges without speed_kmh
+            cache (bool): Read and write the binary cache
+
+        Returns:
+            RoadGraph: The graph
+        """
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns, float(default_speed_kmh))
+        cache_path = path + '.csr'
+        if cache and os.path.exists(cache_path):
+            try:
+                graph = cls._read_cache(cache_path, key)
+                if graph is not None:
+                    return graph
+            except (OSError, EOFError, ValueError, struct.error):
+                pass
+
+        graph = cls.from_edge_list(path, default_speed_kmh)
+        if cache:
+            try:
+                graph._write_cache(cache_path, key)
+            except OSError:
+                pass
+        return graph
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def version(self):
+        """Digest of the nodes and edges, the same in every process loading the same graph"""
+        version = self.__dict__.get('_version')
+        if version is None:
+            digest = hashlib.blake2b(digest_size=8)
+            for name, _ in CACHE_ARRAYS:
+                digest.update(getattr(self, name).tobytes())
+            version = self._version = digest.hexdigest()
+        return version
+
+    @property
+    def edge_count(self):
+        """Number of directed edges"""
+        return len(self.targets)
+
+    def distances(self, source, targets=None, reverse=False, max_seconds=None):
+        """
+        Travel times from one node to many (Dijkstra)
+
+        Args:
+            source (int): Node index to start from
+            targets (iterable): Stop once all of these node indexes are settled
+            reverse (bool): Travel times to source instead of from it
+            max_seconds (float): Stop searching past this travel time
+
+        Returns:
+            dict: node index -> seconds for the targets reached, or for every
+                settled node when no targets are given
+        """
+        if reverse:
+            offsets, heads, costs = self.reverse_offsets, self.reverse_targets, self.reverse_seconds
+        else:
+            offsets, heads, costs = self.offsets, self.targets, self.seconds
+        limit = INFINITY if max_seconds is None else max_seconds
+        wanted = set(targets) if targets is not None else None
+        found = {}
+
+        dist = [INFINITY] * len(self.node_ids)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+        while heap:
+            d, u = pop(heap)
+            if d > dist[u]:
+                continue
+            if d > limit:
+                break
+            if wanted is None:
+                found[u] = d
+            elif u in wanted:
+                found[u] = d
+                wanted.discard(u)
+                if not wanted:
+                    break
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                nd = d + costs[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    push(heap, (nd, v))
+        return found
+
+    def shortest_path(self, source, target, method='astar'):
+        """
+        Fastest route between two nodes
+
+        Args:
+            source (int): Start node index
+            target (int): End node index
+            method (str): 'dijkstra', 'astar' or 'alt' (A* with landmark
+                bounds; falls back to 'astar' without landmarks)
+
+        Returns:
+            Route: (seconds, meters, nodes, settled), or None if unreachable
+        """
+        if method == 'dijkstra':
+            heuristic = None
+        elif method == 'astar' or not self.landmarks:
+            heuristic = self._straight_line_bound(target)
+        elif method == 'alt':
+            heuristic = self._landmark_bound(source, target)
+        else:
+            raise ValueError(f"Invalid routing method '{method}'. Must be one of: dijkstra, astar, alt")
+
+        offsets, heads, costs = self.offsets, self.targets, self.seconds
+        count = len(self.node_ids)
+        dist = [INFINITY] * count
+        parent_edge = [-1] * count
+        parent = [-1] * count
+        closed = bytearray(count)
+        dist[source] = 0.0
+        heap = [(heuristic(source) if heuristic else 0.0, 0.0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+        settled = 0
+
+        while heap:
+            _, d, u = pop(heap)
+            if closed[u]:
+                continue
+            closed[u] = 1
+            settled += 1
+            if u == target:
+                break
+            for e in range(offsets[u], offsets[u + 1]):
+                v = heads[e]
+                nd = d + costs[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = u
+                    parent_edge[v] = e
+                    push(heap, (nd + heuristic(v) if heuristic else nd, nd, v))
+
+        if dist[target] == INFINITY:
+            return None
+        nodes = [target]
+        meters = 0.0
+        while nodes[-1] != source:
+            meters += self.meters[parent_edge[nodes[-1]]]
+            nodes.append(parent[nodes[-1]])
+        nodes.reverse()
+        return Route(dist[target], meters, nodes, settled)
+
+    def precompute_landmarks(self, count=8):
+        """
+        Choose landmarks and store travel times to and from each (for ALT)
+
+        Landmarks are picked by farthest selection: each new one is the node
+        farthest, in travel time, from those already chosen, which spreads
+        them around the edge of the network where their bounds are best.
+        Memory cost is 2 x count x nodes doubles.
+
+        Args:
+            count (int): Number of landmarks
+        """
+        self.landmarks, self._from_landmark, self._to_landmark = [], [], []
+        if not len(self.node_ids) or count <= 0:
+            return
+        closest = array('d', [INFINITY]) * len(self.node_ids)
+        seed = self.distances(0)
+        candidate = max(seed, key=seed.get)
+        for _ in range(count):
+            from_landmark = self._distance_array(self.distances(candidate))
+            to_landmark = self._distance_array(self.distances(candidate, reverse=True))
+            self.landmarks.append(candidate)
+            self._from_landmark.append(from_landmark)
+            self._to_landmark.append(to_landmark)
+            for i, d in enumerate(from_landmark):
+                if d < closest[i]:
+                    closest[i] = d
+            reachable = [i for i, d in enumerate(closest) if 0 < d < INFINITY]
+            if not reachable:
+                break
+            candidate = max(reachable, key=closest.__getitem__)
+
+    def _distance_array(self, distances):
+        values = array('d', [INFINITY]) * len(self.node_ids)
+        for i, d in distances.items():
+            values[i] = d
+        return values
+
+    def _straight_line_bound(self, target):
+        """Seconds to the target at the fastest speed, as the crow flies"""
+        phi_t, lam_t, cos_t = self._phi[target], self._lam[target], self._cos[target]
+        phis, lams, cosines = self._phi, self._lam, self._cos
+        seconds_per_unit = 2 * EARTH_RADIUS_KM / self.max_speed
+        sin, asin, sqrt = math.sin, math.asin, math.sqrt
+
+        def bound(v):
+            h = sin((phis[v] - phi_t) / 2) ** 2 + cos_t * cosines[v] * sin((lams[v] - lam_t) / 2) ** 2
+            return seconds_per_unit * asin(min(sqrt(h), 1.0))
+        return bound
+
+    def _landmark_bound(self, source, target):
+        """Best triangle inequality bound over the landmarks most useful for this pair"""
+        forward, backward = [], []
+        for from_landmark, to_landmark in zip(self._from_landmark, self._to_landmark):
+            # d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L)
+            if from_landmark[target] < INFINITY:
+                forward.append((from_landmark[target] - from_landmark[source], from_landmark, from_landmark[target]))
+            if to_landmark[target] < INFINITY:
+                backward.append((to_landmark[source] - to_landmark[target], to_landmark, to_landmark[target]))
+        forward = [entry[1:] for entry in heapq.nlargest(ACTIVE_LANDMARKS, forward, key=lambda entry: entry[0])]
+        backward = [entry[1:] for entry in heapq.nlargest(ACTIVE_LANDMARKS, backward, key=lambda entry: entry[0])]
+
+        def bound(v):
+            best = 0.0
+            for from_landmark, at_target in forward:
+                if at_target - from_landmark[v] > best:
+                    best = at_target - from_landmark[v]
+            for to_landmark, at_target in backward:
+                if to_landmark[v] - at_target > best:
+                    best = to_landmark[v] - at_target
+            return best
+        return bound
+
+    def _write_cache(self, cache_path, key):
+        """Write the CSR arrays, through a temporary file so readers never see half a cache"""
+        temporary = f'{cache_path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, *key, self.max_speed))
+                f.write(CACHE_LENGTHS.pack(*(len(getattr(self, name)) for name, _ in CACHE_ARRAYS)))
+                for name, _ in CACHE_ARRAYS:
+                    values = getattr(self, name)
+                    if sys.byteorder != 'little':
+                        values = array(values.typecode, values)
+                        values.byteswap()
+                    values.tofile(f)
+            os.replace(temporary, cache_path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    @classmethod
+    def _read_cache(cls, cache_path, key):
+        """The cached graph, or None if the cache is for another CSV, speed or layout"""
+        with open(cache_path, 'rb') as f:
+            magic, version, *cached_key, max_speed = CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+            if magic != CACHE_MAGIC or version != CACHE_VERSION or tuple(cached_key) != key:
+                return None
+            lengths = CACHE_LENGTHS.unpack(f.read(CACHE_LENGTHS.size))
+            size = CACHE_HEADER.size + CACHE_LENGTHS.size + sum(
+                length * array(typecode).itemsize for (_, typecode), length in zip(CACHE_ARRAYS, lengths)
+            )
+            if min(lengths) < 0 or size != os.fstat(f.fileno()).st_size:
+                return None
+            arrays = {}
+            for (name, typecode), length in zip(CACHE_ARRAYS, lengths):
+                values = array(typecode)
+                values.fromfile(f, length)
+                if sys.byteorder != 'little':
+                    values.byteswap()
+                arrays[name] = values
+
+        count = len(arrays['node_ids'])
+        if (len(arrays['latitudes']) != count or len(arrays['longitudes']) != count
+                or len(arrays['offsets']) != count + 1 or len(arrays['reverse_offsets']) != count + 1
+                or not len(arrays['targets']) == len(arrays['seconds']) == len(arrays['meters'])
+                == arrays['offsets'][-1]
+                or not len(arrays['reverse_targets']) == len(arrays['reverse_seconds'])
+                == arrays['reverse_offsets'][-1]):
+            return None
+        return cls._from_arrays(arrays, max_speed)
+
+    @classmethod
+    def _from_arrays(cls, arrays, max_speed):
+        graph = cls.__new__(cls)
+        for name, values in arrays.items():
+            setattr(graph, name, values)
+        graph.max_speed = max_speed
+        graph.index_of = {node_id: i for i, node_id in enumerate(graph.node_ids)}
+        graph._phi = array('d', (math.radians(lat) for lat in graph.latitudes))
+        graph._lam = array('d', (math.radians(lon) for lon in graph.longitudes))
+        graph._cos = array('d', (math.cos(phi) for phi in graph._phi))
+        graph.landmarks, graph._from_landmark, graph._to_landmark = [], [], []
+        return graph
+
+
+def _to_csr(count, sources, targets, seconds, meters):
+    """Group edges by source node with a counting sort"""
+    offsets = array('q', [0]) * (count + 1)
+    for u in sources:
+        offsets[u + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+    position = array('q', offsets[:-1])
+    size = len(sources)
+    heads = array('q', [0]) * size
+    costs = array('d', [0.0]) * size
+    lengths = array('d', [0.0]) * size
+    for u, v, time, length in zip(sources, targets, seconds, meters):
+        slot = position[u]
+        position[u] = slot + 1
+        heads[slot] = v
+        costs[slot] = time
+        lengths[slot] = length
+    return offsets, heads, costs, lengths
@@ -0,0 +1,290 @@
+"""
+Routing engine
+Loads the road graph once per process and answers route, ETA and travel time queries
+"""
+import os
+import threading
+import time
+
+from app.common.courier_index import CourierIndex
+from app.common.road_graph import RoadGraph
+
+
+class RoutingEngine:
+    """
+    Per-process access to the road graph
+
+    The graph is loaded by a background thread started with the app (or
+    on first use with ROUTING_PRELOAD off), so no request waits for the CSV
+    and the ALT landmarks: until it is ready, callers that cannot wait check
+    is_ready() and fall back. A forked worker that did not inherit a loaded
+    graph starts its own loader on first use. After a failed load, no new
+    attempt starts for ROUTING_RETRY_AFTER seconds and get_graph returns
+    None at once, so a broken graph file does not make every query re-parse
+    it. Coordinates are snapped to the nearest graph node through a point index (the
+    courier index, with positions that never expire).
+
+    Config:
+        ROUTING_GRAPH_FILE: Edge list CSV of the road network (routing is off when unset)
+        ROUTING_DEFAULT_SPEED_KMH: Speed of edges without a speed, and of the snap legs
+        ROUTING_LANDMARKS: ALT landmarks computed after loading (0 uses plain A*)
+        ROUTING_MAX_SNAP_KM: Farthest a point may be from the nearest graph node
+        ROUTING_PRELOAD: Start loading the graph when the app is created
+        ROUTING_RETRY_AFTER: Seconds before a failed load is attempted again
+    """
+
+    def __init__(self, app=None):
+        self.graph_file = None
+        self.default_speed_kmh = 30
+        self.landmark_count = 8
+        self.max_snap_km = 1.0
+        self.retry_after = 60
+        self._app = None
+        self._graph = None
+        self._nodes = None
+        self._loaded = threading.Event()
+        self._loader_pid = None
+        self._retry_at = 0.0
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stats = {'routes': 0, 'unreachable': 0, 'settled': 0, 'route_time_total': 0.0, 'travel_time_queries': 0,
+                       'load_failures': 0}
+        self._load_seconds = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, graph=None):
+        """
+        Configure the engine from the application config
+
+        Args:
+            app: Flask application instance
+            graph (RoadGraph): Graph to use instead of loading ROUTING_GRAPH_FILE (e.g. in tests)
+        """
+        self.graph_file = app.config.get('ROUTING_GRAPH_FILE') or None
+        self.default_speed_kmh = app.config.get('ROUTING_DEFAULT_SPEED_KMH', 30)
+        self.landmark_count = app.config.get('ROUTING_LANDMARKS', 8)
+        self.max_snap_km = app.config.get('ROUTING_MAX_SNAP_KM', 1.0)
+        self.retry_after = app.config.get('ROUTING_RETRY_AFTER', 60)
+        self._app = app
+        self._graph = None
+        self._nodes = None
+        self._loaded = threading.Event()
+        self._loader_pid = None
+        self._retry_at = 0.0
+        self._load_seconds = None
+        if graph is not None:
+            self._use(graph)
+        with self._lock:
+            self._stats = {key: 0 for key in self._stats}
+        app.extensions['routing'] = self
+        if app.config.get('ROUTING_PRELOAD', True):
+            self.start_loading()
+
+    def is_configured(self):
+        """
+        Check whether a road graph is available
+
+        Returns:
+            bool: True if a graph is loaded or a graph file is configured
+        """
+        return self._graph is not None or self.graph_file is not None
+
+    def is_ready(self):
+        """
+        Check whether the road graph is loaded
+
+        Returns:
+            bool: True once queries no longer wait for the graph
+        """
+        return self._graph is not None
+
+    def start_loading(self):
+        """Load the graph in a background thread of this process, unless it is loaded, loading or backing off"""
+        if self._graph is not None or self.graph_file is None or time.monotonic() < self._retry_at:
+            return
+        with self._load_lock:
+            if self._graph is not None or self._loader_pid == os.getpid() or time.monotonic() < self._retry_at:
+                return
+            self._loaded = threading.Event()
+            self._loader_pid = os.getpid()
+            threading.Thread(target=self._load, args=(self._loaded,), name='road-graph', daemon=True).start()
+
+    def get_graph(self, wait=True):
+        """
+        The road graph, waiting for the background load
+
+        Args:
+            wait (bool): Wait until the graph is loaded instead of returning None
+
+        Returns:
+            RoadGraph: The graph, or None if routing is not configured, the
+                last load failed less than ROUTING_RETRY_AFTER seconds ago, or
+                it is still loading and wait is False
+        """
+        if self._graph is None and self.graph_file is not None:
+            self.start_loading()
+            if wait:
+                self._loaded.wait()
+        return self._graph
+
+    def graph_version(self):
+        """
+        Identity of the loaded graph, for caching results computed over it
+
+        Returns:
+            str: Digest of the graph, or None if it is not loaded yet
+        """
+        graph = self.get_graph(wait=False)
+        return graph.version if graph is not None else None
+
+    def snap(self, lat, lon):
+        """
+        Nearest graph node to a point
+
+        Args:
+            lat (float): Latitude in degrees
+            lon (float): Longitude in degrees
+
+        Returns:
+            tuple: (node index, km), or None if no node is within ROUTING_MAX_SNAP_KM
+        """
+        if self.get_graph() is None:
+            return None
+        nearest = self._nodes.nearest(lat, lon, k=1, radius_km=self.max_snap_km)
+        return nearest[0] if nearest else None
+
+    def route(self, from_lat, from_lon, to_lat, to_lon, method=None):
+        """
+        Fastest route between two points
+
+        Both points are snapped to the graph; the straight legs to and from
+        the snapped nodes are added at ROUTING_DEFAULT_SPEED_KMH.
+
+        Args:
+            from_lat (float): Origin latitude
+            from_lon (float): Origin longitude
+            to_lat (float): Destination latitude
+            to_lon (float): Destination longitude
+            method (str): 'dijkstra', 'astar' or 'alt' (default: 'alt' when
+                landmarks are computed, else 'astar')
+
+        Returns:
+            tuple: (route, error); route has seconds, meters and the path as
+                [lat, lon] points
+        """
+        graph = self.get_graph()
+        if graph is None:
+            return None, 'Routing is not configured'
+        origin, destination = self.snap(from_lat, from_lon), self.snap(to_lat, to_lon)
+        if origin is None or destination is None:
+            return None, f'No road within {self.max_snap_km} km of the {"origin" if origin is None else "destination"}'
+
+        started = time.perf_counter()
+        result = graph.shortest_path(origin[0], destination[0], method or ('alt' if graph.landmarks else 'astar'))
+        with self._lock:
+            self._stats['routes'] += 1
+            self._stats['route_time_total'] += time.perf_counter() - started
+            if result is None:
+                self._stats['unreachable'] += 1
+            else:
+                self._stats['settled'] += result.settled
+        if result is None:
+            return None, 'No route between these points'
+
+        snap_km = origin[1] + destination[1]
+        return {
+            'seconds': result.seconds + snap_km / self.default_speed_kmh * 3600,
+            'meters': result.meters + snap_km * 1000,
+            'path': [[graph.latitudes[node], graph.longitudes[node]] for node in result.nodes],
+            'settled': result.settled
+        }, None
+
+    def travel_times(self, to_lat, to_lon, origins, max_seconds=None):
+        """
+        Travel times from many points to one (e.g. every candidate courier to a pickup)
+
+        One reverse Dijkstra from the destination, stopped once every
+        origin's node is settled.
+
+        Args:
+            to_lat (float): Destination latitude
+            to_lon (float): Destination longitude
+            origins (list): (key, lat, lon) tuples
+            max_seconds (float): Leave out origins farther than this
+
+        Returns:
+            dict: key -> seconds for the origins that can reach the destination
+        """
+        graph = self.get_graph()
+        destination = self.snap(to_lat, to_lon)
+        if graph is None or destination is None:
+            return {}
+        snapped = {}
+        for key, lat, lon in origins:
+            origin = self.snap(lat, lon)
+            if origin is not None:
+                snapped[key] = origin
+        reached = graph.distances(
+            destination[0], {node for node, _ in snapped.values()}, reverse=True, max_seconds=max_seconds
+        )
+        with self._lock:
+            self._stats['travel_time_queries'] += 1
+
+        seconds_per_km = 3600 / self.default_speed_kmh
+        return {
+            key: reached[node] + (km + destination[1]) * seconds_per_km
+            for key, (node, km) in snapped.items()
+            if node in reached
+        }
+
+    def get_stats(self):
+        """
+        Get routing metrics
+
+        Returns:
+            dict: Graph size, load time and query counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        graph = self._graph
+        stats['nodes'] = len(graph) if graph is not None else 0
+        stats['edges'] = graph.edge_count if graph is not None else 0
+        stats['landmarks'] = len(graph.landmarks) if graph is not None else 0
+        stats['ready'] = graph is not None
+        stats['load_seconds'] = self._load_seconds
+        stats['avg_route_ms'] = stats['route_time_total'] * 1000 / (stats['routes'] or 1)
+        stats['avg_settled'] = stats['settled'] / ((stats['routes'] - stats['unreachable']) or 1)
+        return stats
+
+    def _load(self, loaded):
+        started = time.monotonic()
+        try:
+            graph = RoadGraph.load(self.graph_file, self.default_speed_kmh)
+            graph.precompute_landmarks(self.landmark_count)
+            graph.version  # Digest here rather than in the first ETA lookup
+            if loaded is self._loaded:
+                self._use(graph)
+                self._load_seconds = time.monotonic() - started
+                self._app.logger.info(
+                    f'Road graph loaded: {len(graph)} nodes, {graph.edge_count} edges in {self._load_seconds:.1f}s'
+                )
+        except Exception as e:
+            # Queries get no graph until the retry window is over; the first one after it tries again
+            with self._load_lock:
+                self._retry_at = time.monotonic() + self.retry_after
+                self._loader_pid = None
+            with self._lock:
+                self._stats['load_failures'] += 1
+            self._app.logger.error(
+                f'Road graph failed to load from {self.graph_file}, retrying in {self.retry_after}s: {str(e)}'
+            )
+        finally:
+            loaded.set()
+
+    def _use(self, graph):
+        nodes = CourierIndex(precision=7, max_age=float('inf'))
+        for node in range(len(graph)):
+            nodes.update(node, graph.latitudes[node], graph.longitudes[node], timestamp=0)
+        self._nodes = nodes
+        self._graph = graph
@@ -1,9 +1,15 @@
 """
 Common utility functions
 """
+import base64
+import json
+import math
 import re
 from datetime import datetime
-from flask import jsonify
+from flask import g, jsonify, request
+from sqlalchemy import tuple_
+from app import count_cache
+from app.common.metrics import timed
 
 
 def success_response(data=None, message='Success', status_code=200):
@@ -22,9 +28,26 @@ def success_response(data=None, message='Success', status_code=200):
         'success': True,
         'message': message,
         'data': data,
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': datetime.utcnow()
     }
-    return jsonify(response), status_code
+    with timed('serialize'):
+        body = jsonify(response)
+    return body, status_code
+
+
+def get_json_body():
+    """
+    Get the request's JSON body, parsed at most once per request
+
+    Decorators and controllers share the parsed body through flask.g instead
+    of each calling request.get_json().
+
+    Returns:
+        The parsed body, or None if the request is not JSON or cannot be parsed
+    """
+    if 'json_body' not in g:
+        g.json_body = request.get_json(silent=True) if request.is_json else None
+    return g.json_body
 
 
 def error_response(message='An error occurred', status_code=400, errors=None):
@@ -42,38 +65,176 @@ def error_response(message='An error occurred', status_code=400, errors=None):
     response = {
         'success': False,
         'message': message,
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': datetime.utcnow()
     }
     if errors:
         response['errors'] = errors
-    return jsonify(response), status_code
+    with timed('serialize'):
+        body = jsonify(response)
+    return body, status_code
 
 
-def paginate_query(query, page=1, per_page=20):
+def encode_cursor(values):
+    """
+    Encode keyset values into an opaque pagination cursor
+    
+    Args:
+        values (list): Values of the keyset columns for the last row of a page
+    
+    Returns:
+        str: URL-safe cursor string
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """
+    Decode an opaque pagination cursor back into keyset values
+    
+    Args:
+        cursor (str): Cursor produced by encode_cursor
+        columns (tuple): Keyset columns the cursor was built from
+    
+    Returns:
+        list: Keyset values converted to the column types
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        raise ValueError('Invalid cursor')
+    
+    values = []
+    for column, value in zip(columns, payload):
+        if value is not None and column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        values.append(value)
+    return values
+
+
+def paginate_query(query, page=1, per_page=20, cursor=None, keyset=None, serializer=None,
+                   count_key=None):
     """
     Paginate a SQLAlchemy query
     
+    Offset mode (the default) returns page numbers and totals. Passing ``keyset``
+    switches to cursor mode: rows are ordered by the keyset columns descending and
+    the next page starts strictly after ``cursor``, so deep pages cost the same as
+    the first one and no COUNT(*) query is issued.
+    
+    In offset mode the total comes from the count cache when ``count_key`` is
+    given, and may then be a planner estimate; ``total_is_exact`` says which.
+    
     Args:
         query: SQLAlchemy query object
-        page (int): Page number
+        page (int): Page number (offset mode)
         per_page (int): Items per page
+        cursor (str): Cursor from a previous page, None or '' for the first page (cursor mode)
+        keyset (tuple): Unique ordering columns, e.g. (Model.created_at, Model.id)
+        serializer (callable): Converts an item to a dict, defaults to item.to_dict()
+        count_key (tuple): (namespace, key) under which the total is cached (offset mode)
     
     Returns:
         dict: Pagination data
+    
+    Raises:
+        ValueError: If the cursor is malformed
     """
-    paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+    serializer = serializer or (lambda item: item.to_dict())
+    
+    if keyset is not None:
+        return _keyset_paginate(query, per_page, cursor, keyset, serializer)
+    
+    # Fetch one extra row so has_next is right even when the total is estimated
+    rows = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    if count_key is not None:
+        total, total_is_exact = count_cache.count(query, *count_key)
+    else:
+        total, total_is_exact = query.order_by(None).count(), True
     
     return {
-        'items': [item.to_dict() for item in paginated.items],
-        'total': paginated.total,
+        'items': [serializer(item) for item in rows],
+        'total': total,
+        'total_is_exact': total_is_exact,
         'page': page,
         'per_page': per_page,
-        'pages': paginated.pages,
-        'has_next': paginated.has_next,
-        'has_prev': paginated.has_prev
+        'pages': math.ceil(total / per_page) if total else 0,
+        'has_next': has_next,
+        'has_prev': page > 1
     }
 
 
+def project_query(query, model, fields, extra_columns=()):
+    """
+    Narrow a model query to the given columns
+    
+    Rows come back as lightweight tuples instead of ORM instances, so only the
+    requested columns are read and no objects are hydrated.
+    
+    Args:
+        query: SQLAlchemy query over ``model``
+        model: Model class the fields belong to
+        fields (list): Column names to return, in output order
+        extra_columns (tuple): Columns needed for ordering or cursors but not
+            returned, e.g. a pagination keyset
+    
+    Returns:
+        tuple: (query, serializer) where serializer turns a row into a dict
+    """
+    fields = list(fields)
+    columns = [getattr(model, field) for field in fields]
+    extra = [column for column in extra_columns if column.key not in fields]
+    width = len(fields)
+    
+    def serializer(row):
+        return dict(zip(fields, row[:width]))
+    
+    return query.with_entities(*columns, *extra), serializer
+
+
+def _keyset_paginate(query, per_page, cursor, keyset, serializer):
+    """Cursor-mode pagination used by paginate_query"""
+    query = query.order_by(None).order_by(*[column.desc() for column in keyset])
+    if cursor:
+        values = decode_cursor(cursor, keyset)
+        query = query.filter(tuple_(*keyset) < tuple_(*values))
+    
+    # Fetch one extra row to learn whether another page exists
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    next_cursor = None
+    if has_next:
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in keyset])
+    
+    return {
+        'items': [serializer(item) for item in rows],
+        'per_page': per_page,
+        'cursor': cursor or None,
+        'next_cursor': next_cursor,
+        'has_next': has_next
+    }
+
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Deletes the separators allowed in phone numbers: whitespace, '-', '(', ')' and '+'
+PHONE_SEPARATORS = str.maketrans('', '', ' \t\n\r\f\v-()+')
+
+
 def is_valid_email(email):
     """
     Validate email format
@@ -84,8 +245,7 @@ def is_valid_email(email):
     Returns:
         bool: True if valid, False otherwise
     """
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return EMAIL_PATTERN.fullmatch(email) is not None
 
 
 def is_valid_phone(phone):
@@ -98,9 +258,8 @@ def is_valid_phone(phone):
     Returns:
         bool: True if valid, False otherwise
     """
-    # Remove common separators
-    cleaned = re.sub(r'[\s\-\(\)\+]', '', phone)
-    # Check if it contains only digits and has reasonable length
+    # Remove common separators, then require 10-15 digits
+    cleaned = phone.translate(PHONE_SEPARATORS)
     return cleaned.isdigit() and 10 <= len(cleaned) <= 15
 
 
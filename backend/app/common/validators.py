@@ -1,136 +1,233 @@
 """
 Request validation utilities
+Declarative schemas compiled once into per-field checks
 """
+import time
 from functools import wraps
-from flask import request
-from app.common.utils import error_response, is_valid_email, is_valid_phone
+from flask import g, request
+from app.common.utils import error_response, get_json_body, is_valid_email, is_valid_phone
 
+# Error key for problems with the record as a whole rather than one field
+RECORD_ERRORS = '_record'
 
-def validate_required_fields(required_fields):
+REQUIRED_MESSAGE = 'This field is required'
+EMPTY_MESSAGE = 'This field may not be empty'
+NOT_AN_OBJECT_MESSAGE = 'Expected a JSON object'
+
+USER_ROLES = ('user', 'admin', 'driver')
+
+NUMBER = (int, float)
+TYPE_NAMES = {str: 'a string', int: 'an integer', bool: 'a boolean', NUMBER: 'a number'}
+
+
+class Field:
     """
-    Decorator to validate required fields in request JSON
-    
+    Rules for one field of a schema
+
     Args:
-        required_fields (list): List of required field names
-    
-    Returns:
-        function: Decorated function
+        required (bool): Field must be present and non-empty
+        blank (bool): Keep None or '' in the payload instead of dropping it
+        sensitive (bool): Never write the value to logs
+        type_ (type): Expected Python type of the value
+        min_length (int): Minimum length of the value
+        max_length (int): Maximum length of the value
+        choices (tuple): Allowed values
+        check (callable): Extra predicate on the value
+        message (str): Error reported when check fails
     """
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            if not request.is_json:
-                return error_response('Content-Type must be application/json', 400)
-            
-            data = request.get_json()
-            missing_fields = [field for field in required_fields if field not in data or not data[field]]
-            
-            if missing_fields:
-                return error_response(
-                    'Missing required fields',
-                    400,
-                    {'missing_fields': missing_fields}
-                )
-            
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
 
+    __slots__ = ('required', 'blank', 'sensitive', 'type_', 'min_length', 'max_length', 'choices', 'check', 'message')
 
-def validate_email_field(field_name='email'):
+    def __init__(self, required=False, blank=False, sensitive=False, type_=str, min_length=None, max_length=None,
+                 choices=None, check=None, message='Invalid value'):
+        self.required = required
+        self.blank = blank
+        self.sensitive = sensitive
+        self.type_ = type_
+        self.min_length = min_length
+        self.max_length = max_length
+        self.choices = choices
+        self.check = check
+        self.message = message
+
+    def compile(self):
+        """
+        Resolve this field's rules into the tuple Schema.validate walks
+
+        Messages are formatted here, once, so validating a value allocates
+        nothing unless it fails.
+
+        Returns:
+            tuple: (type, min_length, max_length, choices, check, messages)
+        """
+        type_name = TYPE_NAMES.get(self.type_) or self.type_.__name__
+        messages = (
+            f'Must be {type_name}',
+            f'Must be at least {self.min_length} characters long',
+            f'Must be at most {self.max_length} characters long',
+            f"Must be one of: {', '.join(str(choice) for choice in self.choices or ())}",
+            self.message
+        )
+        choices = frozenset(self.choices) if self.choices is not None else None
+        return (self.type_, self.min_length, self.max_length, choices, self.check, messages)
+
+
+class Schema:
     """
-    Decorator to validate email field in request JSON
-    
+    Validator for JSON records, compiled once when the schema is defined
+
+    Values that are None or '' count as missing, and are dropped from the
+    validated payload unless the field allows blanks. Unknown keys are dropped
+    too. Errors are reported per field, e.g.
+    {'email': ['Invalid email format']}, or under RECORD_ERRORS when the
+    record is not an object.
+
     Args:
-        field_name (str): Name of email field
-    
-    Returns:
-        function: Decorated function
+        partial (bool): Validate only the fields present (for updates);
+            required fields may then be omitted but not emptied
+        **fields (Field): Field rules by name
     """
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            data = request.get_json()
-            email = data.get(field_name)
-            
-            if email and not is_valid_email(email):
-                return error_response(
-                    f'Invalid email format for field: {field_name}',
-                    400
-                )
-            
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
 
+    def __init__(self, partial=False, **fields):
+        self.fields = fields
+        self.partial = partial
+        self._compiled = tuple(
+            (name, field.required, field.blank, field.compile())
+            for name, field in fields.items()
+        )
+        self.sensitive = frozenset(name for name, field in fields.items() if field.sensitive)
 
-def validate_phone_field(field_name='phone'):
+    def as_partial(self):
+        """
+        Build the update variant of this schema
+
+        Returns:
+            Schema: Same fields, with partial=True
+        """
+        return Schema(partial=True, **self.fields)
+
+    def validate(self, data):
+        """
+        Validate one record
+
+        Args:
+            data (dict): Record to validate
+
+        Returns:
+            tuple: (payload, errors); payload holds the known fields present,
+                errors is None when the record is valid
+        """
+        if not isinstance(data, dict):
+            return None, {RECORD_ERRORS: [NOT_AN_OBJECT_MESSAGE]}
+
+        payload = {}
+        errors = None
+        partial = self.partial
+        for name, required, blank, (type_, min_length, max_length, choices, check, messages) in self._compiled:
+            value = data.get(name)
+            if value is None or value == '':
+                if required and (name in data or not partial):
+                    if errors is None:
+                        errors = {}
+                    errors[name] = [EMPTY_MESSAGE if partial else REQUIRED_MESSAGE]
+                elif blank and name in data:
+                    payload[name] = value
+                continue
+
+            # bool is a subclass of int, but true/false is never a valid number
+            if not isinstance(value, type_) or (value.__class__ is bool and type_ is not bool):
+                message = messages[0]
+            elif min_length is not None and len(value) < min_length:
+                message = messages[1]
+            elif max_length is not None and len(value) > max_length:
+                message = messages[2]
+            elif choices is not None and value not in choices:
+                message = messages[3]
+            elif check is not None and not check(value):
+                message = messages[4]
+            else:
+                payload[name] = value
+                continue
+            if errors is None:
+                errors = {}
+            errors[name] = [message]
+        return payload, errors
+
+    def validate_many(self, records):
+        """
+        Validate a list of records in one pass
+
+        Args:
+            records (list): Records to validate
+
+        Returns:
+            list: (payload, errors) per record, in input order
+        """
+        validate = self.validate
+        return [validate(record) for record in records]
+
+
+USER_SCHEMA = Schema(
+    name=Field(required=True, max_length=100),
+    email=Field(required=True, max_length=120, check=is_valid_email, message='Invalid email format'),
+    password=Field(required=True, sensitive=True, min_length=8),
+    phone=Field(required=True, max_length=20, check=is_valid_phone, message='Invalid phone number format'),
+    role=Field(choices=USER_ROLES),
+    address=Field(blank=True)
+)
+USER_UPDATE_SCHEMA = USER_SCHEMA.as_partial()
+
+COURIER_LOCATION_SCHEMA = Schema(
+    latitude=Field(required=True, type_=NUMBER, check=lambda value: -90 <= value <= 90,
+                   message='Must be between -90 and 90'),
+    longitude=Field(required=True, type_=NUMBER, check=lambda value: -180 <= value <= 180,
+                    message='Must be between -180 and 180')
+)
+# Device clocks may run a little ahead of the server
+MAX_CLOCK_SKEW = 300
+LOCATION_PING_SCHEMA = Schema(
+    courier_id=Field(required=True, type_=int, check=lambda value: value > 0, message='Must be positive'),
+    latitude=COURIER_LOCATION_SCHEMA.fields['latitude'],
+    longitude=COURIER_LOCATION_SCHEMA.fields['longitude'],
+    recorded_at=Field(type_=NUMBER, check=lambda value: value <= time.time() + MAX_CLOCK_SKEW,
+                      message='Must not be in the future')
+)
+LOGIN_SCHEMA = Schema(
+    email=Field(required=True, max_length=120),
+    password=Field(required=True, sensitive=True)
+)
+
+
+def validate_body(schema, message='Validation failed'):
     """
-    Decorator to validate phone field in request JSON
-    
+    Decorator to validate the JSON body against a schema
+
+    The body is parsed once per request (see get_json_body) and validated in
+    one pass. The controller receives the validated payload as its data
+    argument; log_request reads the same payload and leaves out the
+    schema's sensitive fields.
+
     Args:
-        field_name (str): Name of phone field
-    
+        schema (Schema): Schema the body must match
+        message (str): Error message returned with the field errors
+
     Returns:
         function: Decorated function
     """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            data = request.get_json()
-            phone = data.get(field_name)
-            
-            if phone and not is_valid_phone(phone):
-                return error_response(
-                    f'Invalid phone number format for field: {field_name}',
-                    400
-                )
-            
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
-
+            if not request.is_json:
+                return error_response('Content-Type must be application/json', 400)
 
-def validate_user_data(data, is_update=False):
-    """
-    Validate user data
-    
-    Args:
-        data (dict): User data to validate
-        is_update (bool): Whether this is an update operation
-    
-    Returns:
-        tuple: (is_valid, errors)
-    """
-    errors = []
-    
-    if not is_update:
-        # Required fields for creation
-        required = ['name', 'email', 'password', 'phone']
-        missing = [field for field in required if not data.get(field)]
-        if missing:
-            errors.append(f"Missing required fields: {', '.join(missing)}")
-    
-    # Email validation
-    if 'email' in data and data['email']:
-        if not is_valid_email(data['email']):
-            errors.append('Invalid email format')
-    
-    # Phone validation
-    if 'phone' in data and data['phone']:
-        if not is_valid_phone(data['phone']):
-            errors.append('Invalid phone number format')
-    
-    # Password validation
-    if 'password' in data and data['password']:
-        if len(data['password']) < 8:
-            errors.append('Password must be at least 8 characters long')
-    
-    # Role validation
-    if 'role' in data and data['role']:
-        valid_roles = ['user', 'admin', 'driver']
-        if data['role'] not in valid_roles:
-            errors.append(f"Invalid role. Must be one of: {', '.join(valid_roles)}")
-    
-    return len(errors) == 0, errors
+            payload, errors = schema.validate(get_json_body())
+            # Rejected bodies are logged from the payload too, so only valid,
+            # non-sensitive values ever reach the access log
+            g.request_payload = payload
+            g.request_schema = schema
+            if errors:
+                return error_response(message, 400, errors)
 
+            return f(*args, data=payload, **kwargs)
+        return decorated_function
+    return decorator
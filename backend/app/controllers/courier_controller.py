@@ -0,0 +1,227 @@
+"""
+Courier Controllers
+Handle HTTP requests and responses for courier endpoints
+"""
+import math
+from flask import g, request, current_app
+from flask_jwt_extended import get_jwt_identity
+from app import dispatcher
+from app.services.courier_service import CourierService
+from app.common.utils import success_response, error_response, get_json_body
+from app.common.decorators import handle_exceptions, log_request
+from app.common.validators import COURIER_LOCATION_SCHEMA, validate_body
+
+
+class CourierController:
+    """Courier controller for handling HTTP requests"""
+
+    @staticmethod
+    @handle_exceptions
+    @log_request
+    @validate_body(COURIER_LOCATION_SCHEMA)
+    def update_location(courier_id, data):
+        """
+        Report a courier's current position
+        ---
+        tags:
+          - Couriers
+        parameters:
+          - in: path
+            name: courier_id
+            required: true
+            type: integer
+            description: Courier ID
+          - in: body
+            name: body
+            required: true
+            schema:
+              type: object
+              required:
+                - latitude
+                - longitude
+              properties:
+                latitude:
+                  type: number
+                  example: -1.9441
+                longitude:
+                  type: number
+                  example: 30.0619
+        responses:
+          200:
+            description: Location updated successfully
+          400:
+            description: Invalid coordinates
+          403:
+            description: Drivers may only report their own courier
+          503:
+            description: Ping buffer is full, retry after the Retry-After header
+        """
+        allowed = CourierController._allowed_courier_id()
+        if allowed is not None and allowed != courier_id:
+            return error_response("Drivers may only report their own courier's position", 403)
+
+        location, error = CourierService.update_location(courier_id, data['latitude'], data['longitude'])
+
+        if error:
+            return CourierController._error(error, 'Failed to update location')
+
+        return success_response(location, 'Location updated successfully')
+
+    @staticmethod
+    @handle_exceptions
+    @log_request
+    def find_nearby():
+        """
+        Find the couriers closest to a point
+        ---
+        tags:
+          - Couriers
+        parameters:
+          - in: query
+            name: latitude
+            type: number
+            required: true
+          - in: query
+            name: longitude
+            type: number
+            required: true
+          - in: query
+            name: k
+            type: integer
+            default: 10
+            description: Maximum number of couriers (up to COURIER_NEARBY_MAX_K)
+          - in: query
+            name: radius_km
+            type: number
+            description: Ignore couriers farther than this
+        responses:
+          200:
+            description: Couriers retrieved successfully, closest first
+          400:
+            description: Invalid coordinates, k or radius
+        """
+        latitude = request.args.get('latitude', None, type=float)
+        longitude = request.args.get('longitude', None, type=float)
+        k = request.args.get('k', 10, type=int)
+        radius_km = request.args.get('radius_km', None, type=float)
+
+        _, errors = COURIER_LOCATION_SCHEMA.validate({'latitude': latitude, 'longitude': longitude})
+        if errors:
+            return error_response('Invalid location', 400, errors)
+
+        couriers, error = CourierService.find_nearby(latitude, longitude, k, radius_km)
+
+        if error:
+            return error_response(error.get('message', 'Failed to find couriers'), 400)
+
+        return success_response(
+            {'couriers': couriers, 'total': len(couriers)},
+            'Couriers retrieved successfully'
+        )
+
+    @staticmethod
+    @handle_exceptions
+    @log_request
+    def ingest_pings():
+        """
+        Report a batch of courier positions
+        ---
+        tags:
+          - Couriers
+        parameters:
+          - in: body
+            name: body
+            required: true
+            schema:
+              type: object
+              required:
+                - pings
+              properties:
+                pings:
+                  type: array
+                  items:
+                    type: object
+                    required:
+                      - courier_id
+                      - latitude
+                      - longitude
+                    properties:
+                      courier_id:
+                        type: integer
+                      latitude:
+                        type: number
+                      longitude:
+                        type: number
+                      recorded_at:
+                        type: number
+                        description: Unix timestamp of the fix (default now)
+        responses:
+          202:
+            description: >
+              Pings accepted for storage; invalid pings, and pings a driver
+              sent for another courier, are reported by index
+          400:
+            description: Body is not a list of pings
+          413:
+            description: More pings than LOCATION_PING_MAX_BATCH
+          503:
+            description: Ping buffer is full, retry after the Retry-After header
+        """
+        data = get_json_body()
+        pings = data.get('pings') if isinstance(data, dict) else None
+        if not isinstance(pings, list):
+            return error_response('Body must be a JSON object with a pings list', 400)
+
+        max_batch = current_app.config.get('LOCATION_PING_MAX_BATCH', 1000)
+        if len(pings) > max_batch:
+            return error_response(f'Too many pings; at most {max_batch} per request', 413)
+
+        report, error = CourierService.ingest_pings(pings, CourierController._allowed_courier_id())
+
+        if error:
+            return CourierController._error(error, 'Failed to ingest pings')
+
+        return success_response(report, f"{report['accepted']} pings accepted", 202)
+
+    @staticmethod
+    @handle_exceptions
+    @log_request
+    def run_dispatch():
+        """
+        Run a dispatch window now
+        ---
+        tags:
+          - Couriers
+        responses:
+          200:
+            description: Waiting shipments matched to free couriers
+        """
+        report, error = dispatcher.run_once()
+
+        if error:
+            return CourierController._error(error, 'Dispatch failed')
+
+        return success_response(report, f"{report['assigned']} of {report['shipments']} shipments assigned")
+
+    @staticmethod
+    def _allowed_courier_id():
+        """
+        Courier the caller may report positions for
+
+        Returns:
+            int: The driver's own courier ID (0 if the account has none), or
+                None for admins, who may report for any courier
+        """
+        if g.get('user_role') == 'admin':
+            return None
+        return CourierService.get_courier_id_for_user(get_jwt_identity()) or 0
+
+    @staticmethod
+    def _error(error, default_message):
+        """Error response for a service error, with Retry-After when the buffer is full"""
+        status_code = error.get('status_code', 400)
+        response, status_code = error_response(error.get('message', default_message), status_code)
+        if status_code == 503:
+            retry_after = math.ceil(current_app.config.get('LOCATION_PING_FLUSH_INTERVAL', 1.0)) or 1
+            response.headers['Retry-After'] = str(retry_after)
+        return response, status_code
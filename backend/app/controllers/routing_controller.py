@@ -0,0 +1,100 @@
+"""
+Routing Controllers
+Handle HTTP requests and responses for routing endpoints
+"""
+from flask import request, current_app
+from app.services.routing_service import RoutingService
+from app.common.utils import success_response, error_response, get_json_body
+from app.common.decorators import handle_exceptions, log_request
+from app.common.validators import COURIER_LOCATION_SCHEMA
+
+
+class RoutingController:
+    """Routing controller for handling HTTP requests"""
+
+    @staticmethod
+    @handle_exceptions
+    @log_request
+    def get_eta():
+        """
+        Fastest route and ETA between two points
+        ---
+        tags:
+          - Routing
+        responses:
+          200:
+            description: Route found
+        """
+        points = {}
+        errors = {}
+        for end in ('from', 'to'):
+            latitude = request.args.get(f'{end}_lat', None, type=float)
+            longitude = request.args.get(f'{end}_lon', None, type=float)
+            _, point_errors = COURIER_LOCATION_SCHEMA.validate({'latitude': latitude, 'longitude': longitude})
+            if point_errors:
+                errors.update({
+                    f"{end}_{'lat' if field == 'latitude' else 'lon'}": messages
+                    for field, messages in point_errors.items()
+                })
+            points[end] = (latitude, longitude)
+        if errors:
+            return error_response('Invalid location', 400, errors)
+
+        route, error = RoutingService.get_route(
+            *points['from'], *points['to'],
+            method=request.args.get('method'),
+            include_path=request.args.get('path', 'false').lower() in ('1', 'true', 'yes')
+        )
+
+        if error:
+            return error_response(error.get('message', 'Failed to find a route'), error.get('status_code', 400))
+
+        return success_response(route, 'Route found')
+
+    @staticmethod
+    @handle_exceptions
+    @log_request
+    def get_matrix():
+        """
+        Travel times between many origins and destinations
+        ---
+        tags:
+          - Routing
+        responses:
+          200:
+            description: Travel time matrix
+        """
+        data = get_json_body()
+        if not isinstance(data, dict):
+            return error_response('Body must be a JSON object', 400)
+
+        max_points = current_app.config.get('ROUTING_MATRIX_MAX_POINTS', 25)
+        points = {}
+        errors = {}
+        for name in ('origins', 'destinations'):
+            values = data.get(name)
+            if not isinstance(values, list) or not values:
+                errors[name] = ['Must be a non-empty list of [latitude, longitude] pairs']
+            elif len(values) > max_points:
+                errors[name] = [f'At most {max_points} points']
+            elif not all(
+                isinstance(point, list) and len(point) == 2 and not COURIER_LOCATION_SCHEMA.validate(
+                    {'latitude': point[0], 'longitude': point[1]}
+                )[1]
+                for point in values
+            ):
+                errors[name] = ['Each point must be a valid [latitude, longitude] pair']
+            else:
+                points[name] = [tuple(point) for point in values]
+        departure = data.get('departure')
+        if departure is not None and (isinstance(departure, bool) or not isinstance(departure, (int, float))):
+            errors['departure'] = ['Must be a Unix timestamp']
+        if errors:
+            return error_response('Validation failed', 400, errors)
+
+        matrix, error = RoutingService.get_matrix(points['origins'], points['destinations'], departure)
+
+        if error:
+            return error_response(error.get('message', 'Failed to compute travel times'), error.get('status_code', 400))
+
+        return success_response(matrix, 'Travel times computed')
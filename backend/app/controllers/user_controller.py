@@ -2,11 +2,17 @@
 User Controllers
 Handle HTTP requests and responses for user endpoints
 """
+import io
+from itertools import islice
 from flask import request, current_app
-from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity
-from app.services.user_service import UserService
-from app.common.utils import success_response, error_response
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity, get_jwt
+from app import login_rate_limiter
+from app.services.user_service import UserService, USER_KEYSET, USER_LIST_FIELDS
+from app.services.token_service import TokenService
+from app.common.utils import success_response, error_response, decode_cursor
+from app.common.importers import FORMATS_BY_MIMETYPE, read_records
 from app.common.decorators import handle_exceptions, log_request
+from app.common.validators import LOGIN_SCHEMA, USER_SCHEMA, USER_UPDATE_SCHEMA, validate_body
 
 
 class UserController:
@@ -15,7 +21,8 @@ class UserController:
     @staticmethod
     @handle_exceptions
     @log_request
-    def create_user():
+    @validate_body(USER_SCHEMA)
+    def create_user(data):
         """
         Create a new user
         ---
@@ -57,15 +64,15 @@ class UserController:
             description: User created successfully
           400:
             description: Invalid input data
+          503:
+            description: Password hashing queue is full, retry later
         """
-        data = request.get_json()
-        
         user, error = UserService.create_user(data)
         
         if error:
             return error_response(
                 error.get('message', 'Failed to create user'),
-                400,
+                error.get('status_code', 400),
                 error.get('errors')
             )
         
@@ -75,6 +82,62 @@ class UserController:
             201
         )
     
+    @staticmethod
+    @handle_exceptions
+    @log_request
+    def bulk_create_users():
+        """
+        Create many users in one request
+        ---
+        tags:
+          - Users
+        consumes:
+          - application/json
+          - application/x-ndjson
+          - text/csv
+        parameters:
+          - in: body
+            name: body
+            required: true
+            description: >
+              A JSON list of users (or {"users": [...]}), JSON Lines, or CSV with a
+              header row. Fields are the same as for registration.
+            schema:
+              type: array
+              items:
+                type: object
+        responses:
+          200:
+            description: Import finished; see per-row results
+          400:
+            description: Body could not be parsed
+          413:
+            description: More rows than BULK_IMPORT_MAX_ROWS
+          503:
+            description: Another bulk import is running
+        """
+        fmt = FORMATS_BY_MIMETYPE.get(request.mimetype, 'json')
+        max_rows = current_app.config.get('BULK_IMPORT_MAX_ROWS', 5000)
+        
+        try:
+            records = read_records(io.StringIO(request.get_data(as_text=True)), fmt)
+            records = list(islice(records, max_rows + 1))
+        except ValueError as e:
+            return error_response('Invalid import body', 400, {'error': str(e)})
+        
+        if len(records) > max_rows:
+            return error_response(f'Too many rows; at most {max_rows} per request', 413)
+        
+        report, error = UserService.bulk_create_users(records)
+        
+        if error:
+            return error_response(error.get('message', 'Bulk import failed'), error.get('status_code', 500))
+        
+        return success_response(
+            report,
+            f"Bulk import finished: {report['created']} created, {report['failed']} failed"
+        )
+    
     @staticmethod
     @handle_exceptions
     @log_request
@@ -128,13 +191,25 @@ class UserController:
             type: string
             description: Filter by role
             enum: [user, admin, driver]
+          - in: query
+            name: cursor
+            type: string
+            description: Use cursor pagination; pass empty for the first page, then next_cursor
+          - in: query
+            name: fields
+            type: string
+            description: Comma-separated fields to return, e.g. user_id,name,email
         responses:
           200:
             description: Users retrieved successfully
+          400:
+            description: Invalid cursor or fields
         """
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         role = request.args.get('role', None, type=str)
+        cursor = request.args.get('cursor', None, type=str)
+        fields = request.args.get('fields', None, type=str)
         
         # Validate pagination parameters
         if page < 1:
@@ -142,7 +217,29 @@ class UserController:
         if per_page < 1 or per_page > 100:
             per_page = 20
         
-        result = UserService.get_all_users(page=page, per_page=per_page, role=role)
+        if cursor:
+            try:
+                decode_cursor(cursor, USER_KEYSET)
+            except ValueError:
+                return error_response('Invalid cursor', 400)
+        
+        if fields:
+            fields = list(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+            invalid_fields = [field for field in fields if field not in USER_LIST_FIELDS]
+            if invalid_fields:
+                return error_response(
+                    'Invalid fields',
+                    400,
+                    {'invalid_fields': invalid_fields, 'allowed_fields': list(USER_LIST_FIELDS)}
+                )
+        
+        result = UserService.get_all_users(
+            page=page,
+            per_page=per_page,
+            role=role,
+            cursor=cursor,
+            fields=fields or None
+        )
         
         if result is None:
             return error_response('Failed to retrieve users', 500)
@@ -152,7 +249,8 @@ class UserController:
     @staticmethod
     @handle_exceptions
     @log_request
-    def update_user(user_id):
+    @validate_body(USER_UPDATE_SCHEMA)
+    def update_user(user_id, data):
         """
         Update user information
         ---
@@ -191,12 +289,10 @@ class UserController:
           400:
             description: Invalid input data
         """
-        data = request.get_json()
-        
         user, error = UserService.update_user(user_id, data)
         
         if error:
-            status_code = 404 if error.get('message') == 'User not found' else 400
+            status_code = 404 if error.get('message') == 'User not found' else error.get('status_code', 400)
             return error_response(
                 error.get('message', 'Failed to update user'),
                 status_code,
@@ -237,7 +333,8 @@ class UserController:
     @staticmethod
     @handle_exceptions
     @log_request
-    def login():
+    @validate_body(LOGIN_SCHEMA, 'Email and password are required')
+    def login(data):
         """
         User login
         ---
@@ -264,21 +361,35 @@ class UserController:
             description: Login successful
           401:
             description: Invalid credentials
+          429:
+            description: Too many login attempts, retry after the Retry-After header
+          503:
+            description: Password hashing queue is full, retry later
         """
-        data = request.get_json()
-        
-        if not data or not data.get('email') or not data.get('password'):
-            return error_response('Email and password are required', 400)
+        # Throttle before any database or bcrypt work is done
+        retry_after = login_rate_limiter.check(request.remote_addr, data['email'])
+        if retry_after:
+            response, status_code = error_response('Too many login attempts, please try again later', 429)
+            response.headers['Retry-After'] = str(retry_after)
+            return response, status_code
         
         user, error = UserService.authenticate_user(data['email'], data['password'])
         
         if error:
-            return error_response(error.get('message', 'Authentication failed'), 401)
+            status_code = error.get('status_code', 401)
+            if status_code == 401:
+                login_rate_limiter.record_failure(request.remote_addr, data['email'])
+            return error_response(
+                error.get('message', 'Authentication failed'),
+                status_code
+            )
+        
+        login_rate_limiter.reset(request.remote_addr, data['email'])
         
         # Create JWT tokens
         access_token = create_access_token(
             identity=user.user_id,
-            additional_claims={'role': user.role, 'email': user.email}
+            additional_claims=TokenService.build_claims(user)
         )
         refresh_token = create_refresh_token(identity=user.user_id)
         
@@ -288,6 +399,64 @@ class UserController:
             'refresh_token': refresh_token
         }, 'Login successful')
     
+    @staticmethod
+    @handle_exceptions
+    @log_request
+    def refresh_token():
+        """
+        Exchange a refresh token for a new access token
+        ---
+        tags:
+          - Authentication
+        security:
+          - Bearer: []
+        responses:
+          200:
+            description: Tokens refreshed
+          401:
+            description: Refresh token missing, expired or revoked
+        """
+        user = UserService.get_user_by_id(get_jwt_identity())
+        
+        if not user:
+            return error_response('User not found or inactive', 401)
+        
+        # Rotate: the presented refresh token cannot be used again
+        TokenService.revoke(get_jwt())
+        
+        access_token = create_access_token(
+            identity=user.user_id,
+            additional_claims=TokenService.build_claims(user)
+        )
+        refresh_token = create_refresh_token(identity=user.user_id)
+        
+        return success_response({
+            'access_token': access_token,
+            'refresh_token': refresh_token
+        }, 'Token refreshed successfully')
+    
+    @staticmethod
+    @handle_exceptions
+    @log_request
+    def logout():
+        """
+        Revoke the presented access or refresh token
+        ---
+        tags:
+          - Authentication
+        security:
+          - Bearer: []
+        responses:
+          200:
+            description: Token revoked
+          401:
+            description: Unauthorized
+        """
+        claims = get_jwt()
+        TokenService.revoke(claims)
+        
+        return success_response(None, f"{claims['type'].capitalize()} token revoked")
+    
     @staticmethod
     @handle_exceptions
     @log_request
@@ -305,6 +474,11 @@ class UserController:
           401:
             description: Unauthorized
         """
+        if TokenService.snapshots_enabled():
+            snapshot = TokenService.get_snapshot(get_jwt())
+            if snapshot is not None:
+                return success_response(snapshot, 'Current user retrieved successfully')
+        
         user_id = get_jwt_identity()
         user = UserService.get_user_by_id(user_id)
         
@@ -1,9 +1,112 @@
 """
 Database utilities and base model
 """
+from contextlib import contextmanager
 from datetime import datetime
+from functools import wraps
+from flask import current_app
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 from app import db
 
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING ... RETURNING
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert
+}
+
+# Session.info key holding the after-commit callbacks of the open unit of work
+_AFTER_COMMIT = 'unit_of_work_after_commit'
+
+
+def in_transaction():
+    """
+    Check whether a unit of work is open on the current session
+    
+    Returns:
+        bool: True inside transaction()
+    """
+    return _AFTER_COMMIT in db.session().info
+
+
+def after_commit(callback):
+    """
+    Run a callback once the current unit of work commits
+    
+    Use for side effects that must not happen if the write is rolled back
+    (cache eviction, invalidation). Outside a unit of work it runs immediately.
+    
+    Args:
+        callback (callable): Called with no arguments
+    """
+    callbacks = db.session().info.get(_AFTER_COMMIT)
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+
+@contextmanager
+def transaction():
+    """
+    Unit of work: group writes into a single commit
+    
+    Inside the block, save(), update() and delete() only flush; the outermost
+    block commits once on exit, or rolls everything back if it raises. A
+    nested block runs in a savepoint, so its failure can be caught without
+    losing the outer work. after_commit callbacks run after the final commit
+    and are dropped with a rolled-back savepoint; as the data is committed by
+    then, a failing callback is logged and the others still run.
+    
+    Yields:
+        Session: The current database session
+    """
+    session = db.session()
+    callbacks = session.info.get(_AFTER_COMMIT)
+    
+    if callbacks is not None:
+        pending = len(callbacks)
+        try:
+            with session.begin_nested():
+                yield session
+        except BaseException:
+            del callbacks[pending:]
+            raise
+        return
+    
+    callbacks = session.info[_AFTER_COMMIT] = []
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.info.pop(_AFTER_COMMIT, None)
+    
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            current_app.logger.error(f'After-commit callback failed: {str(e)}')
+
+
+def transactional(f):
+    """
+    Decorator running a function inside transaction()
+    
+    Returns:
+        function: Decorated function
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with transaction():
+            return f(*args, **kwargs)
+    return decorated_function
+
 
 class BaseModel(db.Model):
     """
@@ -14,24 +117,120 @@ class BaseModel(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # RecordCache holding rows of this model, if any
+    cache = None
+    
+    def cache_keys(self):
+        """
+        Keys under which this instance may be cached
+        
+        Called before commit so models can include values that are about
+        to change (e.g. a previous email).
+        
+        Returns:
+            list: Cache keys to evict when the instance is written
+        """
+        return []
+    
+    def _evict_cached(self, keys):
+        """Evict cache entries after a successful write"""
+        if self.cache is not None and keys:
+            self.cache.delete_many(keys)
+    
+    def _write(self, stale_keys):
+        """Commit now, or flush and leave the commit to the open unit of work"""
+        if in_transaction():
+            db.session.flush()
+            after_commit(lambda: self._evict_cached(stale_keys))
+        else:
+            db.session.commit()
+            self._evict_cached(stale_keys)
+    
+    @staticmethod
+    def _rollback():
+        """Roll back a failed write unless a unit of work owns the transaction"""
+        if not in_transaction():
+            db.session.rollback()
+    
     def save(self):
         """Save instance to database"""
         try:
             db.session.add(self)
-            db.session.commit()
+            stale_keys = self.cache_keys()
+            self._write(stale_keys)
             return True
         except Exception as e:
-            db.session.rollback()
+            self._rollback()
+            raise e
+    
+    def save_if_absent(self, conflict_columns):
+        """
+        Insert instance unless a row with the same unique key already exists
+        
+        Relies on the unique index instead of checking for the row first: one
+        INSERT ... ON CONFLICT DO NOTHING RETURNING round trip on PostgreSQL
+        and SQLite, a flush in its own transaction() elsewhere. The returned instance
+        is loaded from RETURNING, so reading it after the commit does not
+        query again.
+        
+        Args:
+            conflict_columns (list): Columns of the unique index, e.g. ['email']
+        
+        Returns:
+            BaseModel: The stored instance, or None if the key was taken
+        """
+        insert = UPSERT_INSERTS.get(db.session.get_bind(mapper=inspect(type(self))).dialect.name)
+        if insert is None:
+            try:
+                with transaction():
+                    db.session.add(self)
+                    db.session.flush()
+                return self
+            except IntegrityError:
+                return None
+        
+        values = {
+            column.key: getattr(self, column.key)
+            for column in self.__table__.columns
+            if column.key in self.__dict__
+        }
+        statement = (
+            insert(type(self))
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=conflict_columns)
+            .returning(*self.__table__.columns)
+        )
+        try:
+            row = db.session.execute(statement).first()
+            if not in_transaction():
+                db.session.commit()
+        except Exception as e:
+            self._rollback()
             raise e
+        
+        if row is None:
+            return None
+        values = dict(row._mapping)
+        instance = type(self)(**values)
+        make_transient_to_detached(instance)
+        instance = db.session.merge(instance, load=False)
+        if in_transaction():
+            # The unit of work's commit expires the instance; put the RETURNING values back
+            def restore():
+                for key, value in values.items():
+                    set_committed_value(instance, key, value)
+            after_commit(restore)
+        return instance
     
     def delete(self):
         """Delete instance from database"""
         try:
+            stale_keys = self.cache_keys()
             db.session.delete(self)
-            db.session.commit()
+            self._write(stale_keys)
             return True
         except Exception as e:
-            db.session.rollback()
+            self._rollback()
             raise e
     
     def update(self, **kwargs):
@@ -41,10 +240,11 @@ class BaseModel(db.Model):
                 if hasattr(self, key):
                     setattr(self, key, value)
             self.updated_at = datetime.utcnow()
-            db.session.commit()
+            stale_keys = self.cache_keys()
+            self._write(stale_keys)
             return True
         except Exception as e:
-            db.session.rollback()
+            self._rollback()
             raise e
     
     def to_dict(self):
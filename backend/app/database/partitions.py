@@ -0,0 +1,118 @@
+"""
+Daily range partitions
+Creates and drops per-day partitions of PostgreSQL tables partitioned on a timestamp
+"""
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app import db
+from app.database.db import after_commit
+
+# Partitions known to exist, so steady-state writes issue no DDL
+_known_partitions = set()
+
+# SQLSTATEs raised when another process creates the same partition first:
+# duplicate_table, or unique_violation on the catalog when both race past IF NOT EXISTS
+DUPLICATE_PARTITION_CODES = ('42P07', '23505')
+
+
+def partition_name(table_name, day):
+    """
+    Name of a table's partition for one day
+
+    Args:
+        table_name (str): Partitioned table
+        day (date): Day held by the partition
+
+    Returns:
+        str: e.g. location_ping_20240131
+    """
+    return f'{table_name}_{day:%Y%m%d}'
+
+
+def supports_partitions(table):
+    """
+    Check whether a table is stored as a partitioned table
+
+    Args:
+        table: SQLAlchemy Table
+
+    Returns:
+        bool: True on PostgreSQL, where the table is declared PARTITION BY RANGE
+    """
+    return db.session.get_bind(clause=table).dialect.name == 'postgresql'
+
+
+def ensure_daily_partitions(table, days):
+    """
+    Create the day partitions of a table that do not exist yet
+
+    Each CREATE runs in a savepoint, so losing the race to another worker
+    creating the same partition does not abort the caller's transaction.
+
+    Args:
+        table: SQLAlchemy Table declared with postgresql_partition_by
+        days (iterable): Days (date) that need a partition
+
+    Returns:
+        list: Names of the partitions created or already present
+    """
+    names = []
+    for day in sorted(set(days)):
+        name = partition_name(table.name, day)
+        names.append(name)
+        if name in _known_partitions:
+            continue
+        start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+        try:
+            with db.session.begin_nested():
+                db.session.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table.name}" '
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{(start + timedelta(days=1)).isoformat()}')"
+                ))
+        except DBAPIError as e:
+            if getattr(e.orig, 'pgcode', None) not in DUPLICATE_PARTITION_CODES:
+                raise
+        after_commit(lambda name=name: _known_partitions.add(name))
+    return names
+
+
+def drop_partitions_before(table, cutoff):
+    """
+    Drop the day partitions of a table that end on or before a day
+
+    Args:
+        table: SQLAlchemy Table declared with postgresql_partition_by
+        cutoff (date): First day to keep
+
+    Returns:
+        list: Names of the dropped partitions
+    """
+    prefix = f'{table.name}_'
+    children = db.session.execute(text(
+        'SELECT child.relname FROM pg_inherits '
+        'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+        'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+        'WHERE parent.relname = :table'
+    ), {'table': table.name}).scalars()
+
+    dropped = []
+    for name in children:
+        suffix = name[len(prefix):] if name.startswith(prefix) else ''
+        try:
+            day = datetime.strptime(suffix, '%Y%m%d').date()
+        except ValueError:
+            continue
+        if day < cutoff:
+            db.session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+            _known_partitions.discard(name)
+            dropped.append(name)
+    return dropped
+
+
+def today_utc():
+    """Current UTC date"""
+    return datetime.now(timezone.utc).date()
+
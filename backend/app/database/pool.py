@@ -0,0 +1,152 @@
+"""
+Connection pool instrumentation
+Checkout latency, overflow and timeout tracking plus pool warm-up
+"""
+import logging
+import threading
+import time
+import weakref
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMonitor:
+    """
+    Collects connection pool metrics
+
+    Engines built from SQLALCHEMY_ENGINE_OPTIONS use InstrumentedQueuePool,
+    which reports every checkout here. init_app must run before db.init_app so
+    the pool class is in place when Flask-SQLAlchemy creates the engines.
+
+    Config:
+        DB_POOL_SLOW_CHECKOUT_MS: Checkout wait that is logged as a warning
+        DB_POOL_WARMUP: Connections to open in warm_up() before serving traffic
+    """
+
+    def __init__(self, app=None):
+        self.slow_checkout = 0.1
+        self._pools = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Install the instrumented pool class for server databases
+
+        Args:
+            app: Flask application instance
+        """
+        self.slow_checkout = app.config.get('DB_POOL_SLOW_CHECKOUT_MS', 100) / 1000
+        options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        # SQLite picks its own pool classes and ignores server pool sizing
+        if uri.startswith('sqlite'):
+            options = {key: value for key, value in options.items() if key in ('pool_pre_ping', 'pool_recycle')}
+        else:
+            options.setdefault('poolclass', InstrumentedQueuePool)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+        app.extensions['pool_monitor'] = self
+
+    def warm_up(self, app, engine):
+        """
+        Open DB_POOL_WARMUP connections so the first requests do not pay for connecting
+
+        Failures are logged, not raised, so the app still starts when the
+        database is briefly unavailable.
+
+        Args:
+            app: Flask application instance
+            engine: SQLAlchemy engine to warm up
+        """
+        count = app.config.get('DB_POOL_WARMUP', 0)
+        if count <= 0:
+            return
+
+        connections = []
+        started = time.perf_counter()
+        try:
+            for _ in range(count):
+                connections.append(engine.connect())
+        except Exception as e:
+            app.logger.warning(f'Connection pool warm-up stopped after {len(connections)} connections: {str(e)}')
+        else:
+            app.logger.info(
+                f'Connection pool warmed up with {len(connections)} connections '
+                f'in {(time.perf_counter() - started) * 1000:.0f}ms'
+            )
+        finally:
+            for connection in connections:
+                connection.close()
+
+    def get_stats(self):
+        """
+        Get pool metrics
+
+        Returns:
+            dict: Checkout counters, wait times and current pool usage
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_checkout_wait'] = stats['checkout_wait_total'] / (stats['checkouts'] or 1)
+        pools = list(self._pools)
+        stats['checked_out'] = sum(pool.checkedout() for pool in pools)
+        stats['overflow_in_use'] = sum(max(pool.overflow(), 0) for pool in pools)
+        stats['pool_size'] = sum(pool.size() for pool in pools)
+        return stats
+
+    def register_pool(self, pool):
+        """Track a pool for the usage gauges"""
+        self._pools.add(pool)
+
+    def record_checkout(self, wait):
+        """Record a successful checkout and how long it waited"""
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['checkout_wait_total'] += wait
+            self._stats['checkout_wait_max'] = max(self._stats['checkout_wait_max'], wait)
+            if wait >= self.slow_checkout:
+                self._stats['slow_checkouts'] += 1
+        if wait >= self.slow_checkout:
+            logger.warning(f'Slow connection checkout: waited {wait * 1000:.0f}ms')
+
+    def record_timeout(self, wait):
+        """Record a checkout that gave up after pool_timeout"""
+        with self._lock:
+            self._stats['timeouts'] += 1
+        logger.error(f'Connection pool checkout timed out after {wait * 1000:.0f}ms')
+
+    def _reset_stats(self):
+        with self._lock:
+            self._stats = {
+                'checkouts': 0,
+                'checkout_wait_total': 0.0,
+                'checkout_wait_max': 0.0,
+                'slow_checkouts': 0,
+                'timeouts': 0
+            }
+
+
+pool_monitor = PoolMonitor()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports checkout waits and timeouts to pool_monitor"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        pool_monitor.register_pool(self)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_monitor.record_timeout(time.perf_counter() - started)
+            raise
+        pool_monitor.record_checkout(time.perf_counter() - started)
+        return connection
@@ -1,5 +1,5 @@
 """
 Logger package initialization
 """
-from app.logger.logger_config import setup_logger
+from app.logger.logger_config import setup_logger, stop_queue_listener, get_log_stats
 
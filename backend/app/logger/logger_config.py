@@ -1,12 +1,36 @@
 """
 Logging configuration for QuickDrop Backend
 """
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 
 
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that drops records instead of blocking when the queue is full
+    
+    Args:
+        log_queue (queue.Queue): Bounded queue drained by a QueueListener
+    """
+    
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
 def setup_logger(app):
     """
     Configure logging for the application
@@ -37,6 +61,8 @@ def setup_logger(app):
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     
+    handlers = []
+    
     # File handler for application logs (rotating)
     file_handler = RotatingFileHandler(
         app.config['LOG_FILE'],
@@ -45,7 +71,7 @@ def setup_logger(app):
     )
     file_handler.setLevel(log_level)
     file_handler.setFormatter(detailed_formatter)
-    app.logger.addHandler(file_handler)
+    handlers.append(file_handler)
     
     # File handler for error logs
     error_log_file = os.path.join(log_dir, 'error.log')
@@ -56,14 +82,37 @@ def setup_logger(app):
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(detailed_formatter)
-    app.logger.addHandler(error_handler)
+    handlers.append(error_handler)
     
     # Console handler for development
     if app.config['DEBUG']:
         console_handler = logging.StreamHandler()
         console_handler.setLevel(log_level)
         console_handler.setFormatter(simple_formatter)
-        app.logger.addHandler(console_handler)
+        handlers.append(console_handler)
+    
+    # Access log: app.access records, written as JSON lines to access.log in json mode
+    access_logger = app.logger.getChild('access')
+    app.extensions['access_logger'] = access_logger
+    if app.config.get('ACCESS_LOG_FORMAT') == 'json':
+        access_name = access_logger.name
+        for handler in handlers:
+            handler.addFilter(lambda record: not record.name.startswith(access_name))
+        access_handler = RotatingFileHandler(
+            os.path.join(log_dir, 'access.log'),
+            maxBytes=10485760,  # 10MB
+            backupCount=10
+        )
+        access_handler.setLevel(logging.INFO)
+        access_handler.setFormatter(logging.Formatter('%(message)s'))
+        access_handler.addFilter(logging.Filter(access_name))
+        handlers.append(access_handler)
+    
+    if app.config.get('LOG_QUEUE_ENABLED'):
+        _start_queue_listener(app, handlers)
+    else:
+        for handler in handlers:
+            app.logger.addHandler(handler)
     
     # Log application startup
     app.logger.info('='*80)
@@ -73,6 +122,70 @@ def setup_logger(app):
     app.logger.info('='*80)
 
 
+def _start_queue_listener(app, handlers):
+    """
+    Move handler I/O onto a background listener thread
+    
+    The request thread only puts records on a bounded queue; file writes and
+    rotation happen on the listener. When the queue is full records are dropped
+    and counted rather than blocking the request.
+    
+    Args:
+        app: Flask application instance
+        handlers (list): Handlers to run on the listener thread
+    """
+    stop_queue_listener(app)
+    
+    log_queue = queue.Queue(maxsize=app.config.get('LOG_QUEUE_SIZE', 10000))
+    queue_handler = DroppingQueueHandler(log_queue)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    
+    app.logger.addHandler(queue_handler)
+    app.extensions['log_listener'] = listener
+    app.extensions['log_queue_handler'] = queue_handler
+    atexit.register(stop_queue_listener, app)
+
+
+def stop_queue_listener(app):
+    """
+    Flush queued records and stop the listener thread
+    
+    Safe to call more than once; it runs automatically at interpreter exit.
+    
+    Args:
+        app: Flask application instance
+    """
+    listener = app.extensions.pop('log_listener', None)
+    if listener is None:
+        return
+    # stop() enqueues a sentinel and waits until everything before it is handled
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def get_log_stats(app):
+    """
+    Get queued logging metrics
+    
+    Args:
+        app: Flask application instance
+    
+    Returns:
+        dict: Queue size, capacity and dropped record count
+    """
+    queue_handler = app.extensions.get('log_queue_handler')
+    if queue_handler is None:
+        return {'queued': False}
+    return {
+        'queued': True,
+        'queue_size': queue_handler.queue.qsize(),
+        'queue_capacity': queue_handler.queue.maxsize,
+        'dropped': queue_handler.dropped
+    }
+
+
 def get_logger(name):
     """
     Get a logger instance with the specified name
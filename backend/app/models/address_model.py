@@ -0,0 +1,34 @@
+"""
+Address Model
+"""
+from datetime import datetime
+from app import db
+
+
+class Address(db.Model):
+    """
+    Canonical address with coordinates, used as order pickup and dropoff points
+
+    Fields:
+        address_id: Primary key
+        user_id: Owner of the address
+        district: District name
+        city: City name
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        geohash: Geohash of the coordinates, for prefix lookups
+        created_at: When the address was added
+    """
+    __tablename__ = 'address'
+
+    address_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, nullable=True, index=True)
+    district = db.Column(db.String(100), nullable=True)
+    city = db.Column(db.String(100), nullable=True)
+    latitude = db.Column(db.Numeric(9, 6), nullable=True)
+    longitude = db.Column(db.Numeric(9, 6), nullable=True)
+    geohash = db.Column(db.String(12), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<Address {self.address_id}>'
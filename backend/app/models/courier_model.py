@@ -0,0 +1,40 @@
+"""
+Courier Model
+"""
+from datetime import datetime
+from app import db
+
+
+class Courier(db.Model):
+    """
+    Delivery courier, linked to the driver account that reports its position
+
+    Fields:
+        courier_id: Primary key
+        user_id: Driver account of the courier; drivers may only report this courier's position
+        name: Courier name
+        vehicle_plate: Vehicle registration plate
+        phone: Contact phone (unique)
+        status: active, inactive, banned, offshift
+        latitude: Last stored latitude in degrees
+        longitude: Last stored longitude in degrees
+        geohash: Geohash of the last stored position
+        location_updated_at: When the stored position was reported
+        created_at: When the courier was added
+    """
+    __tablename__ = 'courier'
+
+    courier_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, nullable=True, unique=True)
+    name = db.Column(db.String(50), nullable=False)
+    vehicle_plate = db.Column(db.String(15), nullable=True)
+    phone = db.Column(db.String(25), nullable=True, unique=True)
+    status = db.Column(db.String(50), default='inactive', server_default='inactive', nullable=False)
+    latitude = db.Column(db.Numeric(9, 6), nullable=True)
+    longitude = db.Column(db.Numeric(9, 6), nullable=True)
+    geohash = db.Column(db.String(12), nullable=True)
+    location_updated_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<Courier {self.courier_id}>'
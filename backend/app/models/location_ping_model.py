@@ -0,0 +1,34 @@
+"""
+Location Ping Model
+"""
+from app import db
+
+
+class LocationPing(db.Model):
+    """
+    One reported courier position, kept for tracking history and audits
+
+    On PostgreSQL the table is range-partitioned by day on recorded_at (see
+    app/database/partitions.py), so old days are dropped as whole partitions
+    and writes only touch the current day's indexes. Rows are written in
+    batches by the location ping buffer; the primary key makes retried
+    batches idempotent.
+
+    Fields:
+        courier_id: Courier that reported the position
+        recorded_at: When the device observed the position (UTC)
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        geohash: Geohash of the position, for prefix lookups
+    """
+    __tablename__ = 'location_ping'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (recorded_at)'}
+
+    courier_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    recorded_at = db.Column(db.DateTime(timezone=True), primary_key=True)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    geohash = db.Column(db.String(12), nullable=False)
+
+    def __repr__(self):
+        return f'<LocationPing {self.courier_id} @ {self.recorded_at}>'
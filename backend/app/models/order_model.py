@@ -0,0 +1,36 @@
+"""
+Order Model
+"""
+from datetime import datetime
+from app import db
+
+
+class Order(db.Model):
+    """
+    Customer order, delivered from its pickup address to its dropoff address
+
+    Fields:
+        order_id: Primary key
+        user_id: Customer who placed the order
+        pickup_address_id: Address the order is collected from
+        dropoff_address_id: Address the order is delivered to
+        status: created, assigned, picked_up, delivered, cancelled
+        total_amount: Order total
+        created_at: When the order was placed
+    """
+    __tablename__ = 'order'
+    __table_args__ = (
+        # Backs reads of recent orders (ETA cache warm-up)
+        db.Index('ix_order_created_at', 'created_at'),
+    )
+
+    order_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    pickup_address_id = db.Column(db.Integer, nullable=True)
+    dropoff_address_id = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(50), default='created', server_default='created', nullable=False)
+    total_amount = db.Column(db.Numeric(10, 2), default=0, server_default='0', nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<Order {self.order_id} {self.status}>'
@@ -0,0 +1,45 @@
+"""
+Shipment Model
+"""
+from app import db
+
+# Shipments holding their courier
+ACTIVE_SHIPMENT_STATUSES = ('assigned', 'picked_up', 'in_transit')
+
+
+class Shipment(db.Model):
+    """
+    Delivery leg of an order, assigned to a courier by the dispatcher
+
+    The pickup point defaults to the order's pickup address; set
+    pickup_latitude/pickup_longitude to collect from somewhere else.
+
+    Fields:
+        shipment_id: Primary key
+        order_id: Order being delivered
+        courier_id: Assigned courier, if any
+        status: unassigned, assigned, picked_up, in_transit, delivered, failed
+        pickup_latitude: Pickup latitude in degrees (default: the order's pickup address)
+        pickup_longitude: Pickup longitude in degrees (default: the order's pickup address)
+        assigned_at: When the dispatcher assigned the courier
+        picked_at: When the courier picked the order up
+        delivered_at: When the order was delivered
+    """
+    __tablename__ = 'shipment'
+    __table_args__ = (
+        # Backs the dispatcher's scan of waiting shipments, oldest first
+        db.Index('ix_shipment_status_shipment_id', 'status', 'shipment_id'),
+    )
+
+    shipment_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    order_id = db.Column(db.Integer, nullable=False)
+    courier_id = db.Column(db.Integer, nullable=True, index=True)
+    status = db.Column(db.String(50), default='unassigned', server_default='unassigned', nullable=False)
+    pickup_latitude = db.Column(db.Float, nullable=True)
+    pickup_longitude = db.Column(db.Float, nullable=True)
+    assigned_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    picked_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    delivered_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f'<Shipment {self.shipment_id} {self.status}>'
@@ -1,9 +1,12 @@
 """
 User Model
 """
-import bcrypt
-from app import db
+from datetime import datetime
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from app import db, password_hasher, user_cache
 from app.database.db import BaseModel
+from app.common.metrics import timed
 
 
 class User(BaseModel):
@@ -18,8 +21,13 @@ class User(BaseModel):
         password: Hashed password
         role: User role (user, admin, driver)
         address: User's address
+        token_version: Version stamped into JWT user snapshots
     """
     __tablename__ = 'users'
+    __table_args__ = (
+        # Backs cursor pagination ordered by (created_at, user_id)
+        db.Index('ix_users_created_at_user_id', 'created_at', 'user_id'),
+    )
     
     user_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
@@ -29,18 +37,36 @@ class User(BaseModel):
     role = db.Column(db.String(20), default='user', nullable=False)
     address = db.Column(db.Text, nullable=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # Bumped on every update so claim snapshots issued before it are ignored
+    # (existing databases: database/008_add_users_token_version.sql)
+    token_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
+    cache = user_cache
+    
+    # Columns clients may read, in to_dict order
+    PUBLIC_FIELDS = (
+        'user_id', 'name', 'phone', 'email', 'role',
+        'address', 'is_active', 'created_at', 'updated_at'
+    )
+    
+    # Columns never written to the user cache, which may be shared (Redis);
+    # they load from the database on first access instead
+    UNCACHED_FIELDS = ('password_hash',)
     
     def set_password(self, password):
         """
         Hash and set user password using bcrypt
 
+        The hash is computed on the password hasher's worker pool.
+
         Args:
             password (str): Plain text password
+
+        Raises:
+            PasswordHasherBusy: If the hashing queue is full
         """
-        # Encode password to bytes and hash with bcrypt
-        password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password_bytes, salt).decode('utf-8')
+        with timed('bcrypt'):
+            self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """
@@ -51,16 +77,29 @@ class User(BaseModel):
 
         Returns:
             bool: True if password matches, False otherwise
+
+        Raises:
+            PasswordHasherBusy: If the hashing queue is full
+        """
+        with timed('bcrypt'):
+            return password_hasher.verify(password, self.password_hash)
+    
+    def password_needs_rehash(self):
         """
-        # Encode password and hash to bytes for comparison
-        password_bytes = password.encode('utf-8')
-        password_hash_bytes = self.password_hash.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, password_hash_bytes)
+        Check whether the stored hash uses a different cost than BCRYPT_ROUNDS
+
+        Returns:
+            bool: True if the password should be hashed again on next login
+        """
+        return password_hasher.needs_rehash(self.password_hash)
     
     def to_dict(self, include_sensitive=False):
         """
         Convert user object to dictionary
         
+        Timestamps are left as datetime objects; the app's JSON provider
+        serializes them as ISO 8601.
+        
         Args:
             include_sensitive (bool): Whether to include sensitive fields
         
@@ -75,8 +114,8 @@ class User(BaseModel):
             'role': self.role,
             'address': self.address,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
         
         if include_sensitive:
@@ -84,6 +123,56 @@ class User(BaseModel):
         
         return data
     
+    def cache_keys(self):
+        """
+        Keys under which this user may be cached, including a previous email
+        
+        Returns:
+            list: Cache keys
+        """
+        keys = []
+        if self.user_id is not None:
+            keys.append(f'id:{self.user_id}')
+        emails = {self.email, *inspect(self).attrs.email.history.deleted}
+        keys.extend(f'email:{email}' for email in emails if email)
+        return keys
+    
+    def to_cache(self):
+        """
+        Convert user object to a JSON-compatible record for the user cache
+        
+        Returns:
+            dict: Column values, without UNCACHED_FIELDS
+        """
+        return {
+            column.name: value.isoformat() if isinstance(value, datetime) else value
+            for column in self.__table__.columns
+            if column.name not in self.UNCACHED_FIELDS
+            for value in (getattr(self, column.name),)
+        }
+    
+    @classmethod
+    def from_cache(cls, data):
+        """
+        Rebuild a session-bound user from a cached record without querying
+        
+        UNCACHED_FIELDS are left unloaded (and dropped from records cached
+        before they were excluded), so reading one queries the database.
+        
+        Args:
+            data (dict): Record produced by to_cache
+        
+        Returns:
+            User: Persistent user instance
+        """
+        values = {key: value for key, value in data.items() if key not in cls.UNCACHED_FIELDS}
+        for field in ('created_at', 'updated_at'):
+            if values.get(field):
+                values[field] = datetime.fromisoformat(values[field])
+        user = cls(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
     def __repr__(self):
         return f'<User {self.email}>'
 
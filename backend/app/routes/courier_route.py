@@ -0,0 +1,279 @@
+"""
+Courier Routes
+Define URL patterns for courier endpoints
+"""
+from flask import Blueprint
+from flask_jwt_extended import jwt_required
+from app.controllers.courier_controller import CourierController
+from app.common.decorators import role_required
+
+# Create blueprint
+courier_bp = Blueprint('courier', __name__)
+
+
+@courier_bp.route('/<int:courier_id>/location', methods=['PUT'])
+@jwt_required()
+@role_required(['driver', 'admin'])
+def update_location(courier_id):
+    """
+    Report a courier's current position (drivers for their own courier, admins for any)
+    ---
+    tags:
+      - Couriers
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: courier_id
+        required: true
+        type: integer
+        description: Courier ID
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - latitude
+            - longitude
+          properties:
+            latitude:
+              type: number
+              example: -1.9441
+            longitude:
+              type: number
+              example: 30.0619
+    responses:
+      200:
+        description: Location updated successfully
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            message:
+              type: string
+            data:
+              type: object
+              properties:
+                courier_id:
+                  type: integer
+                latitude:
+                  type: number
+                longitude:
+                  type: number
+                geohash:
+                  type: string
+      400:
+        description: Invalid coordinates
+      403:
+        description: Driver or admin role required, or a driver reporting another courier
+      503:
+        description: Ping buffer is full, retry after the Retry-After header
+    """
+    return CourierController.update_location(courier_id)
+
+
+@courier_bp.route('/pings', methods=['POST'])
+@jwt_required()
+@role_required(['driver', 'admin'])
+def ingest_pings():
+    """
+    Report a batch of courier positions (drivers for their own courier, admins for any)
+    ---
+    tags:
+      - Couriers
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        description: >
+          Up to LOCATION_PING_MAX_BATCH pings. Each courier's newest ping
+          updates its live position at once; all pings are stored in the
+          background.
+        schema:
+          type: object
+          required:
+            - pings
+          properties:
+            pings:
+              type: array
+              items:
+                type: object
+                required:
+                  - courier_id
+                  - latitude
+                  - longitude
+                properties:
+                  courier_id:
+                    type: integer
+                    example: 17
+                  latitude:
+                    type: number
+                    example: -1.9441
+                  longitude:
+                    type: number
+                    example: 30.0619
+                  recorded_at:
+                    type: number
+                    description: Unix timestamp of the fix (default now), within LOCATION_PING_RETENTION_DAYS
+                    example: 1717171717.5
+    responses:
+      202:
+        description: Pings accepted for storage; invalid pings and pings a driver sent for another courier are reported by index
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            message:
+              type: string
+            data:
+              type: object
+              properties:
+                accepted:
+                  type: integer
+                duplicates:
+                  type: integer
+                coalesced:
+                  type: integer
+                rejected:
+                  type: integer
+                errors:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      index:
+                        type: integer
+                      errors:
+                        type: object
+      400:
+        description: Body is not a list of pings
+      403:
+        description: Driver or admin role required
+      413:
+        description: More pings than LOCATION_PING_MAX_BATCH
+      503:
+        description: Ping buffer is full, retry after the Retry-After header
+    """
+    return CourierController.ingest_pings()
+
+
+@courier_bp.route('/nearby', methods=['GET'])
+@jwt_required()
+@role_required(['driver', 'admin'])
+def find_nearby():
+    """
+    Find the live couriers closest to a point (drivers and admins)
+    ---
+    tags:
+      - Couriers
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: latitude
+        type: number
+        required: true
+        description: Pickup latitude
+      - in: query
+        name: longitude
+        type: number
+        required: true
+        description: Pickup longitude
+      - in: query
+        name: k
+        type: integer
+        default: 10
+        description: Maximum number of couriers (up to COURIER_NEARBY_MAX_K)
+      - in: query
+        name: radius_km
+        type: number
+        description: Ignore couriers farther than this
+    responses:
+      200:
+        description: Couriers retrieved successfully, closest first
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            message:
+              type: string
+            data:
+              type: object
+              properties:
+                couriers:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      courier_id:
+                        type: integer
+                      latitude:
+                        type: number
+                      longitude:
+                        type: number
+                      distance_km:
+                        type: number
+                total:
+                  type: integer
+      400:
+        description: Invalid coordinates, k or radius
+      403:
+        description: Driver or admin role required
+    """
+    return CourierController.find_nearby()
+
+
+@courier_bp.route('/dispatch', methods=['POST'])
+@jwt_required()
+@role_required(['admin'])
+def run_dispatch():
+    """
+    Match waiting shipments to free couriers now (admin only)
+    ---
+    tags:
+      - Couriers
+    security:
+      - Bearer: []
+    description: >
+      Runs one dispatch window immediately instead of waiting for the
+      background dispatcher. Unassigned shipments are matched to the closest
+      live couriers not already on a shipment, minimizing total pickup
+      distance across the window.
+    responses:
+      200:
+        description: Dispatch window completed
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            message:
+              type: string
+            data:
+              type: object
+              properties:
+                shipments:
+                  type: integer
+                  description: Unassigned shipments in the window
+                assigned:
+                  type: integer
+                waiting:
+                  type: integer
+                  description: Shipments left for the next window
+                pickup_km:
+                  type: number
+                  description: Total pickup distance of the new assignments
+                matching_ms:
+                  type: number
+                total_ms:
+                  type: number
+      403:
+        description: Admin role required
+    """
+    return CourierController.run_dispatch()
@@ -0,0 +1,156 @@
+"""
+Routing Routes
+Define URL patterns for routing endpoints
+"""
+from flask import Blueprint
+from flask_jwt_extended import jwt_required
+from app.common.decorators import role_required
+from app.controllers.routing_controller import RoutingController
+
+# Create blueprint
+routing_bp = Blueprint('routing', __name__)
+
+
+@routing_bp.route('/eta', methods=['GET'])
+@jwt_required()
+def get_eta():
+    """
+    Fastest road route and ETA between two points
+    ---
+    tags:
+      - Routing
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: from_lat
+        type: number
+        required: true
+      - in: query
+        name: from_lon
+        type: number
+        required: true
+      - in: query
+        name: to_lat
+        type: number
+        required: true
+      - in: query
+        name: to_lon
+        type: number
+        required: true
+      - in: query
+        name: method
+        type: string
+        enum: [dijkstra, astar, alt]
+        description: Search method (default alt when landmarks are computed, else astar)
+      - in: query
+        name: path
+        type: boolean
+        default: false
+        description: Include the route's points
+    responses:
+      200:
+        description: Route found
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            message:
+              type: string
+            data:
+              type: object
+              properties:
+                eta_seconds:
+                  type: number
+                distance_km:
+                  type: number
+                path:
+                  type: array
+                  items:
+                    type: array
+                    items:
+                      type: number
+      400:
+        description: Invalid coordinates or method
+      404:
+        description: A point is off the road network or no route connects them
+      503:
+        description: Routing is not configured (ROUTING_GRAPH_FILE)
+    """
+    return RoutingController.get_eta()
+
+
+@routing_bp.route('/matrix', methods=['POST'])
+@jwt_required()
+@role_required(['driver', 'admin'])
+def get_matrix():
+    """
+    Travel times between many origins and destinations (drivers and admins)
+    ---
+    tags:
+      - Routing
+    security:
+      - Bearer: []
+    description: >
+      Served from the ETA matrix cache: times are computed between geohash
+      cells (ETA_CACHE_PRECISION) for the departure's time-of-day bucket and
+      reused until evicted. Without a road graph they are straight-line
+      estimates at ROUTING_DEFAULT_SPEED_KMH.
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - origins
+            - destinations
+          properties:
+            origins:
+              type: array
+              description: Up to ROUTING_MATRIX_MAX_POINTS [latitude, longitude] pairs
+              items:
+                type: array
+                items:
+                  type: number
+              example: [[-1.9441, 30.0619]]
+            destinations:
+              type: array
+              items:
+                type: array
+                items:
+                  type: number
+              example: [[-1.9536, 30.0927], [-1.9706, 30.1044]]
+            departure:
+              type: number
+              description: Unix timestamp of the departure (default now)
+    responses:
+      200:
+        description: Travel time matrix
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            message:
+              type: string
+            data:
+              type: object
+              properties:
+                seconds:
+                  type: array
+                  description: One row per origin; null where a destination is unreachable
+                  items:
+                    type: array
+                    items:
+                      type: number
+                routed:
+                  type: boolean
+                  description: False when times are straight-line estimates
+      400:
+        description: Invalid points or departure
+      403:
+        description: Only drivers and admins may request travel time matrices
+    """
+    return RoutingController.get_matrix()
@@ -5,6 +5,7 @@ Define URL patterns for user endpoints
 from flask import Blueprint
 from flask_jwt_extended import jwt_required
 from app.controllers.user_controller import UserController
+from app.common.decorators import role_required
 
 # Create blueprint
 user_bp = Blueprint('user', __name__)
@@ -63,6 +64,8 @@ def register():
               type: object
       400:
         description: Invalid input data
+      503:
+        description: Password hashing queue is full, retry later
     """
     return UserController.create_user()
 
@@ -111,10 +114,73 @@ def login():
                   type: string
       401:
         description: Invalid credentials
+      429:
+        description: Too many login attempts, retry after the Retry-After header
+      503:
+        description: Password hashing queue is full, retry later
     """
     return UserController.login()
 
 
+# Token routes
+@user_bp.route('/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_token():
+    """
+    Exchange a refresh token for a new access token
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    description: >
+      Send the refresh token as the Bearer token. The response carries a new
+      access token and a new refresh token; the old refresh token is revoked.
+    responses:
+      200:
+        description: Tokens refreshed
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            message:
+              type: string
+            data:
+              type: object
+              properties:
+                access_token:
+                  type: string
+                refresh_token:
+                  type: string
+      401:
+        description: Refresh token missing, expired or revoked
+    """
+    return UserController.refresh_token()
+
+
+@user_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """
+    Revoke the presented token
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    description: >
+      Revokes the access or refresh token sent as the Bearer token. Call it
+      once with each token to end the session everywhere.
+    responses:
+      200:
+        description: Token revoked
+      401:
+        description: Unauthorized
+    """
+    return UserController.logout()
+
+
 # Protected routes
 @user_bp.route('/me', methods=['GET'])
 @jwt_required()
@@ -170,6 +236,19 @@ def get_all_users():
         type: string
         description: Filter by role
         enum: [user, admin, driver]
+      - in: query
+        name: cursor
+        type: string
+        description: >
+          Switch to cursor pagination. Pass an empty value for the first page and
+          next_cursor from the previous response afterwards. Cursor pages omit
+          total/pages and skip the count query.
+      - in: query
+        name: fields
+        type: string
+        description: >
+          Comma-separated sparse fieldset, e.g. user_id,name,email. Allowed:
+          user_id, name, phone, email, role, address, is_active, created_at, updated_at.
     responses:
       200:
         description: Users retrieved successfully
@@ -189,16 +268,116 @@ def get_all_users():
                     type: object
                 total:
                   type: integer
+                total_is_exact:
+                  type: boolean
+                  description: False when total is a planner estimate
                 page:
                   type: integer
                 per_page:
                   type: integer
                 pages:
                   type: integer
+                next_cursor:
+                  type: string
+                has_next:
+                  type: boolean
+      400:
+        description: Invalid cursor or fields
     """
     return UserController.get_all_users()
 
 
+@user_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+@role_required('admin')
+def bulk_create_users():
+    """
+    Create many users in one request (admin only)
+    ---
+    tags:
+      - Users
+    security:
+      - Bearer: []
+    consumes:
+      - application/json
+      - application/x-ndjson
+      - text/csv
+    parameters:
+      - in: body
+        name: body
+        required: true
+        description: >
+          A JSON list of users (or {"users": [...]}), JSON Lines
+          (Content-Type application/x-ndjson), or CSV with a header row
+          (Content-Type text/csv). Fields are the same as for registration.
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              name:
+                type: string
+              email:
+                type: string
+              password:
+                type: string
+              phone:
+                type: string
+              role:
+                type: string
+                enum: [user, admin, driver]
+              address:
+                type: string
+    responses:
+      200:
+        description: Import finished; rows are reported individually
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            message:
+              type: string
+            data:
+              type: object
+              properties:
+                created:
+                  type: integer
+                failed:
+                  type: integer
+                results:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      row:
+                        type: integer
+                      email:
+                        type: string
+                      status:
+                        type: string
+                        enum: [created, failed]
+                      user_id:
+                        type: integer
+                      errors:
+                        type: object
+                        description: Messages by field, e.g. {"email": ["Invalid email format"]}
+                        additionalProperties:
+                          type: array
+                          items:
+                            type: string
+      400:
+        description: Body could not be parsed
+      403:
+        description: Admin role required
+      413:
+        description: More rows than BULK_IMPORT_MAX_ROWS
+      503:
+        description: Another bulk import is running
+    """
+    return UserController.bulk_create_users()
+
+
 @user_bp.route('/<int:user_id>', methods=['GET'])
 @jwt_required()
 def get_user(user_id):
@@ -0,0 +1,184 @@
+"""
+Courier Service Layer
+Tracks live courier positions, stores their ping history and answers nearby-courier queries
+"""
+import time
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import select
+from app import db, courier_index, location_pings
+from app.models.courier_model import Courier
+from app.models.location_ping_model import LocationPing
+from app.database.db import UPSERT_INSERTS, transaction
+from app.database.partitions import ensure_daily_partitions, supports_partitions
+from app.common.geo import encode
+from app.common.location_pings import PingBufferFull
+from app.common.validators import LOCATION_PING_SCHEMA
+
+# Returned when the ping buffer sheds load; controllers answer with a 503
+PINGS_BUSY_ERROR = {
+    'message': 'Location pings are arriving faster than they can be stored, please retry shortly',
+    'status_code': 503
+}
+
+
+class CourierService:
+    """Courier service for location tracking and lookup"""
+
+    @staticmethod
+    def get_courier_id_for_user(user_id):
+        """
+        Get the courier linked to a driver account
+
+        Args:
+            user_id (int): Driver's user ID
+
+        Returns:
+            int: Courier ID, or None if the account has no courier
+        """
+        return db.session.execute(
+            select(Courier.courier_id).where(Courier.user_id == int(user_id))
+        ).scalar()
+
+    @staticmethod
+    def update_location(courier_id, latitude, longitude):
+        """
+        Record a courier's current position
+
+        Args:
+            courier_id (int): Courier ID
+            latitude (float): Latitude in degrees
+            longitude (float): Longitude in degrees
+
+        Returns:
+            tuple: (location, error)
+        """
+        recorded_at = time.time()
+        try:
+            location_pings.submit([(courier_id, recorded_at, latitude, longitude)])
+        except PingBufferFull:
+            return None, PINGS_BUSY_ERROR
+        courier_index.update(courier_id, latitude, longitude, recorded_at)
+        return {
+            'courier_id': courier_id,
+            'latitude': latitude,
+            'longitude': longitude,
+            'geohash': encode(latitude, longitude, courier_index.precision)
+        }, None
+
+    @staticmethod
+    def find_nearby(latitude, longitude, k=10, radius_km=None):
+        """
+        Find the live couriers closest to a point
+
+        Args:
+            latitude (float): Latitude in degrees
+            longitude (float): Longitude in degrees
+            k (int): Maximum number of couriers to return
+            radius_km (float): Ignore couriers farther than this
+
+        Returns:
+            tuple: (couriers, error); couriers are closest first
+        """
+        max_k = current_app.config.get('COURIER_NEARBY_MAX_K', 50)
+        if k < 1 or k > max_k:
+            return None, {'message': f'k must be between 1 and {max_k}'}
+        if radius_km is not None and radius_km <= 0:
+            return None, {'message': 'radius_km must be positive'}
+
+        couriers = []
+        for courier_id, distance_km in courier_index.nearest(latitude, longitude, k, radius_km):
+            position = courier_index.position(courier_id)
+            if position is None:
+                continue
+            couriers.append({
+                'courier_id': courier_id,
+                'latitude': position[0],
+                'longitude': position[1],
+                'distance_km': round(distance_km, 3)
+            })
+        return couriers, None
+
+    @staticmethod
+    def ingest_pings(records, courier_id=None):
+        """
+        Validate a batch of pings, update live positions and queue them for storage
+
+        Each courier's newest valid ping moves it in the live index right
+        away; the batch is written to the ping table by the background
+        flusher. Pings older than LOCATION_PING_RETENTION_DAYS are rejected:
+        their partitions are already dropped, and every distinct old day
+        would cost a partition to be created.
+
+        Args:
+            records (list): Ping objects with courier_id, latitude, longitude
+                and an optional recorded_at Unix timestamp
+            courier_id (int): Only accept pings of this courier (a driver
+                reporting its own position); None accepts any courier
+
+        Returns:
+            tuple: (report, error); report has accepted/duplicate/coalesced
+                counts and the errors of rejected pings by index
+        """
+        now = time.time()
+        retention_days = current_app.config.get('LOCATION_PING_RETENTION_DAYS', 30)
+        oldest = now - retention_days * 86400
+        pings = []
+        rejected = []
+        for i, (ping, errors) in enumerate(LOCATION_PING_SCHEMA.validate_many(records)):
+            recorded_at = ping.get('recorded_at', now) if ping is not None else None
+            if not errors and courier_id is not None and ping['courier_id'] != courier_id:
+                errors = {'courier_id': ["Drivers may only report their own courier's position"]}
+            elif not errors and recorded_at < oldest:
+                errors = {'recorded_at': [f'Must be within the last {retention_days} days']}
+            if errors:
+                rejected.append({'index': i, 'errors': errors})
+            else:
+                pings.append((ping['courier_id'], recorded_at, ping['latitude'], ping['longitude']))
+
+        try:
+            counts = location_pings.submit(pings)
+        except PingBufferFull:
+            return None, PINGS_BUSY_ERROR
+
+        newest = {}
+        for ping in pings:
+            current = newest.get(ping[0])
+            if current is None or ping[1] >= current[1]:
+                newest[ping[0]] = ping
+        for courier_id, recorded_at, latitude, longitude in newest.values():
+            courier_index.update(courier_id, latitude, longitude, recorded_at)
+
+        counts['rejected'] = len(rejected)
+        counts['errors'] = rejected
+        return counts, None
+
+    @staticmethod
+    def store_pings(pings):
+        """
+        Write a batch of pings to the ping table
+
+        Uses one multi-row INSERT ... ON CONFLICT DO NOTHING, so a batch
+        retried after a failed flush does not duplicate rows. On PostgreSQL
+        the day partitions the batch needs are created first.
+
+        Args:
+            pings (list): (courier_id, recorded_at, lat, lon) tuples
+        """
+        table = LocationPing.__table__
+        rows = []
+        for courier_id, recorded_at, latitude, longitude in pings:
+            rows.append({
+                'courier_id': courier_id,
+                'recorded_at': datetime.fromtimestamp(recorded_at, timezone.utc),
+                'latitude': latitude,
+                'longitude': longitude,
+                'geohash': encode(latitude, longitude, 9)
+            })
+
+        with transaction():
+            if supports_partitions(table):
+                ensure_daily_partitions(table, {row['recorded_at'].date() for row in rows})
+            insert = UPSERT_INSERTS.get(db.session.get_bind(clause=table).dialect.name)
+            statement = insert(table).on_conflict_do_nothing() if insert else table.insert()
+            db.session.execute(statement, rows)
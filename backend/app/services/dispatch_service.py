@@ -0,0 +1,148 @@
+"""
+Dispatch Service Layer
+Matches waiting shipments to free couriers and records the assignments
+"""
+import time
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.orm import aliased
+from app import db, courier_index, eta_matrix, routing
+from app.models.address_model import Address
+from app.models.courier_model import Courier
+from app.models.order_model import Order
+from app.models.shipment_model import ACTIVE_SHIPMENT_STATUSES, Shipment
+from app.database.db import transaction
+from app.common.dispatch import match_optimal
+
+# PostgreSQL advisory lock key serializing the assignment writes of all processes
+DISPATCH_LOCK_KEY = 0x5144_0D15
+
+
+class DispatchService:
+    """Dispatch service for assigning shipments to couriers"""
+
+    @staticmethod
+    def run_window():
+        """
+        Assign the waiting shipments of one dispatch window
+
+        Reads up to DISPATCH_MAX_BATCH unassigned shipments, oldest first,
+        with their pickup point (the shipment's own, else its order's pickup
+        address), takes each one's DISPATCH_CANDIDATES closest live couriers
+        that are active (courier.status) and not already on a shipment, and
+        solves the assignment minimizing total pickup distance, or total
+        pickup travel time over the road graph when DISPATCH_COST is 'eta'
+        (through the ETA matrix cache). Assignments are written in one
+        transaction, under an advisory lock on PostgreSQL so windows of
+        different processes write one at a time; a shipment assigned or
+        cancelled elsewhere in the meantime, or a courier given another
+        shipment or taken off duty in the meantime, is left alone for the
+        next window.
+
+        Returns:
+            tuple: (report, error); report has the shipments seen, assigned
+                and left waiting, the total pickup distance and timings
+        """
+        config = current_app.config
+        max_batch = config.get('DISPATCH_MAX_BATCH', 500)
+        candidates = config.get('DISPATCH_CANDIDATES', 8)
+        max_pickup_km = config.get('DISPATCH_MAX_PICKUP_KM', 5.0)
+        # Until the road graph is loaded, windows rank couriers by distance
+        by_eta = config.get('DISPATCH_COST', 'distance') == 'eta' and routing.get_graph(wait=False) is not None
+        started = time.perf_counter()
+
+        pickup = aliased(Address)
+        pickup_latitude = func.coalesce(Shipment.pickup_latitude, pickup.latitude)
+        pickup_longitude = func.coalesce(Shipment.pickup_longitude, pickup.longitude)
+        waiting = [
+            (shipment_id, float(latitude), float(longitude))
+            for shipment_id, latitude, longitude in db.session.execute(
+                select(Shipment.shipment_id, pickup_latitude, pickup_longitude)
+                .outerjoin(Order, Order.order_id == Shipment.order_id)
+                .outerjoin(pickup, pickup.address_id == Order.pickup_address_id)
+                .where(
+                    Shipment.status == 'unassigned',
+                    pickup_latitude.is_not(None),
+                    pickup_longitude.is_not(None)
+                )
+                .order_by(Shipment.shipment_id)
+                .limit(max_batch)
+            )
+        ]
+        report = {'shipments': len(waiting), 'assigned': 0, 'waiting': len(waiting), 'pickup_km': 0.0}
+        if not waiting:
+            report['matching_ms'] = report['total_ms'] = 0.0
+            return report, None
+
+        busy = set(db.session.execute(
+            select(Shipment.courier_id).where(
+                Shipment.status.in_(ACTIVE_SHIPMENT_STATUSES),
+                Shipment.courier_id.is_not(None)
+            )
+        ).scalars())
+        # Ask for extra couriers so busy ones near a pickup do not crowd out free ones
+        k = candidates + min(len(busy), candidates * 3)
+        nearby = {
+            shipment_id: [edge for edge in courier_index.nearest(latitude, longitude, k, max_pickup_km)
+                          if edge[0] not in busy]
+            for shipment_id, latitude, longitude in waiting
+        }
+        # Couriers keep pinging while banned or off shift; only active ones take shipments
+        seen = {courier_id for edges in nearby.values() for courier_id, _ in edges}
+        active = set(db.session.execute(
+            select(Courier.courier_id).where(Courier.courier_id.in_(seen), Courier.status == 'active')
+        ).scalars()) if seen else set()
+        edges = {
+            shipment_id: [edge for edge in candidate_edges if edge[0] in active][:candidates]
+            for shipment_id, candidate_edges in nearby.items()
+        }
+
+        pickup_km = {}
+        if by_eta:
+            for shipment_id, latitude, longitude in waiting:
+                origins = []
+                for courier_id, km in edges[shipment_id]:
+                    pickup_km[shipment_id, courier_id] = km
+                    position = courier_index.position(courier_id)
+                    if position is not None:
+                        origins.append((courier_id, position[0], position[1]))
+                seconds = eta_matrix.travel_times(latitude, longitude, origins)
+                edges[shipment_id] = [(courier_id, seconds[courier_id]) for courier_id, _, _ in origins
+                                      if courier_id in seconds]
+
+        matching_started = time.perf_counter()
+        assignments = match_optimal(edges)
+        report['matching_ms'] = (time.perf_counter() - matching_started) * 1000
+
+        assigned_at = datetime.now(timezone.utc)
+        active_shipment = aliased(Shipment)
+        with transaction():
+            if db.session.get_bind(mapper=Shipment.__mapper__).dialect.name == 'postgresql':
+                # Held until commit; the guard below then sees the other windows' assignments
+                db.session.execute(select(func.pg_advisory_xact_lock(DISPATCH_LOCK_KEY)))
+            for shipment_id, courier_id, cost in assignments:
+                courier_is_busy = exists().where(
+                    active_shipment.courier_id == courier_id,
+                    active_shipment.status.in_(ACTIVE_SHIPMENT_STATUSES)
+                )
+                courier_is_active = exists().where(Courier.courier_id == courier_id, Courier.status == 'active')
+                result = db.session.execute(
+                    update(Shipment)
+                    .where(Shipment.shipment_id == shipment_id, Shipment.status == 'unassigned',
+                           ~courier_is_busy, courier_is_active)
+                    .values(courier_id=courier_id, status='assigned', assigned_at=assigned_at)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount:
+                    report['assigned'] += 1
+                    report['pickup_km'] += pickup_km.get((shipment_id, courier_id), cost)
+
+        report['waiting'] = len(waiting) - report['assigned']
+        report['pickup_km'] = round(report['pickup_km'], 3)
+        report['total_ms'] = (time.perf_counter() - started) * 1000
+        current_app.logger.info(
+            f"Dispatch window: {report['assigned']}/{len(waiting)} shipments assigned, "
+            f"{report['pickup_km']} km total pickup, matched in {report['matching_ms']:.1f}ms"
+        )
+        return report, None
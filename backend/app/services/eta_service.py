@@ -0,0 +1,70 @@
+"""
+ETA Service Layer
+Warms the ETA matrix cache from recent orders
+"""
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app import db, eta_matrix
+from app.models.address_model import Address
+from app.models.order_model import Order
+
+
+class EtaService:
+    """ETA service for cache warm-up"""
+
+    @staticmethod
+    def recent_trips(limit=5000, days=14):
+        """
+        Pickup-to-dropoff trips of the most recent orders
+
+        Args:
+            limit (int): Maximum number of orders
+            days (int): Only orders placed within this many days
+
+        Returns:
+            list: (from_lat, from_lon, to_lat, to_lon, departure) tuples;
+                departure is the order's Unix creation time
+        """
+        pickup, dropoff = aliased(Address), aliased(Address)
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        rows = db.session.execute(
+            select(pickup.latitude, pickup.longitude, dropoff.latitude, dropoff.longitude, Order.created_at)
+            .join(pickup, Order.pickup_address_id == pickup.address_id)
+            .join(dropoff, Order.dropoff_address_id == dropoff.address_id)
+            .where(
+                Order.created_at >= since,
+                pickup.latitude.is_not(None), pickup.longitude.is_not(None),
+                dropoff.latitude.is_not(None), dropoff.longitude.is_not(None)
+            )
+            .order_by(Order.created_at.desc())
+            .limit(limit)
+        ).all()
+
+        trips = []
+        for from_lat, from_lon, to_lat, to_lon, created_at in rows:
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            trips.append((float(from_lat), float(from_lon), float(to_lat), float(to_lon), created_at.timestamp()))
+        return trips
+
+    @staticmethod
+    def warm_up(limit=None, days=None, max_pairs=None):
+        """
+        Compute the cell pairs most travelled by recent orders
+
+        Args:
+            limit (int): Orders to read (default: ETA_CACHE_WARMUP_ORDERS)
+            days (int): Look-back window (default: ETA_CACHE_WARMUP_DAYS)
+            max_pairs (int): Cell pairs to compute (default: ETA_CACHE_WARMUP_PAIRS)
+
+        Returns:
+            int: Cell pairs computed
+        """
+        config = current_app.config
+        trips = EtaService.recent_trips(
+            limit or config.get('ETA_CACHE_WARMUP_ORDERS', 5000),
+            days or config.get('ETA_CACHE_WARMUP_DAYS', 14)
+        )
+        return eta_matrix.warm_up(trips, max_pairs or config.get('ETA_CACHE_WARMUP_PAIRS', 2000))
@@ -0,0 +1,71 @@
+"""
+Routing Service Layer
+Point-to-point routes and ETAs over the road graph
+"""
+from app import eta_matrix, routing
+
+ROUTING_METHODS = ('dijkstra', 'astar', 'alt')
+
+
+class RoutingService:
+    """Routing service for route and ETA queries"""
+
+    @staticmethod
+    def get_route(from_lat, from_lon, to_lat, to_lon, method=None, include_path=False):
+        """
+        Fastest route and ETA between two points
+
+        Args:
+            from_lat (float): Origin latitude
+            from_lon (float): Origin longitude
+            to_lat (float): Destination latitude
+            to_lon (float): Destination longitude
+            method (str): Search method, one of ROUTING_METHODS (default: the fastest available)
+            include_path (bool): Return the route's points
+
+        Returns:
+            tuple: (route, error)
+        """
+        if not routing.is_configured():
+            return None, {'message': 'Routing is not configured', 'status_code': 503}
+        if routing.get_graph(wait=False) is None:
+            return None, {'message': 'Road graph is not loaded yet, retry shortly', 'status_code': 503}
+        if method is not None and method not in ROUTING_METHODS:
+            return None, {'message': f"method must be one of: {', '.join(ROUTING_METHODS)}"}
+
+        route, error = routing.route(from_lat, from_lon, to_lat, to_lon, method)
+        if error:
+            return None, {'message': error, 'status_code': 404}
+
+        result = {
+            'eta_seconds': round(route['seconds'], 1),
+            'distance_km': round(route['meters'] / 1000, 3)
+        }
+        if include_path:
+            result['path'] = route['path']
+        return result, None
+
+    @staticmethod
+    def get_matrix(origins, destinations, departure=None):
+        """
+        Travel times between every origin and every destination
+
+        Served from the ETA matrix cache: times are between the points'
+        geohash cells for the departure's time-of-day bucket, so they are
+        estimates at cell resolution. Until the road graph is loaded they
+        are straight-line estimates (routed is False).
+
+        Args:
+            origins (list): (lat, lon) tuples
+            destinations (list): (lat, lon) tuples
+            departure (float): Unix timestamp of the departure (default now)
+
+        Returns:
+            tuple: (matrix, error); matrix has one row of seconds per origin,
+                None where a destination cannot be reached
+        """
+        rows = eta_matrix.matrix(origins, destinations, departure)
+        return {
+            'seconds': [[round(seconds, 1) if seconds is not None else None for seconds in row] for row in rows],
+            'routed': routing.is_ready()
+        }, None
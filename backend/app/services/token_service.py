@@ -0,0 +1,130 @@
+"""
+Token Service Layer
+Builds JWT claims and serves the user snapshots embedded in them
+"""
+from flask import current_app
+from sqlalchemy import select
+from app import db, token_versions, token_blocklist
+from app.models.user_model import User
+
+# Bump when SNAPSHOT_FIELDS changes so older tokens fall back to the database
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FIELDS = (
+    'user_id', 'name', 'phone', 'email', 'role',
+    'address', 'is_active', 'created_at', 'updated_at'
+)
+
+
+class TokenService:
+    """Token service for JWT claim handling"""
+
+    @staticmethod
+    def snapshots_enabled():
+        """
+        Check whether tokens carry user snapshots
+
+        Returns:
+            bool: True if JWT_CLAIMS_SNAPSHOT is on
+        """
+        return current_app.config.get('JWT_CLAIMS_SNAPSHOT', False)
+
+    @staticmethod
+    def build_claims(user):
+        """
+        Build the additional claims for a user's access token
+
+        With JWT_CLAIMS_SNAPSHOT on, the token also carries a compact user
+        projection stamped with the user's token_version.
+
+        Args:
+            user (User): Authenticated user
+
+        Returns:
+            dict: Additional JWT claims
+        """
+        claims = {'role': user.role, 'email': user.email}
+        if TokenService.snapshots_enabled():
+            data = user.to_dict()
+            claims['usr'] = {
+                'v': SNAPSHOT_VERSION,
+                'tv': user.token_version or 0,
+                'd': [data[field] for field in SNAPSHOT_FIELDS]
+            }
+        return claims
+
+    @staticmethod
+    def get_snapshot(claims):
+        """
+        Get the user embedded in a token without touching the database
+
+        Args:
+            claims (dict): Decoded JWT claims
+
+        Returns:
+            dict: User data shaped like User.to_dict(), or None if the token has
+                no usable snapshot or the user changed since it was issued
+        """
+        snapshot = claims.get('usr')
+        if not snapshot or snapshot.get('v') != SNAPSHOT_VERSION:
+            return None
+
+        data = dict(zip(SNAPSHOT_FIELDS, snapshot['d']))
+        if TokenService.is_stale(data['user_id'], snapshot['tv']):
+            return None
+        return data
+
+    @staticmethod
+    def is_stale(user_id, token_version):
+        """
+        Check whether a snapshot predates the user's latest write
+
+        The version cache is only a shortcut: on a miss (another process,
+        a restart or an evicted entry) the version is read from the primary
+        database and cached again, so a snapshot is never trusted unchecked.
+        A per-process cache does not see other workers' writes, so its
+        entries only live TOKEN_VERSION_CACHE_TTL (a few seconds) before
+        the database is asked again.
+
+        Args:
+            user_id (int): User ID
+            token_version (int): token_version stamped in the snapshot
+
+        Returns:
+            bool: True if the user was updated after the token was issued, or
+                no longer exists or is inactive
+        """
+        current = token_versions.get(f'id:{user_id}')
+        if current is None:
+            row = db.session.execute(
+                select(User.token_version, User.is_active).where(User.user_id == int(user_id))
+            ).first()
+            if row is None or not row.is_active:
+                return True
+            current = row.token_version or 0
+            token_versions.set(f'id:{user_id}', current)
+        return current > token_version
+
+    @staticmethod
+    def revoke(claims):
+        """
+        Revoke a token until it would have expired
+
+        Args:
+            claims (dict): Decoded JWT claims of the token
+        """
+        token_blocklist.revoke(claims['jti'], claims['exp'])
+
+    @staticmethod
+    def record_token_version(user_id, token_version):
+        """
+        Remember a user's new token_version so older snapshots are rejected
+
+        With the redis backend every process sees the new version at once;
+        with the memory backend only this one does, and the others catch up
+        when their entry expires.
+
+        Args:
+            user_id (int): User ID
+            token_version (int): New token_version
+        """
+        token_versions.set(f'id:{user_id}', token_version)
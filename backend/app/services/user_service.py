@@ -3,11 +3,96 @@ User Service Layer
 Business logic for user operations
 """
 from flask import current_app
-from app import db
+from app import db, count_cache, user_cache, replica_router, password_hasher
 from app.models.user_model import User
-from app.common.validators import validate_user_data
+from app.database.db import transaction, transactional, after_commit
+from app.common.validators import RECORD_ERRORS, USER_SCHEMA, USER_UPDATE_SCHEMA
+from app.common.utils import paginate_query, project_query
+from app.common.importers import chunked
+from app.common.metrics import timed
+from app.common.password_hasher import PasswordHasherBusy
+from app.services.token_service import TokenService
+from sqlalchemy import insert
 from sqlalchemy.exc import IntegrityError
 
+# Keyset for cursor pagination over users, newest first
+USER_KEYSET = (User.created_at, User.user_id)
+
+# Fields a listing may request with ?fields=
+USER_LIST_FIELDS = User.PUBLIC_FIELDS
+
+# Returned when the password hasher sheds load; controllers answer with a 503
+HASHER_BUSY_ERROR = {
+    'message': 'Server is busy, please try again shortly',
+    'status_code': 503
+}
+
+
+def _cache_user(user):
+    """Store a user under both of its lookup keys"""
+    record = user.to_cache()
+    user_cache.set(f'id:{user.user_id}', record)
+    user_cache.set(f'email:{user.email}', record)
+
+
+def _import_row_values(data, password_hash):
+    """Column values for a bulk-imported user"""
+    return {
+        'name': data['name'],
+        'phone': data['phone'],
+        'email': data['email'],
+        'password_hash': password_hash,
+        'role': data.get('role') or 'user',
+        'address': data.get('address', '')
+    }
+
+
+def _rehash_password(user, password):
+    """
+    Store a new hash of a just-verified password at the configured cost
+    
+    Failures are logged and ignored; the rehash is retried on the next login.
+    """
+    user_id = user.user_id
+    try:
+        with transaction():
+            user.set_password(password)
+            user.save()
+        current_app.logger.info(f'Password rehashed for user {user_id}')
+    except Exception as e:
+        current_app.logger.warning(f'Could not rehash password for user {user_id}: {str(e)}')
+
+
+@transactional
+def _insert_chunk(rows):
+    """
+    Insert one chunk of validated rows in a single executemany transaction
+
+    If another writer took one of the emails since the uniqueness check, the
+    chunk is retried row by row inside savepoints so only the conflicting rows fail.
+
+    Args:
+        rows (list): (result, values) pairs
+
+    Returns:
+        list: user_id per row, None where the email was taken
+    """
+    statement = insert(User).returning(User.user_id, sort_by_parameter_order=True)
+    try:
+        with transaction():
+            return db.session.scalars(statement, [values for _, values in rows]).all()
+    except IntegrityError:
+        pass
+
+    user_ids = []
+    for _, values in rows:
+        try:
+            with transaction():
+                user_ids.append(db.session.scalars(insert(User).returning(User.user_id), [values]).one())
+        except IntegrityError:
+            user_ids.append(None)
+    return user_ids
+
 
 class UserService:
     """User service for business logic"""
@@ -25,16 +110,11 @@ class UserService:
         """
         try:
             # Validate user data
-            is_valid, errors = validate_user_data(data, is_update=False)
-            if not is_valid:
+            data, errors = USER_SCHEMA.validate(data)
+            if errors:
                 return None, {'message': 'Validation failed', 'errors': errors}
             
-            # Check if user already exists
-            existing_user = User.query.filter_by(email=data['email']).first()
-            if existing_user:
-                return None, {'message': 'User with this email already exists'}
-            
-            # Create user
+            # Create user; the unique email index reports an existing user
             user = User(
                 name=data['name'],
                 phone=data['phone'],
@@ -44,19 +124,122 @@ class UserService:
             )
             user.set_password(data['password'])
             
-            user.save()
+            with transaction():
+                user = user.save_if_absent(['email'])
+                if user is None:
+                    return None, {'message': 'User with this email already exists'}
+                keys = (f'user:{user.user_id}', f'email:{user.email}')
+                after_commit(lambda: count_cache.invalidate('users'))
+                after_commit(lambda: replica_router.record_write(*keys))
+            
             current_app.logger.info(f'User created successfully: {user.email}')
             return user, None
             
+        except PasswordHasherBusy as e:
+            current_app.logger.warning(f'Password hasher busy while creating user: {str(e)}')
+            return None, dict(HASHER_BUSY_ERROR)
         except IntegrityError as e:
-            db.session.rollback()
             current_app.logger.error(f'Database integrity error: {str(e)}')
             return None, {'message': 'User with this email already exists'}
         except Exception as e:
-            db.session.rollback()
             current_app.logger.error(f'Error creating user: {str(e)}')
             return None, {'message': 'Failed to create user', 'error': str(e)}
     
+    @staticmethod
+    def bulk_create_users(records, start_row=1):
+        """
+        Create many users with batched validation, hashing and inserts
+        
+        Records are processed in chunks of BULK_IMPORT_CHUNK_SIZE. Each chunk
+        is validated, checked for existing emails with a single IN query,
+        hashed in parallel and inserted with one executemany in its own
+        transaction, so a failed chunk does not undo earlier ones. One import
+        runs at a time per process; another one gets a 503 error.
+        
+        Args:
+            records (iterable): User data dicts (None for unparsable rows)
+            start_row (int): Row number of the first record, for reporting
+        
+        Returns:
+            tuple: (report, error); report has created/failed counts and a
+                per-row results list in input order
+        """
+        config = current_app.config
+        results = []
+        created = []
+        
+        try:
+            with password_hasher.bulk_import():
+                for chunk in chunked(records, config.get('BULK_IMPORT_CHUNK_SIZE', 500)):
+                    pending = []
+                    seen = set()
+                    for record, (data, errors) in zip(chunk, USER_SCHEMA.validate_many(chunk)):
+                        row = start_row + len(results)
+                        result = {'row': row, 'status': 'failed'}
+                        results.append(result)
+                        if isinstance(record, dict):
+                            result['email'] = record.get('email')
+                        if errors:
+                            result['errors'] = errors
+                        elif data['email'] in seen:
+                            result['errors'] = {'email': ['Email appears more than once in this import']}
+                        else:
+                            seen.add(data['email'])
+                            pending.append((result, data))
+                    
+                    if seen:
+                        existing = set(db.session.scalars(db.select(User.email).where(User.email.in_(seen))))
+                        for result, data in pending:
+                            if data['email'] in existing:
+                                result['errors'] = {'email': ['User with this email already exists']}
+                        pending = [(result, data) for result, data in pending if data['email'] not in existing]
+                    
+                    if not pending:
+                        continue
+                    
+                    with timed('bcrypt'):
+                        hashes = password_hasher.hash_many([data['password'] for _, data in pending])
+                    rows = [(result, _import_row_values(data, password_hash))
+                            for (result, data), password_hash in zip(pending, hashes)]
+                    
+                    try:
+                        user_ids = _insert_chunk(rows)
+                    except Exception as e:
+                        current_app.logger.error(f'Error importing rows {rows[0][0]["row"]}-{rows[-1][0]["row"]}: {str(e)}')
+                        user_ids = [None] * len(rows)
+                        for result, _ in rows:
+                            result['errors'] = {RECORD_ERRORS: ['Failed to import row']}
+                    else:
+                        for (result, _), user_id in zip(rows, user_ids):
+                            if user_id is None:
+                                result['errors'] = {'email': ['User with this email already exists']}
+                            else:
+                                result.update(status='created', user_id=user_id)
+                    
+                    created.extend(result for result, _ in rows if result['status'] == 'created')
+        except PasswordHasherBusy as e:
+            current_app.logger.warning(f'Bulk import rejected: {str(e)}')
+            return None, {'message': 'Another bulk import is running, retry when it finishes', 'status_code': 503}
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error during bulk user import: {str(e)}')
+            return None, {'message': 'Bulk import failed', 'error': str(e)}
+        finally:
+            if created:
+                count_cache.invalidate('users')
+                replica_router.record_write(*(
+                    key
+                    for result in created
+                    for key in (f'user:{result["user_id"]}', f'email:{result["email"]}')
+                ))
+        
+        current_app.logger.info(f'Bulk import finished: {len(created)} created, {len(results) - len(created)} failed')
+        return {
+            'created': len(created),
+            'failed': len(results) - len(created),
+            'results': results
+        }, None
+    
     @staticmethod
     def get_user_by_id(user_id):
         """
@@ -69,7 +252,14 @@ class UserService:
             User: User object or None
         """
         try:
-            user = User.query.filter_by(user_id=user_id, is_active=True).first()
+            cached = user_cache.get(f'id:{user_id}')
+            if cached is not None and cached['is_active']:
+                return User.from_cache(cached)
+            
+            with replica_router.reading(f'user:{user_id}'):
+                user = User.query.filter_by(user_id=user_id, is_active=True).first()
+            if user:
+                _cache_user(user)
             return user
         except Exception as e:
             current_app.logger.error(f'Error fetching user: {str(e)}')
@@ -87,21 +277,34 @@ class UserService:
             User: User object or None
         """
         try:
-            user = User.query.filter_by(email=email, is_active=True).first()
+            cached = user_cache.get(f'email:{email}')
+            if cached is not None and cached['is_active'] and cached['email'] == email:
+                return User.from_cache(cached)
+            
+            with replica_router.reading(f'email:{email}'):
+                user = User.query.filter_by(email=email, is_active=True).first()
+            if user:
+                _cache_user(user)
             return user
         except Exception as e:
             current_app.logger.error(f'Error fetching user by email: {str(e)}')
             return None
     
     @staticmethod
-    def get_all_users(page=1, per_page=20, role=None):
+    def get_all_users(page=1, per_page=20, role=None, cursor=None, fields=None):
         """
         Get all users with pagination
         
+        Only the listed columns are selected and rows are serialized straight
+        from tuples, so password hashes and unrequested fields are never loaded.
+        
         Args:
             page (int): Page number
             per_page (int): Items per page
             role (str): Filter by role (optional)
+            cursor (str): Keyset cursor; when not None, cursor pagination is
+                used and no total count is computed ('' for the first page)
+            fields (list): Fields to return, subset of USER_LIST_FIELDS (default all)
         
         Returns:
             dict: Paginated users data
@@ -112,19 +315,34 @@ class UserService:
             if role:
                 query = query.filter_by(role=role)
             
-            query = query.order_by(User.created_at.desc())
+            query, serializer = project_query(
+                query,
+                User,
+                fields or USER_LIST_FIELDS,
+                extra_columns=USER_KEYSET
+            )
             
-            paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+            with replica_router.reading():
+                if cursor is not None:
+                    result = paginate_query(
+                        query,
+                        per_page=per_page,
+                        cursor=cursor,
+                        keyset=USER_KEYSET,
+                        serializer=serializer
+                    )
+                else:
+                    query = query.order_by(User.created_at.desc())
+                    result = paginate_query(
+                        query,
+                        page=page,
+                        per_page=per_page,
+                        serializer=serializer,
+                        count_key=('users', role)
+                    )
             
-            return {
-                'users': [user.to_dict() for user in paginated.items],
-                'total': paginated.total,
-                'page': page,
-                'per_page': per_page,
-                'pages': paginated.pages,
-                'has_next': paginated.has_next,
-                'has_prev': paginated.has_prev
-            }
+            result['users'] = result.pop('items')
+            return result
         except Exception as e:
             current_app.logger.error(f'Error fetching users: {str(e)}')
             return None
@@ -142,45 +360,54 @@ class UserService:
             tuple: (user, error)
         """
         try:
-            user = User.query.filter_by(user_id=user_id, is_active=True).first()
-            if not user:
-                return None, {'message': 'User not found'}
+            with transaction():
+                user = User.query.filter_by(user_id=user_id, is_active=True).first()
+                if not user:
+                    return None, {'message': 'User not found'}
+                
+                # Validate update data
+                data, errors = USER_UPDATE_SCHEMA.validate(data)
+                if errors:
+                    return None, {'message': 'Validation failed', 'errors': errors}
+                
+                # A taken email fails on the unique index and is reported below
+                emails = {user.email, data.get('email') or user.email}
+                
+                # Update fields
+                if 'name' in data:
+                    user.name = data['name']
+                if 'phone' in data:
+                    user.phone = data['phone']
+                if 'email' in data:
+                    user.email = data['email']
+                if 'address' in data:
+                    user.address = data['address']
+                role_changed = 'role' in data and data['role'] != user.role
+                if 'role' in data:
+                    user.role = data['role']
+                if 'password' in data:
+                    user.set_password(data['password'])
+                token_version = (user.token_version or 0) + 1
+                user.token_version = token_version
+                
+                user.save()
+                after_commit(lambda: TokenService.record_token_version(user_id, token_version))
+                after_commit(lambda: replica_router.record_write(
+                    f'user:{user_id}', *(f'email:{email}' for email in emails)
+                ))
+                if role_changed:
+                    after_commit(lambda: count_cache.invalidate('users'))
             
-            # Validate update data
-            is_valid, errors = validate_user_data(data, is_update=True)
-            if not is_valid:
-                return None, {'message': 'Validation failed', 'errors': errors}
-            
-            # Check email uniqueness if email is being updated
-            if 'email' in data and data['email'] != user.email:
-                existing_user = User.query.filter_by(email=data['email']).first()
-                if existing_user:
-                    return None, {'message': 'Email already in use'}
-            
-            # Update fields
-            if 'name' in data:
-                user.name = data['name']
-            if 'phone' in data:
-                user.phone = data['phone']
-            if 'email' in data:
-                user.email = data['email']
-            if 'address' in data:
-                user.address = data['address']
-            if 'role' in data:
-                user.role = data['role']
-            if 'password' in data:
-                user.set_password(data['password'])
-            
-            user.save()
             current_app.logger.info(f'User updated successfully: {user.email}')
             return user, None
             
+        except PasswordHasherBusy as e:
+            current_app.logger.warning(f'Password hasher busy while updating user: {str(e)}')
+            return None, dict(HASHER_BUSY_ERROR)
         except IntegrityError as e:
-            db.session.rollback()
             current_app.logger.error(f'Database integrity error: {str(e)}')
             return None, {'message': 'Email already in use'}
         except Exception as e:
-            db.session.rollback()
             current_app.logger.error(f'Error updating user: {str(e)}')
             return None, {'message': 'Failed to update user', 'error': str(e)}
     
@@ -196,17 +423,23 @@ class UserService:
             tuple: (success, error)
         """
         try:
-            user = User.query.filter_by(user_id=user_id).first()
-            if not user:
-                return False, {'message': 'User not found'}
+            with transaction():
+                user = User.query.filter_by(user_id=user_id).first()
+                if not user:
+                    return False, {'message': 'User not found'}
+                
+                token_version = (user.token_version or 0) + 1
+                user.is_active = False
+                user.token_version = token_version
+                user.save()
+                after_commit(lambda: TokenService.record_token_version(user_id, token_version))
+                after_commit(lambda: replica_router.record_write(f'user:{user_id}'))
+                after_commit(lambda: count_cache.invalidate('users'))
             
-            user.is_active = False
-            user.save()
             current_app.logger.info(f'User deactivated successfully: {user.email}')
             return True, None
             
         except Exception as e:
-            db.session.rollback()
             current_app.logger.error(f'Error deleting user: {str(e)}')
             return False, {'message': 'Failed to delete user', 'error': str(e)}
     
@@ -223,14 +456,27 @@ class UserService:
             tuple: (user, error)
         """
         try:
-            user = User.query.filter_by(email=email, is_active=True).first()
+            with replica_router.reading(f'email:{email}'):
+                user = User.query.filter_by(email=email, is_active=True).first()
+            
+            if not user:
+                # Same bcrypt work as a wrong password, so unknown emails are not revealed by timing
+                with timed('bcrypt'):
+                    password_hasher.verify_dummy(password)
+                return None, {'message': 'Invalid email or password'}
             
-            if not user or not user.check_password(password):
+            if not user.check_password(password):
                 return None, {'message': 'Invalid email or password'}
             
+            if user.password_needs_rehash():
+                _rehash_password(user, password)
+            
             current_app.logger.info(f'User authenticated successfully: {user.email}')
             return user, None
             
+        except PasswordHasherBusy as e:
+            current_app.logger.warning(f'Password hasher busy while authenticating user: {str(e)}')
+            return None, dict(HASHER_BUSY_ERROR)
         except Exception as e:
             current_app.logger.error(f'Error authenticating user: {str(e)}')
             return None, {'message': 'Authentication failed', 'error': str(e)}
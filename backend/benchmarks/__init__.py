@@ -0,0 +1,4 @@
+"""
+Micro-benchmarks for backend hot paths
+Run from the backend directory, e.g. python -m benchmarks.json_responses
+"""
@@ -0,0 +1,78 @@
+"""
+Benchmark: nearest-courier lookup around Kigali
+
+Places simulated couriers around central Kigali (denser downtown, thinning
+toward the outskirts) and compares CourierIndex.nearest with a brute-force
+haversine scan over every courier. Results are checked to be identical.
+
+Usage:
+    python -m benchmarks.courier_index [couriers] [queries]
+"""
+import heapq
+import random
+import sys
+import time
+
+from app.common.courier_index import CourierIndex
+from app.common.geo import haversine_km
+
+KIGALI = (-1.9441, 30.0619)
+
+
+def build_positions(count, seed=7):
+    """Courier positions normally distributed around the city center"""
+    rng = random.Random(seed)
+    return {
+        courier_id: (rng.gauss(KIGALI[0], 0.06), rng.gauss(KIGALI[1], 0.08))
+        for courier_id in range(1, count + 1)
+    }
+
+
+def build_queries(count, seed=11):
+    """Pickup points spread a little wider than the couriers"""
+    rng = random.Random(seed)
+    return [(rng.gauss(KIGALI[0], 0.08), rng.gauss(KIGALI[1], 0.1)) for _ in range(count)]
+
+
+def brute_force(positions, lat, lon, k):
+    return [
+        (courier_id, distance)
+        for distance, courier_id in heapq.nsmallest(
+            k, ((haversine_km(lat, lon, p_lat, p_lon), courier_id) for courier_id, (p_lat, p_lon) in positions.items())
+        )
+    ]
+
+
+def run(couriers=50000, queries=500, k=10):
+    positions = build_positions(couriers)
+    points = build_queries(queries)
+
+    print(f'{couriers} couriers, {queries} queries, k={k}')
+    started = time.perf_counter()
+    expected = [brute_force(positions, lat, lon, k) for lat, lon in points]
+    brute_seconds = time.perf_counter() - started
+    print(f'  {"brute-force scan":<28} {brute_seconds / queries * 1e3:9.3f} ms/query  (1.00x)')
+
+    for precision in (5, 6, 7):
+        index = CourierIndex(precision=precision, max_age=3600)
+        for courier_id, (lat, lon) in positions.items():
+            index.update(courier_id, lat, lon)
+
+        started = time.perf_counter()
+        results = [index.nearest(lat, lon, k) for lat, lon in points]
+        seconds = time.perf_counter() - started
+
+        assert [[c for c, _ in r] for r in results] == [[c for c, _ in r] for r in expected], \
+            f'precision {precision} disagrees with the brute-force scan'
+        stats = index.get_stats()
+        label = f'CourierIndex precision={precision}'
+        print(f'  {label:<28} {seconds / queries * 1e3:9.3f} ms/query  ({brute_seconds / seconds:.0f}x)'
+              f'  cells/query={stats["cells_scanned"] / queries:.1f}'
+              f'  candidates/query={stats["candidates"] / queries:.0f}')
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    )
@@ -0,0 +1,140 @@
+"""
+Benchmark: dispatch matching against a first-come greedy baseline
+
+Deterministic simulation of a dispatch shift around Kigali. Shipments arrive
+at seeded random times and places; every window, the waiting shipments are
+matched to the free couriers in a CourierIndex, exactly as the dispatcher
+does. A matched courier drives to the pickup and on to the dropoff (at a
+fixed speed plus handling time) and becomes free again where it delivered.
+Both policies see the same arrival stream, so the pickup distances and wait
+times differ only by the matching; the latency column is wall time of the
+matching step alone.
+
+Usage:
+    python -m benchmarks.dispatch [couriers] [shipments_per_minute] [minutes] [window_seconds]
+"""
+import heapq
+import random
+import sys
+import time
+
+from app.common.courier_index import CourierIndex
+from app.common.dispatch import match_greedy, match_optimal
+from app.common.geo import haversine_km
+
+KIGALI = (-1.9441, 30.0619)
+SPEED_KMH = 25
+HANDLING_SECONDS = 180
+CANDIDATES = 8
+MAX_PICKUP_KM = 5.0
+
+POLICIES = {'greedy': match_greedy, 'optimal': match_optimal}
+
+
+def build_shipments(per_minute, minutes, seed=5):
+    """(arrival_seconds, pickup, dropoff) tuples with Poisson arrivals"""
+    rng = random.Random(seed)
+    shipments = []
+    now = rng.expovariate(per_minute / 60)
+    while now < minutes * 60:
+        pickup = (rng.gauss(KIGALI[0], 0.04), rng.gauss(KIGALI[1], 0.05))
+        dropoff = (rng.gauss(KIGALI[0], 0.04), rng.gauss(KIGALI[1], 0.05))
+        shipments.append((now, pickup, dropoff))
+        now += rng.expovariate(per_minute / 60)
+    return shipments
+
+
+def build_couriers(count, seed=9):
+    """Starting courier positions"""
+    rng = random.Random(seed)
+    return {
+        courier_id: (rng.gauss(KIGALI[0], 0.06), rng.gauss(KIGALI[1], 0.08))
+        for courier_id in range(1, count + 1)
+    }
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def simulate(policy, couriers, shipments, minutes, window_seconds):
+    """
+    Run one shift with a matching policy
+
+    Returns:
+        dict: Assignment counts, pickup distances, waits and matching latencies
+    """
+    match = POLICIES[policy]
+    index = CourierIndex(precision=6, max_age=float('inf'))
+    for courier_id, (lat, lon) in couriers.items():
+        index.update(courier_id, lat, lon, timestamp=0)
+
+    busy = []  # (free_at, courier_id, lat, lon)
+    waiting = {}
+    arrivals = iter(enumerate(shipments))
+    upcoming = next(arrivals, None)
+    pickups, waits, latencies = [], [], []
+
+    for window in range(1, int(minutes * 60 / window_seconds) + 1):
+        now = window * window_seconds
+        while busy and busy[0][0] <= now:
+            _, courier_id, lat, lon = heapq.heappop(busy)
+            index.update(courier_id, lat, lon, timestamp=now)
+        while upcoming is not None and upcoming[1][0] <= now:
+            waiting[upcoming[0]] = upcoming[1]
+            upcoming = next(arrivals, None)
+
+        edges = {
+            shipment_id: index.nearest(*shipment[1], k=CANDIDATES, radius_km=MAX_PICKUP_KM)
+            for shipment_id, shipment in waiting.items()
+        }
+        started = time.perf_counter()
+        assignments = match(edges)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        for shipment_id, courier_id, pickup_km in assignments:
+            arrived_at, pickup, dropoff = waiting.pop(shipment_id)
+            index.remove(courier_id)
+            drive_km = pickup_km + haversine_km(*pickup, *dropoff)
+            heapq.heappush(busy, (now + drive_km / SPEED_KMH * 3600 + HANDLING_SECONDS, courier_id, *dropoff))
+            pickups.append(pickup_km)
+            waits.append(now - arrived_at)
+
+    return {
+        'assigned': len(pickups),
+        'left_waiting': len(waiting),
+        'pickup_km_total': sum(pickups),
+        'pickup_km_mean': sum(pickups) / (len(pickups) or 1),
+        'pickup_km_p95': percentile(pickups, 0.95),
+        'wait_s_mean': sum(waits) / (len(waits) or 1),
+        'wait_s_p95': percentile(waits, 0.95),
+        'matching_ms_p50': percentile(latencies, 0.5),
+        'matching_ms_p95': percentile(latencies, 0.95),
+        'matching_ms_max': max(latencies, default=0.0)
+    }
+
+
+def run(courier_count=300, per_minute=10, minutes=60, window_seconds=5):
+    couriers = build_couriers(courier_count)
+    shipments = build_shipments(per_minute, minutes)
+    results = {policy: simulate(policy, couriers, shipments, minutes, window_seconds) for policy in POLICIES}
+
+    print(f'{len(shipments)} shipments over {minutes} min, {courier_count} couriers, '
+          f'{window_seconds}s windows, {CANDIDATES} candidates within {MAX_PICKUP_KM} km')
+    print(f'  {"":<18}' + ''.join(f'{policy:>12}' for policy in POLICIES))
+    for metric in results['greedy']:
+        print(f'  {metric:<18}' + ''.join(f'{results[policy][metric]:>12,.2f}' for policy in POLICIES))
+    greedy, optimal = results['greedy']['pickup_km_mean'], results['optimal']['pickup_km_mean']
+    print(f'  mean pickup distance {(1 - optimal / greedy) * 100 if greedy else 0:.1f}% shorter with optimal matching')
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 300,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 10,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 60,
+        int(sys.argv[4]) if len(sys.argv) > 4 else 5
+    )
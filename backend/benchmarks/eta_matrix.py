@@ -0,0 +1,96 @@
+"""
+Benchmark: per-order routing cost with and without the ETA matrix cache
+
+Replays a peak-hour order stream on the synthetic grid from
+benchmarks.routing. Pickups and dropoffs cluster around a few busy
+neighborhoods, as real demand does. Each order asks for the travel times of
+its candidate couriers to the pickup and for the pickup-to-dropoff time.
+The stream is answered by the routing engine directly, then through a cold
+ETA matrix cache, then through a cache warmed from the previous day's orders.
+
+Usage:
+    python -m benchmarks.eta_matrix [orders] [grid_size] [candidates]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from app.common.eta_matrix import EtaMatrix
+from app.common.routing import RoutingEngine
+from benchmarks.routing import KIGALI, SPACING_DEGREES, write_grid
+
+PEAK = 1717232400  # 09:00 in Kigali
+
+
+def build_orders(count, size, candidates, seed=21, hotspot_seed=7):
+    """(pickup, dropoff, courier positions, departure) per order; the hotspots stay put from day to day"""
+    half = size / 2 * SPACING_DEGREES * 0.9
+    places = random.Random(hotspot_seed)
+    hotspots = [(KIGALI[0] + places.uniform(-half, half), KIGALI[1] + places.uniform(-half, half)) for _ in range(12)]
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(hotspots))]
+
+    def near(point, spread):
+        return (point[0] + rng.gauss(0, spread), point[1] + rng.gauss(0, spread))
+
+    def clamp(point):
+        return (min(max(point[0], KIGALI[0] - half), KIGALI[0] + half),
+                min(max(point[1], KIGALI[1] - half), KIGALI[1] + half))
+
+    orders = []
+    for i in range(count):
+        pickup = clamp(near(rng.choices(hotspots, weights)[0], 0.004))
+        dropoff = clamp(near(rng.choices(hotspots, weights)[0], 0.008))
+        couriers = [clamp(near(pickup, 0.01)) for _ in range(candidates)]
+        orders.append((pickup, dropoff, couriers, PEAK + i * 3600 / count))
+    return orders
+
+
+def replay(orders, travel_times):
+    """Seconds per order"""
+    started = time.perf_counter()
+    for pickup, dropoff, couriers, departure in orders:
+        travel_times(pickup, [(i, *courier) for i, courier in enumerate(couriers)], departure)
+        travel_times(dropoff, [('pickup', *pickup)], departure)
+    return (time.perf_counter() - started) / len(orders)
+
+
+def run(order_count=1000, size=120, candidates=8):
+    path = os.path.join(tempfile.mkdtemp(), 'grid.csv')
+    write_grid(path, size)
+    app = Flask(__name__)
+    app.config.update(ROUTING_GRAPH_FILE=path, ROUTING_LANDMARKS=0, ETA_CACHE_TIMEZONE='Africa/Kigali')
+    routing = RoutingEngine(app)
+    routing.get_graph()
+    orders = build_orders(order_count, size, candidates)
+    yesterday = build_orders(order_count, size, candidates, seed=22)
+
+    direct = replay(orders, lambda point, origins, departure: routing.travel_times(*point, origins))
+    print(f'{order_count} orders, {candidates} candidate couriers each, {len(routing.get_graph())}-node grid')
+    print(f'  {"routing engine":<22} {direct * 1000:>8.2f} ms/order')
+
+    for label, warm in (('cold cache', False), ('warmed cache', True)):
+        matrix = EtaMatrix()
+        matrix.init_app(app, router=routing)
+        warm_seconds = 0.0
+        if warm:
+            started = time.perf_counter()
+            matrix.warm_up([(*pickup, *dropoff, departure - 86400) for pickup, dropoff, _, departure in yesterday],
+                           max_pairs=order_count)
+            warm_seconds = time.perf_counter() - started
+        per_order = replay(orders, lambda point, origins, departure: matrix.travel_times(*point, origins, departure))
+        stats = matrix.get_stats()
+        print(f'  {label:<22} {per_order * 1000:>8.2f} ms/order  hit rate {stats["hit_rate"]:.1%}  '
+              f'{stats["entries"]} cell pairs' + (f'  (warm-up {warm_seconds:.1f}s)' if warm else ''))
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 120,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    )
@@ -0,0 +1,80 @@
+"""
+Benchmark: list-of-100-users response serialization
+
+Compares the previous path (to_dict pre-formatting timestamps, stdlib json via
+Flask's default provider) with FastJSONProvider and datetime-valued to_dict.
+
+Usage:
+    python -m benchmarks.json_responses [iterations]
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+from app.common.json_provider import FastJSONProvider, orjson
+from app.common.utils import success_response
+from app.models.user_model import User
+
+
+def build_users(count=100):
+    """Build unsaved users with realistic field sizes"""
+    base = datetime(2024, 1, 1)
+    return [
+        User(
+            user_id=i,
+            name=f'Customer Number {i}',
+            phone=f'+25078{i:07d}',
+            email=f'customer{i}@example.com',
+            role='user',
+            address=f'KG {i} Ave, Kigali, Rwanda',
+            is_active=True,
+            created_at=base + timedelta(minutes=i),
+            updated_at=base + timedelta(days=1, minutes=i)
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_to_dict(user):
+    """User.to_dict as it was before timestamps were left to the provider"""
+    data = user.to_dict()
+    data['created_at'] = user.created_at.isoformat() if user.created_at else None
+    data['updated_at'] = user.updated_at.isoformat() if user.updated_at else None
+    return data
+
+
+def run(iterations=2000):
+    app = create_app('testing')
+    users = build_users()
+
+    def respond(to_dict):
+        payload = {'users': [to_dict(user) for user in users], 'total': len(users)}
+        response, _ = success_response(payload, 'Users retrieved successfully')
+        return response.get_data()
+
+    results = {}
+    with app.test_request_context():
+        app.json = DefaultJSONProvider(app)
+        results['before (stdlib, pre-formatted)'] = timeit.timeit(
+            lambda: respond(legacy_to_dict), number=iterations
+        )
+
+        app.json = FastJSONProvider(app)
+        results['after (FastJSONProvider)'] = timeit.timeit(
+            lambda: respond(User.to_dict), number=iterations
+        )
+
+    print(f'orjson available: {orjson is not None}')
+    print(f'{iterations} responses of {len(users)} users each')
+    baseline = None
+    for label, seconds in results.items():
+        per_call = seconds / iterations * 1e6
+        baseline = baseline or per_call
+        print(f'  {label:<34} {per_call:9.1f} us/response  ({baseline / per_call:.2f}x)')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,80 @@
+"""
+Benchmark: courier location ping ingestion
+
+Feeds batches of pings through CourierService.ingest_pings (validation,
+coalescing, live index update, buffering) and times one background-style
+flush into the ping table, next to the naive path of one INSERT and commit
+per ping. Uses DATABASE_URL, or a temporary SQLite file when unset.
+
+Usage:
+    python -m benchmarks.location_pings [pings] [batch_size]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tempfile.mkdtemp(), "pings.db")}')
+
+from app import create_app, db, location_pings  # noqa: E402
+from app.models.location_ping_model import LocationPing  # noqa: E402
+from app.services.courier_service import CourierService  # noqa: E402
+
+KIGALI = (-1.9441, 30.0619)
+
+
+def build_pings(count, couriers=2000, start=None):
+    """Pings from couriers reporting every 2 seconds, drifting slightly"""
+    start = start or time.time() - count // couriers * 2 - 60
+    return [
+        {
+            'courier_id': i % couriers + 1,
+            'latitude': KIGALI[0] + (i % couriers) * 1e-4 + i * 1e-7,
+            'longitude': KIGALI[1] + (i % 97) * 1e-4,
+            'recorded_at': start + (i // couriers) * 2
+        }
+        for i in range(count)
+    ]
+
+
+def run(count=50000, batch_size=1000):
+    app = create_app('production')
+    app.config.update(LOCATION_PING_FLUSH_INTERVAL=0, LOCATION_PING_MAX_PENDING=count)
+    location_pings.init_app(app)
+    pings = build_pings(count)
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.query(LocationPing).delete()
+        db.session.commit()
+
+        started = time.perf_counter()
+        for i in range(0, count, batch_size):
+            CourierService.ingest_pings(pings[i:i + batch_size])
+        ingest_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    flushed = location_pings.flush()
+    flush_seconds = time.perf_counter() - started
+
+    naive = build_pings(min(count, 2000), start=time.time() - 7200)
+    with app.app_context():
+        started = time.perf_counter()
+        for ping in naive:
+            CourierService.store_pings([(ping['courier_id'], ping['recorded_at'], ping['latitude'], ping['longitude'])])
+        naive_seconds = time.perf_counter() - started
+        stored = db.session.query(LocationPing).count()
+        dialect = db.engine.dialect.name
+
+    print(f'{count} pings in batches of {batch_size} ({dialect})')
+    print(f'  {"ingest (validate, coalesce, index)":<38} {count / ingest_seconds:>10,.0f} pings/s')
+    print(f'  {"flush (one multi-row INSERT)":<38} {flushed / flush_seconds:>10,.0f} pings/s')
+    print(f'  {"naive (INSERT + commit per ping)":<38} {len(naive) / naive_seconds:>10,.0f} pings/s')
+    print(f'  rows stored: {stored}')
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    )
@@ -0,0 +1,96 @@
+"""
+Benchmark: point-to-point routing on a synthetic city grid
+
+Writes a grid road network around Kigali as an edge list (local streets at
+25 km/h, every tenth street an arterial at 50 km/h, a few one-way streets
+and missing blocks), then compares Dijkstra, A* and ALT on the same random
+queries: time per query and nodes settled. Routes are checked to have the
+same travel time. Also times loading the CSV, loading the binary cache,
+landmark precomputation and a one-to-many search as used by dispatch.
+
+Usage:
+    python -m benchmarks.routing [grid_size] [queries] [landmarks]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.common.road_graph import RoadGraph
+
+KIGALI = (-1.9441, 30.0619)
+SPACING_DEGREES = 0.001  # about 110 m
+
+
+def write_grid(path, size, seed=13):
+    """Grid street network as an edge list CSV"""
+    rng = random.Random(seed)
+    origin_lat = KIGALI[0] - size / 2 * SPACING_DEGREES
+    origin_lon = KIGALI[1] - size / 2 * SPACING_DEGREES
+
+    def point(row, column):
+        # Slightly irregular blocks
+        return (origin_lat + row * SPACING_DEGREES + rng.uniform(-1e-4, 1e-4),
+                origin_lon + column * SPACING_DEGREES + rng.uniform(-1e-4, 1e-4))
+
+    points = {(r, c): point(r, c) for r in range(size) for c in range(size)}
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'target', 'source_lat', 'source_lon', 'target_lat', 'target_lon',
+                         'speed_kmh', 'oneway'])
+        for (r, c), (lat, lon) in points.items():
+            for neighbor, arterial in (((r, c + 1), r % 10 == 0), ((r + 1, c), c % 10 == 0)):
+                if neighbor not in points or (not arterial and rng.random() < 0.05):
+                    continue
+                speed = 50 if arterial else 25
+                oneway = 0 if arterial else int(rng.random() < 0.1)
+                writer.writerow([r * size + c, neighbor[0] * size + neighbor[1], lat, lon,
+                                 *points[neighbor], speed, oneway])
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def run(size=200, query_count=100, landmark_count=8):
+    path = os.path.join(tempfile.mkdtemp(), 'grid.csv')
+    write_grid(path, size)
+
+    graph, parse_seconds = timed(RoadGraph.load, path)
+    _, cached_seconds = timed(RoadGraph.load, path)
+    _, landmark_seconds = timed(graph.precompute_landmarks, landmark_count)
+    print(f'{len(graph)} nodes, {graph.edge_count} edges')
+    print(f'  load CSV {parse_seconds:.2f}s, load cache {cached_seconds:.2f}s, '
+          f'{landmark_count} landmarks {landmark_seconds:.2f}s')
+
+    rng = random.Random(17)
+    queries = [(rng.randrange(len(graph)), rng.randrange(len(graph))) for _ in range(query_count)]
+    baseline = None
+    for method in ('dijkstra', 'astar', 'alt'):
+        started = time.perf_counter()
+        routes = [graph.shortest_path(source, target, method) for source, target in queries]
+        elapsed = time.perf_counter() - started
+        settled = sum(route.settled for route in routes if route)
+        seconds = [route.seconds if route else None for route in routes]
+        if baseline is None:
+            baseline = seconds
+        assert all(
+            (a is None) == (b is None) and (a is None or abs(a - b) < 1e-6) for a, b in zip(seconds, baseline)
+        ), f'{method} routes differ from Dijkstra'
+        print(f'  {method:<9} {elapsed / query_count * 1000:>8.2f} ms/query {settled / query_count:>10,.0f} settled')
+
+    targets = [rng.randrange(len(graph)) for _ in range(50)]
+    _, many_seconds = timed(graph.distances, queries[0][0], targets, reverse=True)
+    print(f'  one-to-many (50 targets, reverse) {many_seconds * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    )
@@ -0,0 +1,90 @@
+"""
+Benchmark: user record validation for bulk imports
+
+Compares the previous validate_user_data (patterns looked up per call, error
+strings formatted per record) with the compiled USER_SCHEMA, one record at a
+time and as a batch. Half of the records are invalid, as in a messy import.
+
+Usage:
+    python -m benchmarks.validators [records]
+"""
+import re
+import sys
+import timeit
+
+from app.common.validators import USER_SCHEMA
+
+
+def legacy_is_valid_email(email):
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+
+def legacy_is_valid_phone(phone):
+    cleaned = re.sub(r'[\s\-\(\)\+]', '', phone)
+    return cleaned.isdigit() and 10 <= len(cleaned) <= 15
+
+
+def legacy_validate_user_data(data, is_update=False):
+    """validate_user_data as it was before the schema engine"""
+    errors = []
+    if not is_update:
+        required = ['name', 'email', 'password', 'phone']
+        missing = [field for field in required if not data.get(field)]
+        if missing:
+            errors.append(f"Missing required fields: {', '.join(missing)}")
+    if 'email' in data and data['email']:
+        if not legacy_is_valid_email(data['email']):
+            errors.append('Invalid email format')
+    if 'phone' in data and data['phone']:
+        if not legacy_is_valid_phone(data['phone']):
+            errors.append('Invalid phone number format')
+    if 'password' in data and data['password']:
+        if len(data['password']) < 8:
+            errors.append('Password must be at least 8 characters long')
+    if 'role' in data and data['role']:
+        valid_roles = ['user', 'admin', 'driver']
+        if data['role'] not in valid_roles:
+            errors.append(f"Invalid role. Must be one of: {', '.join(valid_roles)}")
+    return len(errors) == 0, errors
+
+
+def build_records(count):
+    """Alternate valid records and records with several bad fields"""
+    records = []
+    for i in range(count):
+        if i % 2:
+            records.append({'name': '', 'email': f'partner{i}.example.com', 'password': 'short',
+                            'phone': '12-34', 'role': 'owner'})
+        else:
+            records.append({'name': f'Partner {i}', 'email': f'partner{i}@example.com',
+                            'password': 'password123', 'phone': f'+250 78{i:07d}', 'role': 'driver'})
+    return records
+
+
+def run(count=5000, repeat=5):
+    records = build_records(count)
+    validate = USER_SCHEMA.validate
+
+    results = {
+        'before (validate_user_data)': min(timeit.repeat(
+            lambda: [legacy_validate_user_data(record) for record in records], number=1, repeat=repeat
+        )),
+        'after (USER_SCHEMA.validate)': min(timeit.repeat(
+            lambda: [validate(record) for record in records], number=1, repeat=repeat
+        )),
+        'after (USER_SCHEMA.validate_many)': min(timeit.repeat(
+            lambda: USER_SCHEMA.validate_many(records), number=1, repeat=repeat
+        )),
+    }
+
+    print(f'{count} records, half invalid, best of {repeat}')
+    baseline = None
+    for label, seconds in results.items():
+        per_record = seconds / count * 1e6
+        baseline = baseline or per_record
+        print(f'  {label:<36} {per_record:7.2f} us/record  ({baseline / per_record:.2f}x)')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -26,10 +26,10 @@ def init_database():
             print("\nCreating database tables...")
 
             # Import all models to ensure they're registered
-            from app.modules.user.models import User
+            from app.models.user_model import User
 
-            # Create all tables
-            db.create_all()
+            # Create all tables on the primary; replicas get them through replication
+            db.create_all(bind_key=None)
 
             print("\n✓ Database tables created successfully!")
 
@@ -62,7 +62,7 @@ def test_user_model():
     """Test User model"""
     print("Testing User model...")
     from app import create_app, db
-    from app.modules.user.models import User
+    from app.models.user_model import User
 
     app = create_app('development')
 
@@ -87,6 +87,142 @@ def test_user_model():
 
         print("✓ User model test passed!\n")
 
+def test_password_hasher():
+    """Test bounded password hashing executor"""
+    print("Testing password hasher...")
+    from app import create_app
+    from app.common.password_hasher import PasswordHasher, PasswordHasherBusy, get_rounds
+
+    app = create_app('testing')
+    app.config['PASSWORD_HASH_QUEUE_DEPTH'] = 0
+    hasher = PasswordHasher(app)
+
+    hashed = hasher.hash("TestPass123")
+    assert hasher.verify("TestPass123", hashed), "Password should verify"
+    assert not hasher.verify("WrongPass", hashed), "Wrong password should not verify"
+
+    # New hashes use BCRYPT_ROUNDS; hashes with another cost need rehashing
+    assert get_rounds(hashed) == app.config['BCRYPT_ROUNDS'], "Hash should use the configured cost"
+    assert not hasher.needs_rehash(hashed), "Hash at the configured cost should be kept"
+    older = bcrypt.hashpw(b"TestPass123", bcrypt.gensalt(5)).decode('utf-8')
+    assert hasher.needs_rehash(older), "Hash at another cost should be rehashed"
+
+    stats = hasher.get_stats()
+    assert stats['completed'] == 3, "Every hash and check should be counted"
+    assert stats['hash_time_total'] > 0, "Hash time should be recorded"
+
+    # Occupy the only slot: the next job must be shed instead of queued
+    hasher._slots.acquire()
+    try:
+        hasher.hash("TestPass123")
+        assert False, "Full queue should reject new work"
+    except PasswordHasherBusy:
+        pass
+    finally:
+        hasher._slots.release()
+    assert hasher.get_stats()['rejected'] == 1, "Rejected job should be counted"
+
+    # A worker killed mid-flight breaks the pool; it is replaced instead of failing every later job
+    import os
+    import signal
+    app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE_DEPTH=2)
+    hasher = PasswordHasher(app)
+    hashed = hasher.hash("TestPass123")
+    for pid in list(hasher._executor._processes):
+        os.kill(pid, signal.SIGKILL)
+    assert hasher.verify("TestPass123", hashed), "The job should be retried on a new pool"
+    assert hasher.verify("TestPass123", hashed) and hasher.get_stats()['pool_restarts'] == 1
+    hasher.shutdown()
+
+    print("✓ Password hasher test passed!\n")
+
+def test_token_blocklist():
+    """Test revoked token lookups through the bloom filter"""
+    print("Testing token blocklist...")
+    import time
+    from app.common.revocation import BloomFilter, MemoryBlocklistBackend
+
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f'jti-{i}')
+    assert all(f'jti-{i}' in bloom for i in range(1000)), "Added items must always be found"
+    false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+    assert false_positives < 300, "False positive rate should stay near the target"
+
+    backend = MemoryBlocklistBackend(capacity=100, purge_interval=0)
+    backend.add('revoked', time.time() + 60)
+    backend.add('expired', time.time() - 1)
+    assert backend.contains('revoked'), "Revoked token should be found"
+    assert not backend.contains('expired'), "Expired entry should not block"
+    assert not backend.contains('never-revoked'), "Unknown token should pass"
+    assert len(backend) == 1, "Expired entries should be purged"
+
+    print("✓ Token blocklist test passed!\n")
+
+def test_memory_blocklist_warning():
+    """Test that a non-debug app warns about a per-process blocklist"""
+    print("Testing per-process blocklist warning...")
+    from unittest import mock
+    from app import create_app
+    from config import config, TestingConfig
+
+    class DeployedConfig(TestingConfig):
+        TESTING = False
+        DEBUG = False
+
+    config['deployed_memory_blocklist'] = DeployedConfig
+    with mock.patch('flask.sansio.app.App.logger') as logger:
+        create_app('deployed_memory_blocklist')
+    warnings = [call.args[0] for call in logger.warning.call_args_list]
+    assert any('TOKEN_BLOCKLIST_BACKEND=memory' in warning for warning in warnings), \
+        "Deployments with a per-process blocklist should be warned"
+
+    with mock.patch('flask.sansio.app.App.logger') as logger:
+        create_app('testing')
+    assert not logger.warning.call_args_list, "Test and debug apps should not warn"
+
+    print("✓ Per-process blocklist warning test passed!\n")
+
+def test_snapshot_staleness_without_cached_version():
+    """Test that a version cache miss is checked against the database"""
+    print("Testing snapshot staleness on a version cache miss...")
+    import os
+    import tempfile
+    from app import create_app, db, token_versions
+    from app.models.user_model import User
+    from app.services.token_service import TokenService
+    from config import config, TestingConfig
+
+    class SQLiteTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'auth.db')
+
+    config['sqlite_auth'] = SQLiteTestingConfig
+    app = create_app('sqlite_auth')
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        user = User(name="Test User", email="test@example.com", phone="+1234567890", role="admin",
+                    password_hash="x", token_version=3)
+        db.session.add(user)
+        db.session.commit()
+
+        # As in a fresh worker: nothing cached, so the database decides
+        token_versions.clear()
+        assert TokenService.is_stale(user.user_id, 2), "Older snapshot should be stale without a cached version"
+        assert token_versions.get(f'id:{user.user_id}') == 3, "Version should be cached again"
+        assert not TokenService.is_stale(str(user.user_id), 3), "Current snapshot should be trusted"
+
+        user.is_active = False
+        db.session.commit()
+        token_versions.clear()
+        assert TokenService.is_stale(user.user_id, 3), "Snapshot of an inactive user should be stale"
+        assert TokenService.is_stale(999, 0), "Snapshot of a missing user should be stale"
+
+        # Other workers' writes never reach a per-process cache, so its entries must expire quickly
+        assert token_versions.backend.ttl <= 5, "Per-process token versions should only be trusted for seconds"
+
+    print("✓ Snapshot staleness test passed!\n")
+
 if __name__ == '__main__':
     print("=" * 60)
     print("QuickDrop Authentication System Tests")
@@ -98,6 +234,10 @@ if __name__ == '__main__':
         test_jwt_config()
         test_database_config()
         test_user_model()
+        test_password_hasher()
+        test_token_blocklist()
+        test_memory_blocklist_warning()
+        test_snapshot_staleness_without_cached_version()
 
         print("=" * 60)
         print("✅ All tests passed successfully!")
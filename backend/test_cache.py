@@ -0,0 +1,145 @@
+"""
+Test script to verify caching utilities
+"""
+from app.common.cache import LRUCacheBackend, RedisCacheBackend, RecordCache
+
+
+class FakeRedis:
+    """Minimal stand-in for a Redis client"""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+class DownRedis:
+    """Redis client whose server is unreachable"""
+
+    def get(self, *args):
+        raise ConnectionError('Connection refused')
+
+    setex = delete = get
+
+
+def test_lru_backend():
+    """Test size-bounded LRU eviction"""
+    print("Testing LRU cache backend...")
+
+    backend = LRUCacheBackend(max_entries=2, ttl=60)
+    backend.set('a', {'v': 1})
+    backend.set('b', {'v': 2})
+    assert backend.get('a') == {'v': 1}, "Cached value should be returned"
+
+    # 'b' is now least recently used and is evicted first
+    backend.set('c', {'v': 3})
+    assert backend.get('b') is None, "Least recently used entry should be evicted"
+    assert backend.get('a') is not None and backend.get('c') is not None
+    assert backend.evictions == 1, "Eviction should be counted"
+
+    expired = LRUCacheBackend(max_entries=2, ttl=0)
+    expired.set('a', {'v': 1})
+    assert expired.get('a') is None, "Expired entry should not be returned"
+
+    print("✓ LRU cache backend test passed!\n")
+
+
+def test_record_cache_with_fake_redis():
+    """Test record cache counters over a Redis-compatible backend"""
+    print("Testing record cache with fake Redis...")
+    from app import create_app
+
+    app = create_app('testing')
+    client = FakeRedis()
+    cache = RecordCache()
+    cache.init_app(app, backend=RedisCacheBackend(client, ttl=60, prefix='test:'))
+
+    assert cache.get('id:1') is None, "Empty cache should miss"
+    cache.set('id:1', {'user_id': 1, 'email': 'test@example.com'})
+    assert 'test:id:1' in client.store, "Entry should be stored under the prefix"
+    assert cache.get('id:1')['email'] == 'test@example.com', "Stored record should be returned"
+
+    cache.delete_many(['id:1'])
+    assert cache.get('id:1') is None, "Evicted entry should miss"
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 2, "Hits and misses should be counted"
+
+    print("✓ Record cache test passed!\n")
+
+
+def test_record_cache_survives_redis_outage():
+    """Test that Redis errors turn into misses and skipped writes"""
+    print("Testing record cache during a Redis outage...")
+    import logging
+    from app import create_app, db
+    from app.database.db import after_commit, transaction
+
+    app = create_app('testing')
+    logger = logging.getLogger('test_cache.outage')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    cache = RecordCache()
+    cache.init_app(app, backend=RedisCacheBackend(DownRedis(), ttl=60, prefix='test:', logger=logger))
+
+    assert cache.get('id:1') is None, "Unreachable cache should miss"
+    cache.set('id:1', {'user_id': 1})
+    cache.delete_many(['id:1'])
+    stats = cache.get_stats()
+    assert stats['misses'] == 1 and stats['backend_failures'] == 3, "Failures should be counted"
+
+    # A failing eviction after commit must neither raise nor skip later callbacks
+    ran = []
+    app.logger.disabled = True
+    try:
+        with app.app_context():
+            with transaction():
+                after_commit(lambda: 1 / 0)
+                after_commit(lambda: ran.append(True))
+    finally:
+        app.logger.disabled = False
+        with app.app_context():
+            db.session.remove()
+    assert ran, "Later callbacks should still run"
+
+    print("✓ Redis outage test passed!\n")
+
+
+def test_user_cache_record_has_no_password_hash():
+    """Test that cached user records never carry the password hash"""
+    print("Testing cached user records...")
+    from sqlalchemy import inspect
+    from app import create_app
+    from app.models.user_model import User
+
+    app = create_app('testing')
+
+    with app.app_context():
+        user = User(user_id=7, name="Test User", email="test@example.com", phone="+1234567890",
+                    role="user", is_active=True, token_version=0, password_hash="$2b$04$hash")
+        record = user.to_cache()
+        assert 'password_hash' not in record, "Hash should not be cached"
+        assert record['email'] == "test@example.com", "Other columns should be cached"
+
+        # Records cached before the hash was excluded lose it on the way back
+        cached = User.from_cache({**record, 'user_id': 8, 'password_hash': "$2b$04$hash"})
+        assert 'password_hash' not in inspect(cached).dict, "Hash should load from the database"
+        assert cached.email == "test@example.com"
+
+    print("✓ Cached user record test passed!\n")
+
+
+if __name__ == '__main__':
+    test_lru_backend()
+    test_record_cache_with_fake_redis()
+    test_record_cache_survives_redis_outage()
+    test_user_cache_record_has_no_password_hash()
+    print("✅ All cache tests passed successfully!")
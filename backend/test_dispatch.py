@@ -0,0 +1,149 @@
+"""
+Test script to verify dispatch matching
+"""
+import itertools
+import os
+import random
+import tempfile
+
+from app.common.dispatch import match_greedy, match_optimal, pickup_edges, solve_assignment
+
+
+def test_solve_assignment():
+    """Test the Hungarian solver against every permutation of small matrices"""
+    print("Testing assignment solver...")
+
+    rng = random.Random(4)
+    for _ in range(200):
+        rows, columns = rng.randint(1, 5), rng.randint(1, 6)
+        rows = min(rows, columns)
+        cost = [[rng.randint(0, 20) for _ in range(columns)] for _ in range(rows)]
+        assignment = solve_assignment(cost)
+        assert len(set(assignment)) == rows, "Each row should get a distinct column"
+        best = min(
+            sum(cost[i][j] for i, j in enumerate(columns_))
+            for columns_ in itertools.permutations(range(columns), rows)
+        )
+        assert sum(cost[i][j] for i, j in enumerate(assignment)) == best, "Assignment should be minimal"
+
+    print("✓ Assignment solver test passed!\n")
+
+
+def test_match_optimal():
+    """Test matching with sparse candidates against greedy dispatch"""
+    print("Testing dispatch matching...")
+
+    # Greedy gives the first shipment its closest courier and strands the second
+    edges = {'s1': [('c1', 1.0), ('c2', 2.0)], 's2': [('c1', 1.5)]}
+    assert match_greedy(edges) == [('s1', 'c1', 1.0)]
+    assert match_optimal(edges) == [('s1', 'c2', 2.0), ('s2', 'c1', 1.5)], "Optimal should assign both"
+
+    # More shipments than couriers; shipments without candidates wait
+    edges = {'s1': [('c1', 3.0)], 's2': [('c1', 1.0)], 's3': []}
+    assert match_optimal(edges) == [('s2', 'c1', 1.0)]
+
+    rng = random.Random(8)
+    jobs = [(i, rng.gauss(-1.9441, 0.03), rng.gauss(30.0619, 0.03)) for i in range(60)]
+    couriers = [(100 + i, rng.gauss(-1.9441, 0.03), rng.gauss(30.0619, 0.03)) for i in range(80)]
+    edges = pickup_edges(jobs, couriers, max_km=3, per_job=6)
+    optimal, greedy = match_optimal(edges), match_greedy(edges)
+    assert len({courier_id for _, courier_id, _ in optimal}) == len(optimal), "Couriers should be used once"
+    assert all((courier_id, km) in edges[job_id] for job_id, courier_id, km in optimal), "Only candidates"
+    assert len(optimal) >= len(greedy)
+    if len(optimal) == len(greedy):
+        assert sum(km for *_, km in optimal) <= sum(km for *_, km in greedy) + 1e-9
+
+    print("✓ Dispatch matching test passed!\n")
+
+
+def test_run_window():
+    """Test that a window skips busy and inactive couriers, including ones taken while it matched"""
+    print("Testing dispatch window...")
+    from app import create_app, db, courier_index
+    from app.models.address_model import Address
+    from app.models.courier_model import Courier
+    from app.models.order_model import Order
+    from app.models.shipment_model import Shipment
+    from app.services import dispatch_service
+    from app.services.dispatch_service import DispatchService
+    from config import config, TestingConfig
+
+    class SQLiteTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'dispatch.db')
+
+    config['sqlite_dispatch'] = SQLiteTestingConfig
+    app = create_app('sqlite_dispatch')
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        courier_index.clear()
+        for courier_id, offset in ((7, 0.001), (8, 0.002), (9, 0.0), (11, 0.0), (12, 0.0)):
+            courier_index.update(courier_id, -1.9441 + offset, 30.0619)
+        db.session.add_all([
+            *(Courier(courier_id=courier_id, name=f'Courier {courier_id}', status='active')
+              for courier_id in (7, 8, 9, 10)),
+            # Still pinging, but not available for shipments
+            Courier(courier_id=11, name='Banned', status='banned'),
+            Courier(courier_id=12, name='Off shift', status='offshift'),
+            Address(address_id=1, latitude=-1.9441, longitude=30.0619),
+            Order(order_id=3, user_id=1, pickup_address_id=1),
+            Shipment(shipment_id=1, order_id=1, courier_id=9, status='picked_up'),
+            Shipment(shipment_id=2, order_id=2, pickup_latitude=-1.9441, pickup_longitude=30.0619),
+            # Picked up at the order's pickup address
+            Shipment(shipment_id=3, order_id=3)
+        ])
+        db.session.commit()
+
+        report, error = DispatchService.run_window()
+        assert error is None and report['assigned'] == 2, f"Both shipments should be assigned: {report}"
+        couriers = {s.shipment_id: s.courier_id for s in db.session.query(Shipment)}
+        assert couriers == {1: 9, 2: 7, 3: 8} or couriers == {1: 9, 2: 8, 3: 7}, \
+            f"Busy and inactive couriers should not get a shipment: {couriers}"
+
+        # Another process assigns the free courier between this window's read and its write
+        courier_index.update(10, -1.9441, 30.0619)
+        db.session.add(Shipment(shipment_id=4, order_id=4, pickup_latitude=-1.9441, pickup_longitude=30.0619))
+        db.session.commit()
+        match_optimal = dispatch_service.match_optimal
+
+        def match_during_other_window(edges):
+            with db.engine.begin() as connection:
+                connection.execute(Shipment.__table__.insert().values(
+                    shipment_id=5, order_id=5, courier_id=10, status='assigned'))
+            return match_optimal(edges)
+
+        dispatch_service.match_optimal = match_during_other_window
+        try:
+            report, error = DispatchService.run_window()
+        finally:
+            dispatch_service.match_optimal = match_optimal
+        assert report['assigned'] == 0 and report['waiting'] == 1, f"The taken courier should be skipped: {report}"
+        assert db.session.get(Shipment, 4).status == 'unassigned', "The shipment should wait for the next window"
+
+        # A courier going off shift between this window's read and its write is skipped too
+        courier_index.update(13, -1.9441, 30.0619)
+        db.session.add(Courier(courier_id=13, name='Courier 13', status='active'))
+        db.session.commit()
+
+        def match_during_shift_end(edges):
+            with db.engine.begin() as connection:
+                connection.execute(Courier.__table__.update().where(Courier.courier_id == 13).values(
+                    status='offshift'))
+            return match_optimal(edges)
+
+        dispatch_service.match_optimal = match_during_shift_end
+        try:
+            report, error = DispatchService.run_window()
+        finally:
+            dispatch_service.match_optimal = match_optimal
+        assert report['assigned'] == 0, f"The courier off shift should be skipped: {report}"
+        courier_index.clear()
+
+    print("✓ Dispatch window test passed!\n")
+
+
+if __name__ == '__main__':
+    test_solve_assignment()
+    test_match_optimal()
+    test_run_window()
+    print("✅ All dispatch tests passed successfully!")
@@ -0,0 +1,164 @@
+"""
+Test script to verify the ETA matrix cache
+"""
+from datetime import datetime, timezone
+
+from flask import Flask
+
+from app.common.eta_matrix import EtaMatrix
+from app.common.geo import decode, encode, haversine_km
+
+
+class FakeRouter:
+    """Straight-line times at 36 km/h, recording each many-to-one search"""
+
+    default_speed_kmh = 36
+
+    def __init__(self):
+        self.searches = []
+        self.version = 'v1'
+        self.off_road = set()  # Points that do not snap to the graph
+
+    def is_configured(self):
+        return True
+
+    def get_graph(self):
+        return self
+
+    def graph_version(self):
+        return self.version
+
+    def snap(self, lat, lon):
+        return None if (lat, lon) in self.off_road else (0, 0.0)
+
+    def travel_times(self, to_lat, to_lon, origins):
+        self.searches.append(len(origins))
+        if to_lat > 10:
+            return {}  # Nothing reaches the far north
+        return {key: haversine_km(lat, lon, to_lat, to_lon) * 100 for key, lat, lon in origins
+                if (lat, lon) not in self.off_road}
+
+
+def make_matrix(**config):
+    app = Flask(__name__)
+    app.config.update(ETA_CACHE_TIMEZONE='Africa/Kigali', ETA_CACHE_BUCKET_MINUTES=60, **config)
+    router = FakeRouter()
+    matrix = EtaMatrix()
+    matrix.init_app(app, router=router)
+    return matrix, router
+
+
+def test_eta_matrix():
+    """Test cell keys, batching of misses per destination and hit counting"""
+    print("Testing ETA matrix...")
+
+    matrix, router = make_matrix(ETA_CACHE_PRECISION=6)
+    noon = datetime(2024, 5, 1, 10, 30, tzinfo=timezone.utc).timestamp()  # 12:30 in Kigali
+    assert matrix.bucket(noon) == 12, "Buckets should follow the configured time zone"
+
+    origins = [(-1.9441, 30.0619), (-1.9700, 30.1044), (-1.9441, 30.0620)]
+    destinations = [(-1.9536, 30.0927), (20.0, 30.0)]
+    rows = matrix.matrix(origins, destinations, noon)
+    assert rows[0][0] == rows[2][0], "Points in one cell should share the cell's time"
+    assert rows[0][1] is None, "Unreachable pairs should be None"
+    assert sorted(router.searches) == [2, 2], "Misses should be computed once per destination cell"
+
+    matrix.matrix(origins, destinations, noon)
+    assert len(router.searches) == 2, "Repeated lookups should be served from the cache"
+    matrix.matrix(origins, destinations, noon + 3 * 3600)
+    assert len(router.searches) == 4, "Another time-of-day bucket should be computed separately"
+
+    stats = matrix.get_stats()
+    assert stats['hits'] == 4 and stats['misses'] == 8 and abs(stats['hit_rate'] - 1 / 3) < 1e-9
+
+    same_cell = matrix.eta(-1.9441, 30.0619, -1.9442, 30.0620, noon)
+    assert 0 < same_cell < 60 and matrix.get_stats()['same_cell'] == 1, "Same-cell trips are estimated directly"
+
+    print("✓ ETA matrix test passed!\n")
+
+
+def test_eta_matrix_eviction_and_warm_up():
+    """Test the LRU bound and warm-up from past trips"""
+    print("Testing ETA matrix eviction and warm-up...")
+
+    matrix, router = make_matrix(ETA_CACHE_MAX_ENTRIES=2)
+    noon = datetime(2024, 5, 1, 10, 30, tzinfo=timezone.utc).timestamp()
+    for lon in (30.05, 30.10, 30.15):
+        matrix.eta(-1.95, lon, -1.90, 30.0, noon)
+    assert matrix.get_stats()['evictions'] == 1, "Least recently used pair should be evicted"
+
+    matrix, router = make_matrix()
+    trips = [(-1.95, 30.05, -1.90, 30.0, noon)] * 5 + [(-1.95, 30.10, -1.90, 30.0, noon)]
+    assert matrix.warm_up(trips, max_pairs=1) == 1, "Only the most frequent pair should be warmed"
+    assert matrix.warm_up(trips, max_pairs=1) == 0, "Cached pairs should not be recomputed"
+    matrix.eta(-1.95, 30.05, -1.90, 30.0, noon)
+    stats = matrix.get_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 0, "Warm-up should not count as lookups"
+
+    print("✓ ETA matrix eviction and warm-up test passed!\n")
+
+
+def test_eta_matrix_graph_versions():
+    """Test that times are keyed by graph version and snap failures of cell centers are not cached"""
+    print("Testing ETA matrix graph versions...")
+
+    matrix, router = make_matrix()
+    noon = datetime(2024, 5, 1, 10, 30, tzinfo=timezone.utc).timestamp()
+    trip = (-1.95, 30.05, -1.90, 30.0, noon)
+    first = matrix.eta(*trip)
+    matrix.eta(*trip)
+    assert len(router.searches) == 1, "The same graph should be served from the cache"
+    router.version = 'v2'
+    assert matrix.eta(*trip) == first and len(router.searches) == 2, "A new graph should not reuse old times"
+
+    # While the graph loads, straight-line estimates are returned but not cached
+    router.version = None
+    assert matrix.eta(*trip) is not None and matrix.get_stats()['uncached'] == 1
+    router.version = 'v2'
+    matrix.eta(*trip)
+    assert len(router.searches) == 2, "Times from before the graph loaded should not replace cached ones"
+
+    # A cell center off the road is routed from the point itself, every time
+    router.off_road.add(tuple(decode(encode(-1.97, 30.10, 6))[:2]))
+    seconds = matrix.eta(-1.97, 30.10, -1.90, 30.0, noon)
+    assert seconds == haversine_km(-1.97, 30.10, -1.90, 30.0) * 100, "Should route from the actual point"
+    matrix.eta(-1.97, 30.10, -1.90, 30.0, noon)
+    assert router.searches[2:] == [1, 1, 1, 1], "Snap failures of a cell center should not be cached"
+    assert matrix.get_stats()['unsnapped'] == 2 and matrix.get_stats()['unreachable'] == 0
+
+    print("✓ ETA matrix graph version test passed!\n")
+
+
+def test_matrix_endpoint_limits():
+    """Test that only drivers and admins get matrices, of at most ROUTING_MATRIX_MAX_POINTS points"""
+    print("Testing matrix endpoint limits...")
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+
+    app = create_app('testing')
+    client = app.test_client()
+    with app.app_context():
+        tokens = {role: create_access_token(identity='1', additional_claims={'role': role})
+                  for role in ('user', 'driver')}
+
+    def post(role, count):
+        points = [[-1.95 + i * 0.001, 30.05] for i in range(count)]
+        return client.post('/api/v1/routing/matrix', headers={'Authorization': f'Bearer {tokens[role]}'},
+                           json={'origins': points, 'destinations': points})
+
+    max_points = app.config['ROUTING_MATRIX_MAX_POINTS']
+    assert max_points <= 25, "One request should not cost hundreds of routing searches"
+    assert post('user', 2).status_code == 403, "Customers should not request matrices"
+    assert post('driver', max_points + 1).status_code == 400, "Oversized matrices should be rejected"
+    response = post('driver', 2)
+    assert response.status_code == 200 and len(response.get_json()['data']['seconds']) == 2
+
+    print("✓ Matrix endpoint limits test passed!\n")
+
+
+if __name__ == '__main__':
+    test_eta_matrix()
+    test_eta_matrix_eviction_and_warm_up()
+    test_eta_matrix_graph_versions()
+    test_matrix_endpoint_limits()
+    print("✅ All ETA matrix tests passed successfully!")
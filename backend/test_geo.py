@@ -0,0 +1,102 @@
+"""
+Test script to verify geohashing and the courier index
+"""
+import heapq
+import os
+import random
+import tempfile
+
+from app.common.courier_index import CourierIndex
+from app.common.geo import decode, encode, haversine_km, neighbors
+
+
+def test_geohash():
+    """Test encoding, decoding and neighbors against known geohashes"""
+    print("Testing geohash...")
+
+    assert encode(57.64911, 10.40744, 11) == 'u4pruydqqvj', "Known point should encode to its geohash"
+    lat, lon, lat_error, lon_error = decode('u4pruydqqvj')
+    assert abs(lat - 57.64911) <= lat_error and abs(lon - 10.40744) <= lon_error, "Decode should contain the point"
+    assert sorted(neighbors('ezs42')) == sorted(
+        ['ezefp', 'ezs40', 'ezs41', 'ezefr', 'ezs43', 'ezefx', 'ezs48', 'ezs49']
+    ), "Neighbors should surround the cell"
+    assert round(haversine_km(-1.9441, 30.0619, -1.9441, 30.0619), 6) == 0, "Distance to itself should be zero"
+
+    print("✓ Geohash test passed!\n")
+
+
+def test_courier_index():
+    """Test k-nearest queries against a brute-force scan"""
+    print("Testing courier index...")
+
+    rng = random.Random(3)
+    positions = {i: (rng.gauss(-1.9441, 0.05), rng.gauss(30.0619, 0.05)) for i in range(2000)}
+    index = CourierIndex(precision=6, max_age=3600)
+    for courier_id, (lat, lon) in positions.items():
+        index.update(courier_id, lat, lon)
+
+    for _ in range(50):
+        lat, lon = rng.gauss(-1.9441, 0.1), rng.gauss(30.0619, 0.1)
+        expected = heapq.nsmallest(5, positions, key=lambda i: haversine_km(lat, lon, *positions[i]))
+        assert [i for i, _ in index.nearest(lat, lon, k=5)] == expected, "Index should match brute force"
+
+    nearby = index.nearest(-1.9441, 30.0619, k=2000, radius_km=1)
+    assert nearby and all(distance <= 1 for _, distance in nearby), "Radius should bound the results"
+
+    # Moving a courier re-buckets it; stale updates are ignored
+    index.update(0, 10.0, 10.0, timestamp=2e9)
+    assert index.nearest(10.0, 10.0, k=1)[0][0] == 0, "Moved courier should be found at its new cell"
+    assert not index.update(0, -1.9441, 30.0619, timestamp=1e9), "Older position should be ignored"
+
+    index.remove(0)
+    assert index.position(0) is None, "Removed courier should be gone"
+
+    print("✓ Courier index test passed!\n")
+
+
+def test_courier_location_access():
+    """Test that drivers only move their own courier and customers cannot see couriers"""
+    print("Testing courier location access...")
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.models.courier_model import Courier
+    from config import config, TestingConfig
+
+    class SQLiteTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'couriers.db')
+
+    config['sqlite_couriers'] = SQLiteTestingConfig
+    app = create_app('sqlite_couriers')
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add_all([Courier(courier_id=1, user_id=10, name='Own'), Courier(courier_id=2, name='Other')])
+        db.session.commit()
+        headers = {
+            role: {'Authorization': 'Bearer ' + create_access_token(identity=str(user_id),
+                                                                    additional_claims={'role': role})}
+            for role, user_id in (('driver', 10), ('admin', 1), ('user', 20))
+        }
+
+    position = {'latitude': -1.9441, 'longitude': 30.0619}
+    assert client.put('/api/v1/couriers/1/location', json=position, headers=headers['driver']).status_code == 200, \
+        "Drivers should report their own courier"
+    assert client.put('/api/v1/couriers/2/location', json=position, headers=headers['driver']).status_code == 403, \
+        "Drivers should not report another courier"
+    assert client.put('/api/v1/couriers/2/location', json=position, headers=headers['admin']).status_code == 200, \
+        "Admins should report any courier"
+
+    query = '/api/v1/couriers/nearby?latitude=-1.9441&longitude=30.0619'
+    assert client.get(query, headers=headers['user']).status_code == 403, "Customers should not see courier positions"
+    response = client.get(query, headers=headers['driver'])
+    assert response.status_code == 200 and response.get_json()['data']['total'] == 2, "Drivers should see couriers"
+
+    print("✓ Courier location access test passed!\n")
+
+
+if __name__ == '__main__':
+    test_geohash()
+    test_courier_index()
+    test_courier_location_access()
+    print("✅ All geo tests passed successfully!")
@@ -0,0 +1,125 @@
+"""
+Test script to verify bulk import readers
+"""
+import io
+import os
+import tempfile
+
+from app.common.importers import chunked, detect_format, read_records
+
+
+def test_read_records():
+    """Test CSV, JSON Lines and JSON parsing"""
+    print("Testing import readers...")
+
+    csv_rows = list(read_records(io.StringIO("name,email\n Jane , jane@example.com\n"), 'csv'))
+    assert csv_rows == [{'name': 'Jane', 'email': 'jane@example.com'}], "CSV values should be stripped"
+
+    jsonl_rows = list(read_records(io.StringIO('{"name": "Jane"}\n\n{broken\n'), 'jsonl'))
+    assert jsonl_rows == [{'name': 'Jane'}, None], "Bad JSON Lines rows should be yielded as None"
+
+    json_rows = list(read_records(io.StringIO('{"users": [{"name": "Jane"}]}'), 'json'))
+    assert json_rows == [{'name': 'Jane'}], "JSON 'users' list should be read"
+
+    assert detect_format('partners.CSV') == 'csv', "Format should follow the extension"
+    assert detect_format('<stdin>') == 'jsonl', "Unknown names should default to JSON Lines"
+
+    print("✓ Import readers test passed!\n")
+
+
+def test_chunked():
+    """Test fixed-size chunking"""
+    print("Testing chunking...")
+
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]], "Last chunk should hold the remainder"
+    assert list(chunked([], 2)) == [], "Empty input should yield no chunks"
+
+    print("✓ Chunking test passed!\n")
+
+
+def test_bulk_create_users():
+    """Test the bulk endpoint against SQLite: batched inserts, duplicates and a concurrent writer"""
+    print("Testing bulk user import...")
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import select
+    from app import create_app, db, password_hasher
+    from app.models.user_model import User
+    from config import config, TestingConfig
+
+    class SQLiteTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'import.db')
+
+    config['sqlite_import'] = SQLiteTestingConfig
+    app = create_app('sqlite_import')
+    client = app.test_client()
+
+    def user(email, **fields):
+        return {'name': 'Jane', 'email': email, 'password': 'SecurePass123', 'phone': '+250788123456', **fields}
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(User(name='Taken', email='taken@example.com', phone='+250788123456', password_hash='x'))
+        db.session.commit()
+        headers = {'Authorization': 'Bearer ' + create_access_token(identity='1', additional_claims={'role': 'admin'})}
+
+    response = client.post('/api/v1/users/bulk', headers=headers, json=[
+        user('a@example.com'), user('b@example.com'), user('a@example.com'),
+        user('taken@example.com'), user('not-an-email'), user('c@example.com'), user('d@example.com')
+    ])
+    body = response.get_json()
+    assert response.status_code == 200 and body['success'], "Import should finish"
+    report = body['data']
+    print(f"Report: created {report['created']}, failed {report['failed']}")
+    assert (report['created'], report['failed']) == (4, 3), "Duplicates and invalid rows should fail"
+    results = report['results']
+    assert [result['row'] for result in results] == list(range(1, 8)), "Results should follow input order"
+    assert results[2]['errors'] == {'email': ['Email appears more than once in this import']}
+    assert results[3]['errors'] == {'email': ['User with this email already exists']}
+    assert 'email' in results[4]['errors'] and results[4]['status'] == 'failed'
+    with app.app_context():
+        stored = dict(db.session.execute(select(User.email, User.user_id)).all())
+    for result in results:
+        if result['status'] == 'created':
+            assert set(result) == {'row', 'status', 'email', 'user_id'}, "Created rows should carry their user_id"
+            assert stored[result['email']] == result['user_id'], "Returned ids should follow row order"
+
+    # Another writer takes an email between the uniqueness check and the insert
+    hash_many = password_hasher.hash_many
+
+    def hash_many_then_race(passwords):
+        with db.engine.begin() as connection:
+            connection.execute(User.__table__.insert().values(
+                name='Racer', email='f@example.com', phone='+250788123456', password_hash='x',
+                role='user', is_active=True, token_version=0
+            ))
+        return hash_many(passwords)
+
+    password_hasher.hash_many = hash_many_then_race
+    try:
+        response = client.post('/api/v1/users/bulk', headers=headers,
+                               json=[user('e@example.com'), user('f@example.com'), user('g@example.com')])
+    finally:
+        password_hasher.hash_many = hash_many
+    results = response.get_json()['data']['results']
+    assert [result['status'] for result in results] == ['created', 'failed', 'created'], \
+        "Only the conflicting row should fail when the chunk is retried row by row"
+    assert results[1]['errors'] == {'email': ['User with this email already exists']}
+    with app.app_context():
+        stored = dict(db.session.execute(select(User.email, User.user_id)).all())
+        assert stored['e@example.com'] == results[0]['user_id'] and stored['g@example.com'] == results[2]['user_id']
+        assert db.session.scalar(select(db.func.count()).select_from(User)) == 8, "No row should be lost"
+
+    # Imports take turns on the bulk hashing pool
+    with password_hasher.bulk_import():
+        response = client.post('/api/v1/users/bulk', headers=headers, json=[user('h@example.com')])
+    assert response.status_code == 503, "A second concurrent import should be turned away"
+    assert client.post('/api/v1/users/bulk', headers=headers, json=[user('h@example.com')]).status_code == 200
+
+    print("✓ Bulk user import test passed!\n")
+
+
+if __name__ == '__main__':
+    test_read_records()
+    test_chunked()
+    test_bulk_create_users()
+    print("✅ All importer tests passed successfully!")
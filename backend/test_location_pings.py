@@ -0,0 +1,223 @@
+"""
+Test script to verify location ping buffering
+"""
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+from app.common.location_pings import LocationPingBuffer, PingBufferFull
+
+
+def make_buffer(writer, **config):
+    """Buffer on a bare app with the background thread disabled"""
+    app = Flask(__name__)
+    app.config.update(LOCATION_PING_FLUSH_INTERVAL=0, **config)
+    # Write failures are provoked on purpose; keep their error logs out of the test output
+    app.logger.disabled = True
+    buffer = LocationPingBuffer()
+    buffer.init_app(app, writer=writer)
+    return buffer
+
+
+def test_ping_buffer():
+    """Test deduplication, coalescing and backpressure"""
+    print("Testing ping buffer...")
+
+    written = []
+    buffer = make_buffer(written.extend, LOCATION_PING_MIN_INTERVAL=5, LOCATION_PING_MAX_PENDING=4)
+
+    counts = buffer.submit([(1, 100, 0.0, 0.0), (1, 100, 0.0, 0.0), (1, 102, 0.0, 0.0), (2, 100, 0.0, 0.0)])
+    assert counts == {'accepted': 2, 'duplicates': 1, 'coalesced': 1}, "Repeats and close pings should be dropped"
+    assert buffer.submit([(1, 110, 0.0, 0.0)])['accepted'] == 1, "Pings past min_interval should be kept"
+
+    try:
+        buffer.submit([(3, 100, 0.0, 0.0), (4, 100, 0.0, 0.0)])
+        assert False, "A batch that does not fit should be refused"
+    except PingBufferFull:
+        pass
+    assert buffer.pending() == 3, "A refused batch should not be partially queued"
+
+    assert buffer.flush() == 3 and buffer.pending() == 0, "Flush should write everything queued"
+    assert sorted(written) == [(1, 100, 0.0, 0.0), (1, 110, 0.0, 0.0), (2, 100, 0.0, 0.0)]
+
+    print("✓ Ping buffer test passed!\n")
+
+
+def test_ping_flush_failure():
+    """Test that a failed write is requeued for the next flush"""
+    print("Testing ping flush failure...")
+
+    written = []
+    failures = [RuntimeError('database unavailable')]
+
+    def writer(batch):
+        if failures:
+            raise failures.pop()
+        written.extend(batch)
+
+    buffer = make_buffer(writer)
+    buffer.submit([(1, 100, 0.0, 0.0), (2, 100, 0.0, 0.0)])
+    assert buffer.flush() == 0 and buffer.pending() == 2, "Failed batch should go back in the buffer"
+    assert buffer.flush() == 2 and len(written) == 2, "Requeued batch should be written on retry"
+
+    stats = buffer.get_stats()
+    assert stats['flush_errors'] == 1 and stats['flushed'] == 2 and stats['dropped'] == 0
+
+    print("✓ Ping flush failure test passed!\n")
+
+
+def test_ping_flush_isolates_bad_rows():
+    """Test that a batch failing every retry is split and only its unwritable rows dropped"""
+    print("Testing ping flush with an unwritable row...")
+    from sqlalchemy import exc
+
+    written = []
+    calls = []
+
+    def writer(batch):
+        calls.append(len(batch))
+        if any(courier_id == 3 for courier_id, _, _, _ in batch):
+            raise ValueError('bad row')
+        written.extend(batch)
+
+    buffer = make_buffer(writer, LOCATION_PING_FLUSH_RETRIES=2)
+    buffer.submit([(courier_id, 100, 0.0, 0.0) for courier_id in range(1, 6)])
+    for _ in range(2):
+        assert buffer.flush() == 0 and buffer.pending() == 5, "Failed batch should be retried whole first"
+    assert buffer.flush() == 4 and buffer.pending() == 0, "Rows around the bad one should be written"
+    assert sorted(courier_id for courier_id, _, _, _ in written) == [1, 2, 4, 5]
+    stats = buffer.get_stats()
+    assert stats['failed_rows'] == 1 and stats['flush_errors'] == 2, f"Unexpected stats: {stats}"
+
+    # Lost connections keep the rows, however many times the write failed
+    def offline(batch):
+        raise exc.OperationalError('INSERT', {}, Exception('connection refused'))
+
+    buffer = make_buffer(offline, LOCATION_PING_FLUSH_RETRIES=0)
+    buffer.submit([(1, 100, 0.0, 0.0), (2, 100, 0.0, 0.0)])
+    assert buffer.flush() == 0 and buffer.pending() == 2, "Rows should wait for the database"
+    assert buffer.get_stats()['failed_rows'] == 0
+
+    print("✓ Ping flush isolation test passed!\n")
+
+
+def create_ping_app():
+    """App on SQLite with a driver linked to courier 1, and tokens per role"""
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.models.courier_model import Courier
+    from config import config, TestingConfig
+
+    class SQLiteTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'pings.db')
+
+    config['sqlite_pings'] = SQLiteTestingConfig
+    app = create_app('sqlite_pings')
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add_all([Courier(courier_id=1, user_id=10, name='Own'), Courier(courier_id=2, name='Other')])
+        db.session.commit()
+        headers = {
+            role: {'Authorization': 'Bearer ' + create_access_token(identity=str(user_id),
+                                                                    additional_claims={'role': role})}
+            for role, user_id in (('driver', 10), ('admin', 1))
+        }
+    return app, headers
+
+
+def test_ping_endpoint_rejects_old_pings():
+    """Test that pings older than the retention window are rejected"""
+    print("Testing ping age limit...")
+
+    app, headers = create_ping_app()
+    now = time.time()
+    response = app.test_client().post('/api/v1/couriers/pings', headers=headers['admin'], json={'pings': [
+        {'courier_id': 1, 'latitude': -1.9441, 'longitude': 30.0619, 'recorded_at': now - 60},
+        {'courier_id': 1, 'latitude': -1.9441, 'longitude': 30.0619, 'recorded_at': now - 31 * 86400},
+        {'courier_id': 1, 'latitude': -1.9441, 'longitude': 30.0619, 'recorded_at': -5}
+    ]})
+    report = response.get_json()['data']
+    assert response.status_code == 202 and report['accepted'] == 1, f"Only the recent ping should pass: {report}"
+    assert [error['index'] for error in report['errors']] == [1, 2]
+    assert report['errors'][0]['errors'] == {'recorded_at': ['Must be within the last 30 days']}
+
+    print("✓ Ping age limit test passed!\n")
+
+
+def test_ping_endpoint_checks_courier():
+    """Test that drivers can only report pings for their own courier"""
+    print("Testing ping courier ownership...")
+    from app import courier_index
+
+    app, headers = create_ping_app()
+    client = app.test_client()
+    pings = {'pings': [{'courier_id': 1, 'latitude': -1.95, 'longitude': 30.06},
+                       {'courier_id': 2, 'latitude': -1.95, 'longitude': 30.06}]}
+
+    report = client.post('/api/v1/couriers/pings', headers=headers['driver'], json=pings).get_json()['data']
+    assert report['accepted'] == 1 and report['errors'][0]['index'] == 1, f"Other couriers should be refused: {report}"
+    assert courier_index.position(2) is None, "A refused ping should not move the courier"
+
+    report = client.post('/api/v1/couriers/pings', headers=headers['admin'], json=pings).get_json()['data']
+    assert report['rejected'] == 0, "Admins may report any courier"
+
+    print("✓ Ping courier ownership test passed!\n")
+
+
+def test_partition_created_concurrently():
+    """Test that losing the race to create a day partition does not fail the write"""
+    print("Testing concurrent partition creation...")
+    from datetime import date, datetime, timezone
+    from unittest import mock
+    from sqlalchemy import exc
+    from app import db
+    from app.database import partitions
+    from app.database.db import transaction
+    from app.models.location_ping_model import LocationPing
+
+    class PostgresError(Exception):
+        def __init__(self, pgcode):
+            super().__init__(pgcode)
+            self.pgcode = pgcode
+
+    def created_elsewhere(statement, *args, **kwargs):
+        raise exc.ProgrammingError(str(statement), {}, PostgresError('42P07'))
+
+    def broken(statement, *args, **kwargs):
+        raise exc.ProgrammingError(str(statement), {}, PostgresError('42501'))
+
+    app, _ = create_ping_app()
+    table = LocationPing.__table__
+    with app.app_context():
+        with transaction():
+            with mock.patch.object(db.session, 'execute', created_elsewhere):
+                names = partitions.ensure_daily_partitions(table, [date(2024, 1, 31)])
+            db.session.execute(table.insert().values(
+                courier_id=1, recorded_at=datetime(2024, 1, 31, tzinfo=timezone.utc), latitude=0.0, longitude=0.0,
+                geohash='s00000000'
+            ))
+        assert names == ['location_ping_20240131'] and 'location_ping_20240131' in partitions._known_partitions, \
+            "A partition created by another worker should count as present"
+        assert db.session.query(LocationPing).count() == 1, "The rest of the transaction should commit"
+
+        try:
+            with transaction():
+                with mock.patch.object(db.session, 'execute', broken):
+                    partitions.ensure_daily_partitions(table, [date(2024, 2, 1)])
+            assert False, "Other DDL errors should be raised"
+        except exc.ProgrammingError:
+            pass
+
+    print("✓ Concurrent partition creation test passed!\n")
+
+
+if __name__ == '__main__':
+    test_ping_buffer()
+    test_ping_flush_failure()
+    test_ping_flush_isolates_bad_rows()
+    test_ping_endpoint_rejects_old_pings()
+    test_ping_endpoint_checks_courier()
+    test_partition_created_concurrently()
+    print("✅ All location ping tests passed successfully!")
@@ -0,0 +1,100 @@
+"""
+Test script to verify login throttling
+"""
+from app.common.rate_limiter import LoginRateLimiter, MemoryRateLimitStore, RedisRateLimitStore
+
+
+class FakeRedis:
+    """Minimal stand-in for a Redis client"""
+
+    def __init__(self):
+        self.store = {}
+
+    def incr(self, key, amount=1):
+        self.store[key] = int(self.store.get(key, 0)) + amount
+        return self.store[key]
+
+    def expire(self, key, ttl):
+        pass
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+def make_limiter(store):
+    """Build a limiter allowing 3 attempts per IP and 2 failures per email"""
+    from app import create_app
+
+    app = create_app('testing')
+    app.config.update(
+        LOGIN_RATE_LIMIT_ENABLED=True,
+        LOGIN_RATE_LIMIT_WINDOW=3600,
+        LOGIN_RATE_LIMIT_PER_IP=3,
+        LOGIN_RATE_LIMIT_PER_EMAIL=2
+    )
+    limiter = LoginRateLimiter()
+    limiter.init_app(app, store=store)
+    return limiter
+
+
+def test_login_rate_limiter():
+    """Test per-IP attempt and per-(IP, email) failure limits"""
+    print("Testing login rate limiter...")
+
+    for store in (MemoryRateLimitStore(), RedisRateLimitStore(FakeRedis())):
+        limiter = make_limiter(store)
+
+        # Failures lock the email for the address they come from
+        assert limiter.check('10.0.0.1', 'a@example.com') is None, "First attempt should pass"
+        limiter.record_failure('10.0.0.1', 'a@example.com')
+        assert limiter.check('10.0.0.1', 'A@example.com') is None, "Second attempt should pass"
+        limiter.record_failure('10.0.0.1', 'A@example.com')
+        assert limiter.check('10.0.0.1', 'a@example.com') > 0, "Email over its failure limit should be throttled"
+
+        # Someone else's failures do not lock the owner out
+        assert limiter.check('10.0.0.2', 'a@example.com') is None, "Other addresses should still pass"
+
+        # A successful login clears the failures
+        limiter.reset('10.0.0.1', 'a@example.com')
+        assert limiter.check('10.0.0.1', 'a@example.com') is None, "Reset email should pass again"
+
+        # Every attempt counts against the client IP
+        for _ in range(2):
+            assert limiter.check('10.0.0.9', 'b@example.com') is None
+        assert limiter.check('10.0.0.9', 'c@example.com') is None, "Third attempt from an IP should pass"
+        assert limiter.check('10.0.0.9', 'd@example.com') > 0, "IP over its attempt limit should be throttled"
+
+        stats = limiter.get_stats()
+        assert stats['rejected_ip_email'] == 1 and stats['rejected_ip'] == 1, "Rejections should be counted"
+
+    print("✓ Login rate limiter test passed!\n")
+
+
+def test_trusted_proxies():
+    """Test that client addresses come from X-Forwarded-For only behind trusted proxies"""
+    print("Testing trusted proxies...")
+    from flask import request
+    from app import create_app
+    from config import config, TestingConfig
+
+    class ProxiedTestingConfig(TestingConfig):
+        TRUSTED_PROXIES = 1
+
+    config['proxied_testing'] = ProxiedTestingConfig
+    for name, expected in (('testing', '127.0.0.1'), ('proxied_testing', '203.0.113.7')):
+        app = create_app(name)
+        app.add_url_rule('/whoami', 'whoami', lambda: request.remote_addr)
+        response = app.test_client().get('/whoami', headers={'X-Forwarded-For': '203.0.113.7'})
+        assert response.get_data(as_text=True) == expected, f"{name} should see {expected}"
+
+    print("✓ Trusted proxies test passed!\n")
+
+
+if __name__ == '__main__':
+    test_login_rate_limiter()
+    test_trusted_proxies()
+    print("✅ All rate limiter tests passed successfully!")
@@ -0,0 +1,179 @@
+"""
+Test script to verify read replica routing
+"""
+import os
+import tempfile
+
+from sqlalchemy import exc, select, text
+
+from config import config, TestingConfig
+
+
+def create_replica_app():
+    """App with a SQLite primary and two SQLite replicas, each holding one user"""
+    from app import create_app, db
+    from app.models.user_model import User
+
+    directory = tempfile.mkdtemp()
+
+    class ReplicaTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, 'primary.db')
+        SQLALCHEMY_REPLICA_URIS = ['sqlite:///' + os.path.join(directory, f'replica_{i}.db') for i in range(2)]
+        REPLICA_HEALTH_CHECK_INTERVAL = 0.05
+        REPLICA_RETRY_AFTER = 60
+
+    config['replica_testing'] = ReplicaTestingConfig
+    app = create_app('replica_testing')
+
+    with app.app_context():
+        engines = db.engines
+        for name, engine in (('primary', engines[None]), ('replica_0', engines['replica_0']),
+                             ('replica_1', engines['replica_1'])):
+            User.__table__.create(engine)
+            with engine.begin() as connection:
+                connection.execute(User.__table__.insert().values(
+                    user_id=1, name=name, phone='+1234567890', email=f'{name}@example.com',
+                    password_hash='x', role='user', is_active=True, token_version=0
+                ))
+    return app
+
+
+def read_name(key='user:1', router=None):
+    """Name of user 1 in whichever database answers the read"""
+    from app import db, replica_router
+    from app.models.user_model import User
+
+    with (router or replica_router).reading(key):
+        name = db.session.execute(select(User.name).where(User.user_id == 1)).scalar()
+    db.session.rollback()
+    return name
+
+
+def read_fails():
+    """Whether the next read raises a database error"""
+    from app import db
+
+    try:
+        read_name()
+    except exc.OperationalError:
+        db.session.rollback()
+        return True
+    return False
+
+
+def test_round_robin_and_fallback():
+    """Test round-robin reads, skipping an unhealthy replica and falling back to the primary"""
+    print("Testing replica round-robin and fallback...")
+    from app import db, replica_router
+
+    app = create_replica_app()
+
+    with app.app_context():
+        names = [read_name() for _ in range(4)]
+        print(f"Reads: {names}")
+        assert sorted(names) == ['replica_0', 'replica_0', 'replica_1', 'replica_1'], \
+            "Reads should alternate between the replicas"
+
+        # A query failing on a replica takes it out of rotation
+        with db.engines['replica_0'].begin() as connection:
+            connection.execute(text('DROP TABLE users'))
+        assert read_fails(), "The read on the broken replica should fail"
+        assert [read_name() for _ in range(3)] == ['replica_1'] * 3, "Reads should skip the failed replica"
+
+        # With no healthy replica, reads stay on the primary
+        with db.engines['replica_1'].begin() as connection:
+            connection.execute(text('DROP TABLE users'))
+        assert read_fails(), "The read on the broken replica should fail"
+        assert read_name() == 'primary', "Reads should fall back to the primary"
+
+        stats = replica_router.get_stats()
+        print(f"Stats: {stats}")
+        assert stats['healthy_replicas'] == 0 and stats['replica_failures'] == 2, "Failures should be counted once"
+        assert stats['fallback_reads'] >= 1, "Fallback reads should be counted"
+
+    print("✓ Replica round-robin and fallback test passed!\n")
+
+
+def test_read_your_writes():
+    """Test that reads of a recently written record stay on the primary"""
+    print("Testing read-your-writes pinning...")
+    from app import db, replica_router
+    from app.models.user_model import User
+
+    app = create_replica_app()
+
+    with app.app_context():
+        assert read_name('user:1').startswith('replica_'), "Reads should start on a replica"
+
+        # Writes inside a reading block still go to the primary
+        with replica_router.reading('user:2'):
+            db.session.add(User(user_id=2, name='written', phone='+1234567890', email='written@example.com',
+                                password_hash='x', role='user'))
+            db.session.flush()
+        db.session.commit()
+        with db.engines[None].connect() as connection:
+            assert connection.execute(text('SELECT name FROM users WHERE user_id = 2')).scalar() == 'written'
+
+        replica_router.record_write('user:1')
+        assert read_name('user:1') == 'primary', "Reads of a written record should be pinned to the primary"
+        assert read_name('user:3') in ('replica_0', 'replica_1'), "Other reads should still use replicas"
+        assert replica_router.get_stats()['pinned_reads'] == 1, "Pinned reads should be counted"
+
+    print("✓ Read-your-writes test passed!\n")
+
+
+def test_read_your_writes_across_workers():
+    """Test that a write pins reads in every worker sharing the recent-writes store"""
+    print("Testing read-your-writes across workers...")
+    from app import replica_router
+    from app.common.cache import RedisCacheBackend
+    from app.common.replicas import ReplicaRouter
+    from test_cache import FakeRedis
+
+    app = create_replica_app()
+    client = FakeRedis()
+    # Two gunicorn workers: separate routers over the same Redis
+    replica_router.init_app(app, recent_writes_backend=RedisCacheBackend(client, ttl=5, prefix='writes:'))
+    other_worker = ReplicaRouter()
+    other_worker.init_app(app, recent_writes_backend=RedisCacheBackend(client, ttl=5, prefix='writes:'))
+
+    with app.app_context():
+        replica_router.record_write('user:1')
+        assert read_name('user:1', other_worker) == 'primary', "Other workers should see the write too"
+        assert read_name('user:3', other_worker).startswith('replica_'), "Other reads should still use replicas"
+
+    print("✓ Read-your-writes across workers test passed!\n")
+
+
+def test_background_health_checks():
+    """Test that a replica failing SELECT 1 is taken out of rotation without a failed read"""
+    print("Testing background replica health checks...")
+    import time
+    from sqlalchemy import event
+    from app import db, replica_router
+
+    app = create_replica_app()
+
+    with app.app_context():
+        assert read_name().startswith('replica_'), "Reads should start on a replica"
+
+        def refuse(*args):
+            raise ConnectionRefusedError('replica_1 is down')
+
+        event.listen(db.engines['replica_1'], 'do_connect', refuse)
+        db.engines['replica_1'].dispose()
+        deadline = time.monotonic() + 5
+        while replica_router.get_stats()['healthy_replicas'] == 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert replica_router.get_stats()['healthy_replicas'] == 1, "The failed check should mark the replica down"
+        assert [read_name() for _ in range(3)] == ['replica_0'] * 3, "Reads should skip it without failing"
+
+    print("✓ Background health check test passed!\n")
+
+
+if __name__ == '__main__':
+    test_round_robin_and_fallback()
+    test_read_your_writes()
+    test_read_your_writes_across_workers()
+    test_background_health_checks()
+    print("✅ All replica tests passed successfully!")
@@ -0,0 +1,134 @@
+"""
+Test script to verify the road graph and routing engine
+"""
+import csv
+import os
+import random
+import tempfile
+
+from flask import Flask
+
+from app.common.road_graph import RoadGraph
+from app.common.routing import RoutingEngine
+
+
+def write_edges(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'target', 'source_lat', 'source_lon', 'target_lat', 'target_lon',
+                         'speed_kmh', 'oneway'])
+        writer.writerows(rows)
+
+
+def random_grid(path, size, seed):
+    """Grid with random speeds, one-way streets and missing blocks"""
+    rng = random.Random(seed)
+    point = {(r, c): (-1.95 + r * 0.001, 30.05 + c * 0.001) for r in range(size) for c in range(size)}
+    rows = []
+    for (r, c), (lat, lon) in point.items():
+        for neighbor in ((r, c + 1), (r + 1, c)):
+            if neighbor in point and rng.random() > 0.1:
+                rows.append([r * size + c, neighbor[0] * size + neighbor[1], lat, lon, *point[neighbor],
+                             rng.choice([20, 30, 50]), int(rng.random() < 0.2)])
+    write_edges(path, rows)
+
+
+def test_road_graph():
+    """Test loading, one-way edges and that every search method agrees with Dijkstra"""
+    print("Testing road graph...")
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'line.csv')
+    write_edges(path, [[10, 20, -1.95, 30.05, -1.95, 30.06, 36, 1], [20, 30, -1.95, 30.06, -1.95, 30.07, 36, 0]])
+    graph = RoadGraph.load(path)
+    a, b, c = graph.index_of[10], graph.index_of[20], graph.index_of[30]
+    assert len(graph) == 3 and graph.edge_count == 3, "Two-way edges should be stored in both directions"
+    route = graph.shortest_path(a, c)
+    assert route.nodes == [a, b, c] and abs(route.seconds - route.meters / 10) < 1e-6, "36 km/h is 10 m/s"
+    assert graph.shortest_path(c, a) is None, "One-way edge should not be traversed backwards"
+    assert os.path.exists(path + '.csr') and len(RoadGraph.load(path)) == 3, "Graph should load from its cache"
+    cached = RoadGraph.load(path)
+    assert cached.shortest_path(a, c).seconds == route.seconds and list(cached.offsets) == list(graph.offsets)
+
+    # A damaged or foreign cache is ignored and rewritten
+    with open(path + '.csr', 'r+b') as f:
+        f.truncate(100)
+    assert len(RoadGraph.load(path)) == 3 and os.path.getsize(path + '.csr') > 100, "Truncated cache should be rebuilt"
+    with open(path + '.csr', 'wb') as f:
+        f.write(b'\x80\x04\x95' + b'\x00' * 200)
+    assert len(RoadGraph.load(path)) == 3, "A file that is not a graph cache should be ignored"
+
+    path = os.path.join(directory, 'grid.csv')
+    random_grid(path, 15, seed=6)
+    graph = RoadGraph.load(path, cache=False)
+    graph.precompute_landmarks(4)
+    rng = random.Random(2)
+    for _ in range(100):
+        source, target = rng.randrange(len(graph)), rng.randrange(len(graph))
+        expected = graph.shortest_path(source, target, 'dijkstra')
+        for method in ('astar', 'alt'):
+            route = graph.shortest_path(source, target, method)
+            assert (route is None) == (expected is None), f"{method} should agree on reachability"
+            if route is not None:
+                assert abs(route.seconds - expected.seconds) < 1e-6, f"{method} should find the fastest route"
+        if expected is not None:
+            assert abs(graph.distances(target, [source], reverse=True)[source] - expected.seconds) < 1e-6
+
+    print("✓ Road graph test passed!\n")
+
+
+def test_routing_engine():
+    """Test snapping, routes and many-to-one travel times"""
+    print("Testing routing engine...")
+
+    path = os.path.join(tempfile.mkdtemp(), 'grid.csv')
+    random_grid(path, 10, seed=1)
+    app = Flask(__name__)
+    app.config.update(ROUTING_GRAPH_FILE=path, ROUTING_LANDMARKS=2, ROUTING_MAX_SNAP_KM=0.5)
+    engine = RoutingEngine(app)
+    assert engine.get_graph() is not None and engine.is_ready(), "The graph should be loaded in the background"
+    assert engine.get_stats()['ready'] and engine.get_stats()['load_seconds'] is not None
+
+    assert engine.snap(10.0, 10.0) is None, "Points far from the network should not snap"
+    route, error = engine.route(-1.95, 30.05, -1.943, 30.058)
+    assert error is None and route['seconds'] > 0 and route['path'][0] == [-1.95, 30.05]
+    _, error = engine.route(10.0, 10.0, -1.943, 30.058)
+    assert error.startswith('No road'), "Off-network origin should be reported"
+
+    times = engine.travel_times(-1.945, 30.055, [('a', -1.95, 30.05), ('b', -1.945, 30.055), ('c', 10.0, 10.0)])
+    assert times['b'] < times.get('a', float('inf')) and 'c' not in times
+    assert engine.get_stats()['routes'] == 1
+
+    print("✓ Routing engine test passed!\n")
+
+
+def test_routing_engine_load_failure():
+    """Test that a failed graph load is not retried by every query"""
+    print("Testing routing engine load failures...")
+    import time
+
+    path = os.path.join(tempfile.mkdtemp(), 'missing.csv')
+    app = Flask(__name__)
+    app.config.update(ROUTING_GRAPH_FILE=path, ROUTING_RETRY_AFTER=60)
+    app.logger.disabled = True
+    engine = RoutingEngine(app)
+    assert engine.get_graph() is None, "A missing graph file should not load"
+
+    started = time.monotonic()
+    assert all(engine.get_graph() is None for _ in range(100)), "No graph while backing off"
+    assert time.monotonic() - started < 0.1, "Queries should not wait while backing off"
+    assert engine.get_stats()['load_failures'] == 1, "The file should only be tried once"
+
+    # Once the window is over, the next query tries again
+    random_grid(path, 3, seed=1)
+    engine._retry_at = 0.0
+    assert engine.get_graph() is not None and engine.get_stats()['load_failures'] == 1
+
+    print("✓ Routing engine load failure test passed!\n")
+
+
+if __name__ == '__main__':
+    test_road_graph()
+    test_routing_engine()
+    test_routing_engine_load_failure()
+    print("✅ All routing tests passed successfully!")
@@ -0,0 +1,100 @@
+"""
+Test script to verify schema validation
+"""
+from app.common.validators import (
+    COURIER_LOCATION_SCHEMA, LOGIN_SCHEMA, RECORD_ERRORS, USER_SCHEMA, USER_UPDATE_SCHEMA, validate_body
+)
+
+
+def test_user_schema():
+    """Test structured field errors for new users"""
+    print("Testing user schema...")
+
+    record = {
+        'name': 'Jane Doe',
+        'email': 'jane@example.com',
+        'password': 'password123',
+        'phone': '+250 781 234 567',
+        'unknown': 'dropped'
+    }
+    payload, errors = USER_SCHEMA.validate(record)
+    assert errors is None, "Valid record should have no errors"
+    assert 'unknown' not in payload, "Unknown keys should be dropped"
+
+    _, errors = USER_SCHEMA.validate({'email': 'not-an-email', 'password': 'short', 'phone': 250, 'role': 'root'})
+    assert errors == {
+        'name': ['This field is required'],
+        'email': ['Invalid email format'],
+        'password': ['Must be at least 8 characters long'],
+        'phone': ['Must be a string'],
+        'role': ['Must be one of: user, admin, driver']
+    }, f"Unexpected errors: {errors}"
+
+    results = USER_SCHEMA.validate_many([record, ['not', 'a', 'record']])
+    assert results[0][1] is None, "Batch should validate each record"
+    assert results[1] == (None, {RECORD_ERRORS: ['Expected a JSON object']}), "Non-objects should be rejected"
+
+    print("✓ User schema test passed!\n")
+
+
+def test_user_update_schema():
+    """Test partial validation for updates"""
+    print("Testing user update schema...")
+
+    payload, errors = USER_UPDATE_SCHEMA.validate({'address': ''})
+    assert errors is None and payload == {'address': ''}, "Omitted fields are fine and address may be cleared"
+
+    _, errors = USER_UPDATE_SCHEMA.validate({'name': ''})
+    assert errors == {'name': ['This field may not be empty']}, "Required fields may not be emptied"
+
+    print("✓ User update schema test passed!\n")
+
+
+def test_validate_body():
+    """Test the request body decorator"""
+    print("Testing validate_body decorator...")
+
+    from flask import g
+    from app import create_app
+
+    app = create_app('testing')
+
+    @validate_body(LOGIN_SCHEMA)
+    def login(data):
+        return data
+
+    with app.test_request_context(json={'email': 'jane@example.com', 'password': 'secret', 'extra': 1}):
+        assert login() == {'email': 'jane@example.com', 'password': 'secret'}, "Controller should get the payload"
+        assert g.request_schema.sensitive == {'password'}, "Password should be marked sensitive"
+
+    with app.test_request_context(json={'email': 'jane@example.com'}):
+        _, status_code = login()
+        assert status_code == 400, "Missing fields should be rejected"
+
+    with app.test_request_context(data='email=jane'):
+        _, status_code = login()
+        assert status_code == 400, "Non-JSON bodies should be rejected"
+
+    print("✓ validate_body decorator test passed!\n")
+
+
+def test_courier_location_schema():
+    """Test that coordinates must be real numbers"""
+    print("Testing courier location schema...")
+
+    payload, errors = COURIER_LOCATION_SCHEMA.validate({'latitude': -1.9441, 'longitude': 30})
+    assert errors is None and payload == {'latitude': -1.9441, 'longitude': 30}, "Numbers should pass"
+
+    _, errors = COURIER_LOCATION_SCHEMA.validate({'latitude': True, 'longitude': False})
+    assert errors == {'latitude': ['Must be a number'], 'longitude': ['Must be a number']}, \
+        f"Booleans should not pass as numbers: {errors}"
+
+    print("✓ Courier location schema test passed!\n")
+
+
+if __name__ == '__main__':
+    test_user_schema()
+    test_user_update_schema()
+    test_validate_body()
+    test_courier_location_schema()
+    print("✅ All validator tests passed successfully!")
@@ -0,0 +1,14 @@
+-- 003_add_geohash.sql
+-- Geohash columns for prefix (proximity) lookups on addresses and courier positions.
+-- Geohashes are written by the backend (app/common/geo.py); a cell and its
+-- neighbors are found with LIKE 'prefix%' through the text_pattern_ops indexes.
+BEGIN;
+SET search_path TO quickdrop;
+ALTER TABLE address ADD COLUMN IF NOT EXISTS geohash VARCHAR(12);
+ALTER TABLE courier ADD COLUMN IF NOT EXISTS latitude DECIMAL(9,6);
+ALTER TABLE courier ADD COLUMN IF NOT EXISTS longitude DECIMAL(9,6);
+ALTER TABLE courier ADD COLUMN IF NOT EXISTS geohash VARCHAR(12);
+ALTER TABLE courier ADD COLUMN IF NOT EXISTS location_updated_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS idx_address_geohash ON address(geohash text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_courier_geohash ON courier(geohash text_pattern_ops);
+COMMIT;
@@ -0,0 +1,15 @@
+-- 004_create_location_ping.sql
+-- Courier location history, range-partitioned by day on recorded_at.
+-- The backend creates upcoming day partitions as it writes and drops expired
+-- ones with `flask pings partitions`.
+BEGIN;
+SET search_path TO quickdrop;
+CREATE TABLE IF NOT EXISTS location_ping (
+    courier_id      INTEGER NOT NULL,
+    recorded_at     TIMESTAMPTZ NOT NULL,
+    latitude        DOUBLE PRECISION NOT NULL,
+    longitude       DOUBLE PRECISION NOT NULL,
+    geohash         VARCHAR(12) NOT NULL,
+    PRIMARY KEY (courier_id, recorded_at) -- makes retried batches idempotent (ON CONFLICT DO NOTHING)
+) PARTITION BY RANGE (recorded_at);
+COMMIT;
@@ -0,0 +1,11 @@
+-- 005_add_shipment_dispatch.sql
+-- Columns read and written by the dispatcher (app/services/dispatch_service.py).
+-- The pickup point defaults to the order's pickup address (see 009); these
+-- columns override it.
+BEGIN;
+SET search_path TO quickdrop;
+ALTER TABLE shipment ADD COLUMN IF NOT EXISTS pickup_latitude DOUBLE PRECISION;
+ALTER TABLE shipment ADD COLUMN IF NOT EXISTS pickup_longitude DOUBLE PRECISION;
+ALTER TABLE shipment ADD COLUMN IF NOT EXISTS assigned_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS idx_shipment_status_shipment ON shipment(status, shipment_id);
+COMMIT;
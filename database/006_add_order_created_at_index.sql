@@ -0,0 +1,7 @@
+-- 006_add_order_created_at_index.sql
+-- Backs the ETA cache warm-up (app/services/eta_service.py), which reads the
+-- most recent orders with their pickup and dropoff addresses.
+BEGIN;
+SET search_path TO quickdrop;
+CREATE INDEX IF NOT EXISTS idx_order_created_at ON "order"(created_at);
+COMMIT;
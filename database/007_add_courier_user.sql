@@ -0,0 +1,8 @@
+-- 007_add_courier_user.sql
+-- Links each courier to the driver account that reports its position.
+-- Drivers may only update the courier linked to them (app/controllers/courier_controller.py);
+-- couriers without a linked account can be updated by admins only.
+BEGIN;
+SET search_path TO quickdrop;
+ALTER TABLE courier ADD COLUMN IF NOT EXISTS user_id INTEGER UNIQUE REFERENCES "user"(user_id) ON DELETE SET NULL;
+COMMIT;
@@ -0,0 +1,8 @@
+-- 008_add_users_token_version.sql
+-- Adds the token_version the API stamps into JWT user snapshots
+-- (app/services/token_service.py). The users table is created by the backend
+-- (init_db.py) in the connection's default schema, not in quickdrop, and
+-- db.create_all() does not add columns to a table that already exists.
+BEGIN;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
+COMMIT;
@@ -0,0 +1,18 @@
+-- 009_backfill_shipment_pickup.sql
+-- 005 added shipment.pickup_latitude/pickup_longitude empty. The dispatcher
+-- (app/services/dispatch_service.py) falls back to the order's pickup address
+-- when they are NULL; this fills them in for existing shipments so reports
+-- reading the shipment table alone see their pickup point too.
+BEGIN;
+SET search_path TO quickdrop;
+UPDATE shipment s
+SET pickup_latitude = a.latitude,
+    pickup_longitude = a.longitude
+FROM "order" o
+JOIN address a ON a.address_id = o.pickup_address_id
+WHERE o.order_id = s.order_id
+  AND s.pickup_latitude IS NULL
+  AND s.pickup_longitude IS NULL
+  AND a.latitude IS NOT NULL
+  AND a.longitude IS NOT NULL;
+COMMIT;
@@ -57,16 +57,22 @@ CREATE TABLE quickdrop.address (
     city            VARCHAR(100),
     longitude       DECIMAL(9,6),
     latitude        DECIMAL(9,6),
+    geohash         VARCHAR(12), -- written by the backend for prefix proximity lookups
     created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
 -- COURIER
 CREATE TABLE quickdrop.courier (
     courier_id      SERIAL PRIMARY KEY,
+    user_id         INTEGER UNIQUE REFERENCES quickdrop."user"(user_id) ON DELETE SET NULL, -- driver account reporting its position
     name            VARCHAR(50) NOT NULL,
     vehicle_plate   VARCHAR(15), -- allow a bit more than 7 for international flexibility
     phone           VARCHAR(25) UNIQUE,
     status          VARCHAR(50) NOT NULL DEFAULT 'inactive', -- e.g., active, inactive, banned, offshift
+    latitude        DECIMAL(9,6), -- last known position
+    longitude       DECIMAL(9,6),
+    geohash         VARCHAR(12),
+    location_updated_at TIMESTAMPTZ,
     created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
@@ -128,15 +134,32 @@ CREATE TABLE quickdrop.shipment (
     picked_at       TIMESTAMPTZ,
     courier_id      INTEGER REFERENCES quickdrop.courier(courier_id) ON DELETE SET NULL,
     delivered_at    TIMESTAMPTZ,
-    status          VARCHAR(50) NOT NULL DEFAULT 'unassigned' -- unassigned, assigned, picked_up, in_transit, delivered, failed
+    status          VARCHAR(50) NOT NULL DEFAULT 'unassigned', -- unassigned, assigned, picked_up, in_transit, delivered, failed
+    pickup_latitude DOUBLE PRECISION, -- overrides the order's pickup address for dispatch
+    pickup_longitude DOUBLE PRECISION,
+    assigned_at     TIMESTAMPTZ
 );
 
+-- LOCATION PING (courier position history, one partition per day; see 004_create_location_ping.sql)
+CREATE TABLE quickdrop.location_ping (
+    courier_id      INTEGER NOT NULL,
+    recorded_at     TIMESTAMPTZ NOT NULL,
+    latitude        DOUBLE PRECISION NOT NULL,
+    longitude       DOUBLE PRECISION NOT NULL,
+    geohash         VARCHAR(12) NOT NULL,
+    PRIMARY KEY (courier_id, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+
 -- INDEXES (basic)
 CREATE INDEX IF NOT EXISTS idx_user_role ON quickdrop."user"(role);
 CREATE INDEX IF NOT EXISTS idx_address_user ON quickdrop.address(user_id);
 CREATE INDEX IF NOT EXISTS idx_order_user ON quickdrop."order"(user_id);
 CREATE INDEX IF NOT EXISTS idx_order_status ON quickdrop."order"(status);
+CREATE INDEX IF NOT EXISTS idx_order_created_at ON quickdrop."order"(created_at);
 CREATE INDEX IF NOT EXISTS idx_payment_order ON quickdrop.payment(order_id);
 CREATE INDEX IF NOT EXISTS idx_shipment_order ON quickdrop.shipment(order_id);
 CREATE INDEX IF NOT EXISTS idx_shipment_courier ON quickdrop.shipment(courier_id);
+CREATE INDEX IF NOT EXISTS idx_shipment_status_shipment ON quickdrop.shipment(status, shipment_id);
 CREATE INDEX IF NOT EXISTS idx_product_store ON quickdrop.product(store_id);
+CREATE INDEX IF NOT EXISTS idx_address_geohash ON quickdrop.address(geohash text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_courier_geohash ON quickdrop.courier(geohash text_pattern_ops);